@@ -3,11 +3,14 @@ __version__ = '3.2.2'
 
 from .throttle import (
     throttle,
-    ThrottleType
+    ThrottleType,
+    ThrottleAlgorithm,
+    ThrottleQueueFullError
 )
 
 from .repeat import (
     repeat,
+    repeat_iter,
     REPEAT_INFINITY
 )
 
@@ -17,6 +20,74 @@ from .schedule import (
     Weekday
 )
 
+from .cron import (
+    schedule_cron
+)
+
+from .retry import (
+    retry,
+    RetryBudget
+)
+
 from .timeout import (
     timeout,
 )
+
+from .pipeline import (
+    pipeline
+)
+
+from .limit import (
+    limit,
+    LimitQueueFullError,
+    LimitQueueTimeoutError
+)
+
+from .singleflight import (
+    singleflight
+)
+
+from .cache import (
+    async_cache,
+    CacheInfo,
+    CachedFunc
+)
+
+from .batch import (
+    batch
+)
+
+from .offload import (
+    offload,
+    OffloadQueueFullError
+)
+
+from .hedge import (
+    hedge
+)
+
+from .circuit_breaker import (
+    circuit_breaker,
+    CircuitOpenError
+)
+
+from .observer import (
+    Observer,
+    Metrics
+)
+
+from .clock import (
+    Clock,
+    LoopClock
+)
+
+from .timer import (
+    SharedTimer
+)
+
+from .backend import (
+    ThrottleBackend,
+    ThrottleBackendError,
+    MmapBackend,
+    RedisBackend
+)
@@ -0,0 +1,334 @@
+import os
+import time
+import mmap
+import math
+import struct
+import asyncio
+import hashlib
+import contextlib
+from typing import (
+    Callable,
+    Optional,
+    Tuple
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+# The wall clock, which processes on the same host agree on
+DEFAULT_BACKEND_CLOCK: Callable[[], float] = time.time
+
+
+class ThrottleBackendError(Exception):
+    pass
+
+
+class ThrottleBackend:
+    """
+    The storage of the throttle state which could be shared between processes.
+
+    A backend counts the permits of aligned fixed windows, i.e. the window of
+    a call at `time` is `time // interval`, so that all processes agree on
+    the boundaries of windows without communicating.
+
+    Args:
+        batch (int = 1): the number of permits a process reserves at a time, which amortizes the cost of IPC. The permits reserved but not used by a process expire with the window
+        clock (Callable[[], float] = time.time): the clock shared by all processes
+    """
+
+    batch: int
+    time: Callable[[], float]
+
+    def __init__(
+        self,
+        batch: int = 1,
+        clock: Callable[[], float] = DEFAULT_BACKEND_CLOCK
+    ):
+        if batch <= 0:
+            raise ValueError(f'batch must be positive, but got {batch}')
+
+        self.batch = batch
+        self.time = clock
+
+    async def reserve(
+        self,
+        key: str,
+        permits: int,
+        limit: int,
+        interval: float
+    ) -> Tuple[int, float]:
+        """
+        Reserve at most `permits` permits from the current window of `key`
+
+        Returns:
+            Tuple[int, float]: the number of permits granted, and the time when the current window expires
+        """
+
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+def _hash(key: str) -> int:
+    # `hash()` is randomized for each process, so it could not be used
+    value = int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(),
+        'little'
+    )
+
+    # 0 is reserved for empty records
+    return value or 1
+
+
+# key hash, expiration time of the window, count of permits
+RECORD = struct.Struct('<Qdq')
+
+DEFAULT_MMAP_SLOTS = 4096
+
+
+class MmapBackend(ThrottleBackend):
+    """
+    A backend on a memory-mapped file for worker processes on the same host.
+
+    The file is an open-addressing hash table of fixed-size records, and every
+    reservation updates the table atomically under an exclusive file lock.
+
+    Args:
+        path (str): the path of the shared file, which will be created if not exists
+        slots (int = 4096): the maximum number of keys of live windows. All processes should use the same value
+    """
+
+    _fd: int
+    _mmap: mmap.mmap
+    _slots: int
+
+    def __init__(
+        self,
+        path: str,
+        slots: int = DEFAULT_MMAP_SLOTS,
+        batch: int = 1,
+        clock: Callable[[], float] = DEFAULT_BACKEND_CLOCK
+    ):
+        super().__init__(batch, clock)
+
+        if fcntl is None:  # pragma: no cover
+            raise ThrottleBackendError('MmapBackend requires fcntl')
+
+        size = RECORD.size * slots
+
+        self._slots = slots
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        with self._lock():
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+
+        self._mmap = mmap.mmap(self._fd, size)
+
+    @contextlib.contextmanager
+    def _lock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _find(self, key_hash: int, now: float) -> int:
+        """
+        Returns the offset of the record of `key_hash`,
+        or a reusable one if not found
+        """
+
+        slots = self._slots
+        start = key_hash % slots
+        reusable: Optional[int] = None
+
+        for i in range(slots):
+            offset = ((start + i) % slots) * RECORD.size
+            stored_hash, expires, _ = RECORD.unpack_from(self._mmap, offset)
+
+            if stored_hash == key_hash:
+                return offset
+
+            if stored_hash == 0:
+                # The end of the probe chain
+                return offset if reusable is None else reusable
+
+            if reusable is None and expires <= now:
+                reusable = offset
+
+        if reusable is None:
+            raise ThrottleBackendError(
+                f'no slot available, more than {slots} live keys'
+            )
+
+        return reusable
+
+    def _reserve(
+        self,
+        key: str,
+        permits: int,
+        limit: int,
+        interval: float
+    ) -> Tuple[int, float]:
+        key_hash = _hash(key)
+
+        with self._lock():
+            now = self.time()
+            expires = (now // interval + 1) * interval
+
+            offset = self._find(key_hash, now)
+            stored_hash, stored_expires, count = RECORD.unpack_from(
+                self._mmap, offset
+            )
+
+            if stored_hash != key_hash or stored_expires != expires:
+                # A new window
+                count = 0
+
+            granted = max(0, min(permits, limit - count))
+            RECORD.pack_into(
+                self._mmap, offset, key_hash, expires, count + granted
+            )
+
+        return granted, expires
+
+    async def reserve(
+        self,
+        key: str,
+        permits: int,
+        limit: int,
+        interval: float
+    ) -> Tuple[int, float]:
+        # The lock is only held for a few microseconds,
+        # so it is not worth a thread
+        return self._reserve(key, permits, limit, interval)
+
+    def close(self) -> None:
+        self._mmap.close()
+        os.close(self._fd)
+
+
+def _encode_command(*args) -> bytes:
+    parts = [f'*{len(args)}\r\n'.encode()]
+
+    for arg in args:
+        data = str(arg).encode()
+        parts.append(f'${len(data)}\r\n'.encode() + data + b'\r\n')
+
+    return b''.join(parts)
+
+
+async def _read_integer(reader: asyncio.StreamReader) -> int:
+    line = await reader.readline()
+
+    if not line:
+        raise ThrottleBackendError('connection closed')
+
+    if line[:1] != b':':
+        raise ThrottleBackendError(
+            f'unexpected reply: {line.decode(errors="replace").strip()}'
+        )
+
+    return int(line[1:])
+
+
+class RedisBackend(ThrottleBackend):
+    """
+    A backend which speaks the Redis protocol, over TCP or a unix socket.
+
+    Each reservation costs one round trip of a pipelined `INCRBY` and
+    `PEXPIRE` on the counter of the current window.
+
+    Args:
+        host (str = '127.0.0.1'):
+        port (int = 6379):
+        path (str | None = None): the path of the unix socket, which has higher priority than `host` and `port`
+        prefix (str = 'aiodecorator:'): the prefix of the keys of counters
+    """
+
+    _reader: Optional[asyncio.StreamReader]
+    _writer: Optional[asyncio.StreamWriter]
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 6379,
+        path: Optional[str] = None,
+        prefix: str = 'aiodecorator:',
+        batch: int = 1,
+        clock: Callable[[], float] = DEFAULT_BACKEND_CLOCK
+    ):
+        super().__init__(batch, clock)
+
+        self._host = host
+        self._port = port
+        self._path = path
+        self._prefix = prefix
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self._reader is None or self._writer is None:
+            if self._path is not None:
+                self._reader, self._writer = await asyncio.open_unix_connection(
+                    self._path
+                )
+            else:
+                self._reader, self._writer = await asyncio.open_connection(
+                    self._host, self._port
+                )
+
+        return self._reader, self._writer
+
+    async def reserve(
+        self,
+        key: str,
+        permits: int,
+        limit: int,
+        interval: float
+    ) -> Tuple[int, float]:
+        now = self.time()
+        window = int(now // interval)
+        expires = (window + 1) * interval
+        name = f'{self._prefix}{key}:{window}'
+
+        # Keep the counter a little longer than the window,
+        # in case of clock skews between processes
+        ttl = math.ceil(interval * 2000)
+
+        async with self._lock:
+            reader, writer = await self._connect()
+
+            try:
+                writer.write(
+                    _encode_command('INCRBY', name, permits)
+                    + _encode_command('PEXPIRE', name, ttl)
+                )
+                await writer.drain()
+
+                total = await _read_integer(reader)
+                await _read_integer(reader)
+
+            except BaseException:
+                # The connection is in an unknown state, such as the caller
+                # is canceled before the replies are read, which would
+                # otherwise be read as the replies of the next reservation
+                self.close()
+                raise
+
+        return max(0, min(permits, limit - (total - permits))), expires
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+        self._reader = None
+        self._writer = None
@@ -0,0 +1,172 @@
+import asyncio
+import functools
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Sequence,
+    Set
+)
+
+from .common import Decorator
+
+
+BulkFunc = Callable[[List[Any]], Awaitable[Sequence[Any]]]
+
+
+class Batcher:
+    """
+    Collects items into batches, and calls `fn` with each batch.
+
+    See `batch()` for the arguments
+    """
+
+    __slots__ = (
+        'fn',
+        'max_size',
+        'max_wait',
+        '_items',
+        '_futures',
+        '_timer',
+        '_tasks'
+    )
+
+    fn: BulkFunc
+    max_size: int
+    max_wait: float
+
+    # The items of the current batch, and the futures of their callers
+    _items: List[Any]
+    _futures: List[asyncio.Future]
+
+    _timer: Optional[asyncio.TimerHandle]
+
+    # The batches in flight
+    _tasks: Set[asyncio.Task]
+
+    def __init__(
+        self,
+        fn: BulkFunc,
+        max_size: int,
+        max_wait: float
+    ):
+        self.fn = fn
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._items = []
+        self._futures = []
+        self._timer = None
+        self._tasks = set()
+
+    def submit(self, item: Any) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self._items.append(item)
+        self._futures.append(future)
+
+        if len(self._items) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush)
+
+        return future
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        items = self._items
+        futures = self._futures
+        self._items = []
+        self._futures = []
+
+        # Skip the items whose callers have gone
+        live = [
+            (item, future)
+            for item, future in zip(items, futures)
+            if not future.done()
+        ]
+
+        if not live:
+            return
+
+        task = asyncio.ensure_future(self._run(
+            [item for item, _ in live],
+            [future for _, future in live]
+        ))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self,
+        items: List[Any],
+        futures: List[asyncio.Future]
+    ) -> None:
+        try:
+            results = await self.fn(items)
+
+            if len(results) != len(items):
+                raise ValueError(
+                    f'expect {len(items)} results, but got {len(results)}'
+                )
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as exception:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exception)
+            return
+
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def batch(
+    max_size: int,
+    max_wait: float = 0.
+) -> Decorator:
+    """
+    Returns a decorator that collects concurrent calls with single items into
+    batches, and calls the bulk function `fn` once with the list of items
+    of each batch, which should return the list of results in the same order.
+    Each caller gets the result of its own item.
+
+    A batch is flushed once it has `max_size` items, or `max_wait` seconds
+    after its first item arrives. If `fn` raises, all callers of the batch
+    get the exception.
+
+    Args:
+        max_size (int): the maximum number of items of a batch
+        max_wait (float = 0.): the maximum seconds to wait for more items. If 0, only the calls in the same iteration of the event loop are batched
+
+    Usage::
+
+        # At most 10 bulk requests per second,
+        # rather than 10 items per second
+        @batch(100, 0.01)
+        @throttle(10, 1, 'wait')
+        async def get_users(user_ids):
+            return await api.get_users(user_ids)
+
+        user = await get_users(user_id)
+    """
+
+    if max_size < 1:
+        raise ValueError(f'max_size must be positive, but got {max_size}')
+
+    def decorator(fn: BulkFunc) -> Callable[[Any], Awaitable[Any]]:
+        batcher = Batcher(fn, max_size, max_wait)
+
+        @functools.wraps(fn)
+        async def wrapper(item: Any) -> Any:
+            return await batcher.submit(item)
+
+        return wrapper
+    return decorator
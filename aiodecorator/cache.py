@@ -0,0 +1,286 @@
+import math
+import asyncio
+import functools
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    NamedTuple,
+    Optional,
+    Protocol,
+    cast
+)
+
+from .common import (
+    Decorator,
+    Func,
+    T
+)
+from .clock import (
+    Clock,
+    DEFAULT_CLOCK
+)
+from .store import DEFAULT_MAX_KEYS
+from .throttle import KeyFunc
+from .singleflight import _default_key
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    # Hits on stale values, which are also counted in `hits`
+    stale_hits: int
+    misses: int
+    evictions: int
+    max_size: int
+    size: int
+
+
+class CachedFunc(Protocol):
+    """
+    The function decorated by `async_cache()`
+    """
+
+    cache_info: Callable[[], CacheInfo]
+    cache_clear: Callable[[], None]
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Awaitable[Any]:
+        ...
+
+
+class _Entry:
+    __slots__ = (
+        'value',
+        'expires'
+    )
+
+    value: Any
+    expires: float
+
+    def __init__(self, value: Any, expires: float):
+        self.value = value
+        self.expires = expires
+
+
+class Cache:
+    """
+    The state of `async_cache()`, in which the entries are kept in the order
+    of last access, so that both lookups and evictions are O(1).
+
+    See `async_cache()` for the arguments
+    """
+
+    __slots__ = (
+        'max_size',
+        'ttl',
+        'stale_ttl',
+        'hits',
+        'stale_hits',
+        'misses',
+        'evictions',
+        '_clock',
+        '_entries',
+        '_flights',
+        '_generation'
+    )
+
+    max_size: int
+    ttl: Optional[float]
+    stale_ttl: Optional[float]
+
+    hits: int
+    stale_hits: int
+    misses: int
+    evictions: int
+
+    _clock: Clock
+    _entries: 'OrderedDict[Hashable, _Entry]'
+
+    # The loading calls in flight, including background refreshes
+    _flights: Dict[Hashable, asyncio.Future]
+
+    # Increases on each `clear()`, so that a call in flight since before
+    # does not put its result back
+    _generation: int
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: Optional[float],
+        stale_ttl: Optional[float],
+        clock: Clock
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._generation = 0
+        self.clear()
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            self.hits,
+            self.stale_hits,
+            self.misses,
+            self.evictions,
+            self.max_size,
+            len(self._entries)
+        )
+
+    def clear(self) -> None:
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries.clear()
+        self._flights.clear()
+        self._generation += 1
+
+    def put(self, key: Hashable, value: Any) -> None:
+        entries = self._entries
+        expires = (
+            math.inf if self.ttl is None
+            else self._clock.time() + self.ttl
+        )
+
+        entry = entries.get(key)
+
+        if entry is not None:
+            entry.value = value
+            entry.expires = expires
+            entries.move_to_end(key)
+            return
+
+        if len(entries) >= self.max_size:
+            # Evict the least recently used one
+            entries.popitem(last=False)
+            self.evictions += 1
+
+        entries[key] = _Entry(value, expires)
+
+    async def get(self, key: Hashable, load: Func) -> Any:
+        """
+        Returns the cached value of `key`, or loads it by `load()`
+        """
+
+        entries = self._entries
+        entry = entries.get(key)
+
+        if entry is not None:
+            now = self._clock.time()
+
+            if now < entry.expires:
+                self.hits += 1
+                entries.move_to_end(key)
+                return entry.value
+
+            if (
+                self.stale_ttl is not None
+                and now < entry.expires + self.stale_ttl
+            ):
+                # Serve the stale value, and refresh it in the background
+                self.hits += 1
+                self.stale_hits += 1
+                entries.move_to_end(key)
+                self._load(key, load)
+                return entry.value
+
+            del entries[key]
+
+        self.misses += 1
+
+        # The loading call is not canceled with the caller,
+        # so that the result is still cached for the following calls
+        return await asyncio.shield(self._load(key, load))
+
+    def _load(self, key: Hashable, load: Func) -> asyncio.Future:
+        flight = self._flights.get(key)
+
+        if flight is not None:
+            return flight
+
+        flight = asyncio.ensure_future(load())
+        self._flights[key] = flight
+        flight.add_done_callback(
+            functools.partial(self._on_loaded, key, self._generation)
+        )
+        return flight
+
+    def _on_loaded(
+        self,
+        key: Hashable,
+        generation: int,
+        flight: asyncio.Future
+    ) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+        # Exceptions are not cached. Retrieve the exception,
+        # so that a failed background refresh is not reported
+        if flight.cancelled() or flight.exception() is not None:
+            return
+
+        if generation != self._generation:
+            # The cache is cleared while loading
+            return
+
+        self.put(key, flight.result())
+
+
+def async_cache(
+    max_size: int = DEFAULT_MAX_KEYS,
+    ttl: Optional[float] = None,
+    stale_ttl: Optional[float] = None,
+    key: Optional[KeyFunc] = None,
+    clock: Clock = DEFAULT_CLOCK
+) -> Decorator:
+    """
+    Returns a decorator that caches the results of the function `fn`,
+    with at most `max_size` entries in LRU order.
+
+    Concurrent calls of the same key which miss the cache share
+    a single call of `fn`. Exceptions are not cached.
+
+    The decorated function has `cache_info()` which returns the statistics of the cache, and `cache_clear()` which clears the cache and the statistics.
+
+    Args:
+        max_size (int = 10000): the maximum number of entries
+        ttl (float | None = None): the seconds after which an entry expires since it is loaded. `None` means never
+        stale_ttl (float | None = None): if specified, an expired entry is still returned within `stale_ttl` seconds after it expires, while it is refreshed in the background, i.e. stale-while-revalidate
+        key (Callable[..., Hashable] | None = None): returns the key of a call, defaults to the arguments, which should be hashable
+        clock (Clock = DEFAULT_CLOCK): the clock to read the time from
+
+    Usage::
+
+        @async_cache(ttl=60, stale_ttl=600)
+        async def get_config(name):
+            return await fetch_config(name)
+
+        print(get_config.cache_info())
+    """
+
+    if max_size <= 0:
+        raise ValueError(f'max_size must be positive, but got {max_size}')
+
+    get_key: KeyFunc = _default_key if key is None else key
+
+    def decorator(fn: Func) -> Func:
+        cache = Cache(max_size, ttl, stale_ttl, clock)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            return await cache.get(
+                get_key(*args, **kwargs),
+                functools.partial(fn, *args, **kwargs)
+            )
+
+        cached = cast(CachedFunc, wrapper)
+        cached.cache_info = cache.info
+        cached.cache_clear = cache.clear
+
+        return cached
+    return decorator
@@ -0,0 +1,360 @@
+import asyncio
+import functools
+from typing import (
+    Any,
+    Hashable,
+    List,
+    Literal,
+    Optional
+)
+
+from .common import (
+    Decorator,
+    Func,
+    T
+)
+from .clock import (
+    Clock,
+    DEFAULT_CLOCK
+)
+from .store import (
+    KeyedStore,
+    DEFAULT_MAX_KEYS
+)
+from .retry import ExceptionTypes
+from .timeout import timed_out
+from .throttle import KeyFunc
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+CircuitState = Literal['closed', 'open', 'half_open']
+
+# The outcomes of calls
+SUCCESS = 0
+FAILURE = 1
+TIMEOUT = 2
+
+
+class CircuitBreaker:
+    """
+    The state of a circuit breaker, which counts the outcomes of calls over
+    a rolling window of `buckets` buckets, so that the memory is constant
+    and each call costs O(1).
+
+    See `circuit_breaker()` for the arguments
+    """
+
+    __slots__ = (
+        'failure_rate',
+        'timeout_rate',
+        'min_calls',
+        'recovery',
+        'half_open_calls',
+        'state',
+        'opened_at',
+        'calls',
+        'failures',
+        'timeouts',
+        'generation',
+        '_bucket_size',
+        '_buckets',
+        '_current',
+        '_probes',
+        '_successes'
+    )
+
+    failure_rate: float
+    timeout_rate: Optional[float]
+    min_calls: int
+    recovery: float
+    half_open_calls: int
+
+    state: CircuitState
+    opened_at: float
+
+    # The totals of the rolling window
+    calls: int
+    failures: int
+    timeouts: int
+
+    # Increases on each change of the state, so that a call admitted
+    # in an older state is not counted in the current one
+    generation: int
+
+    _bucket_size: float
+    # Each bucket is [index, calls, failures, timeouts]
+    _buckets: List[List[int]]
+    _current: int
+
+    # The number of probes in flight and succeeded in the half-open state
+    _probes: int
+    _successes: int
+
+    def __init__(
+        self,
+        failure_rate: float,
+        timeout_rate: Optional[float],
+        window: float,
+        buckets: int,
+        min_calls: int,
+        recovery: float,
+        half_open_calls: int
+    ):
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self.min_calls = min_calls
+        self.recovery = recovery
+        self.half_open_calls = half_open_calls
+
+        self._bucket_size = window / buckets
+        self._buckets = [[-1, 0, 0, 0] for _ in range(buckets)]
+        self.generation = 0
+        self._close()
+
+    def _close(self) -> None:
+        self.state = 'closed'
+        self.generation += 1
+        self.opened_at = 0.
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self._current = -1
+        self._probes = 0
+        self._successes = 0
+
+        for bucket in self._buckets:
+            bucket[:] = [-1, 0, 0, 0]
+
+    def _open(self, now: float) -> None:
+        self.state = 'open'
+        self.generation += 1
+        self.opened_at = now
+        self._probes = 0
+        self._successes = 0
+
+    def _bucket(self, now: float) -> List[int]:
+        index = int(now // self._bucket_size)
+        buckets = self._buckets
+        bucket = buckets[index % len(buckets)]
+
+        if bucket[0] != index:
+            # The bucket is out of the window, reuse it
+            self.calls -= bucket[1]
+            self.failures -= bucket[2]
+            self.timeouts -= bucket[3]
+            bucket[:] = [index, 0, 0, 0]
+
+        if index != self._current:
+            self._current = index
+
+            # Expire all buckets out of the window, which is at most
+            # `buckets` steps, no matter how long the circuit is idle
+            oldest = index - len(buckets)
+            for other in buckets:
+                if -1 < other[0] <= oldest:
+                    self.calls -= other[1]
+                    self.failures -= other[2]
+                    self.timeouts -= other[3]
+                    other[:] = [-1, 0, 0, 0]
+
+        return bucket
+
+    def before_call(self, now: float) -> int:
+        """
+        Raises `CircuitOpenError` if the call is not allowed,
+        otherwise returns the generation which the call is admitted in,
+        which should be passed to `after_call()` or `cancel_call()`
+        """
+
+        if self.state == 'closed':
+            return self.generation
+
+        if self.state == 'open':
+            if now - self.opened_at < self.recovery:
+                raise CircuitOpenError('circuit is open')
+
+            self.state = 'half_open'
+            self.generation += 1
+
+        # Half open
+        if self._probes >= self.half_open_calls:
+            raise CircuitOpenError('circuit is half open')
+
+        self._probes += 1
+        return self.generation
+
+    def cancel_call(self, generation: int) -> None:
+        """
+        The outcome of a canceled call is unknown, so that nothing is counted,
+        and only the slot of the probe is given back
+        """
+
+        if generation == self.generation and self.state == 'half_open':
+            self._probes -= 1
+
+    def after_call(self, now: float, outcome: int, generation: int) -> None:
+        if generation != self.generation:
+            # Admitted before the state changed, such as a call started
+            # before the circuit opened, which is not a probe
+            return
+
+        if self.state == 'half_open':
+            self._probes -= 1
+
+            if outcome != SUCCESS:
+                self._open(now)
+                return
+
+            self._successes += 1
+
+            if self._successes >= self.half_open_calls:
+                self._close()
+
+            return
+
+        bucket = self._bucket(now)
+        bucket[1] += 1
+        self.calls += 1
+
+        if outcome == SUCCESS:
+            return
+
+        bucket[2] += 1
+        self.failures += 1
+
+        if outcome == TIMEOUT:
+            bucket[3] += 1
+            self.timeouts += 1
+
+        if self.calls < self.min_calls:
+            return
+
+        if (
+            self.failures >= self.failure_rate * self.calls
+            or (
+                self.timeout_rate is not None
+                and self.timeouts >= self.timeout_rate * self.calls
+            )
+        ):
+            self._open(now)
+
+
+def circuit_breaker(
+    failure_rate: float = 0.5,
+    timeout_rate: Optional[float] = None,
+    window: float = 10.,
+    buckets: int = 10,
+    min_calls: int = 10,
+    recovery: float = 30.,
+    half_open_calls: int = 1,
+    timeout: Optional[float] = None,
+    exceptions: ExceptionTypes = Exception,
+    key: Optional[KeyFunc] = None,
+    max_keys: int = DEFAULT_MAX_KEYS,
+    key_ttl: Optional[float] = None,
+    clock: Clock = DEFAULT_CLOCK
+) -> Decorator:
+    """
+    Returns a decorator that stops calling the function `fn` for a while,
+    and fails fast with `CircuitOpenError`, if it fails too often.
+
+    - closed: calls are allowed, and their outcomes are counted over a rolling window. If the failure rate or the timeout rate reaches the threshold, the circuit opens.
+    - open: calls fail fast for `recovery` seconds, and then the circuit becomes half open.
+    - half open: at most `half_open_calls` calls are allowed as probes. If all of them succeed, the circuit closes, otherwise it opens again.
+
+    Args:
+        failure_rate (float = 0.5): the failure rate to open the circuit, timeouts are also failures
+        timeout_rate (float | None = None): the timeout rate to open the circuit. `None` means only the failure rate is checked
+        window (float = 10.): the rolling window in seconds
+        buckets (int = 10): the number of buckets of the rolling window
+        min_calls (int = 10): the minimum number of calls in the window before the rates are checked
+        recovery (float = 30.): the seconds to keep the circuit open
+        half_open_calls (int = 1): the number of probes in the half-open state
+        timeout (float | None = None): if specified, a call is canceled and counted as a timeout if it takes longer than `timeout` seconds
+        exceptions (Type[BaseException] | Tuple[Type[BaseException], ...] = Exception): the exceptions which are counted as failures, and `TimeoutError` is always a timeout. A call canceled by a `timeout()` stacked above or beneath is also a timeout, but a call canceled otherwise, such as by a bare `asyncio.timeout()`, is not counted
+        key (Callable[..., Hashable] | None = None): if specified, there is a separate circuit for each return value of `key(*args, **kwargs)`
+        max_keys (int = 10000): the maximum number of circuits to keep track of. Only used when `key` is specified
+        key_ttl (float | None = None): the idle time in seconds after which a circuit is evicted. Only used when `key` is specified
+        clock (Clock = DEFAULT_CLOCK): the clock to read the time from
+
+    Usage::
+
+        @circuit_breaker(failure_rate=0.5, timeout=1, recovery=10)
+        async def request():
+            pass
+
+        try:
+            await request()
+        except CircuitOpenError:
+            # Fail fast
+            pass
+    """
+
+    def create(k: Hashable) -> CircuitBreaker:
+        return CircuitBreaker(
+            failure_rate,
+            timeout_rate,
+            window,
+            buckets,
+            min_calls,
+            recovery,
+            half_open_calls
+        )
+
+    def decorator(fn: Func) -> Func:
+        if key is None:
+            single = create(None)
+
+            def get_breaker(args, kwargs, now: float) -> CircuitBreaker:
+                return single
+
+        else:
+            get_key: KeyFunc = key
+            store: KeyedStore[CircuitBreaker] = KeyedStore(
+                create,
+                max_keys,
+                key_ttl
+            )
+
+            def get_breaker(args, kwargs, now: float) -> CircuitBreaker:
+                return store.get(get_key(*args, **kwargs), now)
+
+        async def call(args, kwargs) -> Any:
+            if timeout is None:
+                return await fn(*args, **kwargs)
+
+            async with asyncio.timeout(timeout):
+                return await fn(*args, **kwargs)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            now = clock.time()
+            breaker = get_breaker(args, kwargs, now)
+            generation = breaker.before_call(now)
+
+            try:
+                result = await call(args, kwargs)
+            except TimeoutError:
+                breaker.after_call(clock.time(), TIMEOUT, generation)
+                raise
+            except exceptions:
+                breaker.after_call(clock.time(), FAILURE, generation)
+                raise
+            except BaseException as e:
+                if isinstance(e, asyncio.CancelledError) and timed_out():
+                    # Canceled by a `timeout()` stacked above
+                    breaker.after_call(clock.time(), TIMEOUT, generation)
+                else:
+                    # Such as cancellation by the caller,
+                    # which is neither a success nor the fault of `fn`
+                    breaker.cancel_call(generation)
+                raise
+
+            breaker.after_call(clock.time(), SUCCESS, generation)
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,45 @@
+import time
+import asyncio
+from datetime import datetime
+
+
+class Clock:
+    """
+    The clock which decorators use to read the current time and to sleep.
+
+    `time()` should be monotonic, which is used for interval maths,
+    and `now()` is the wall clock time, which is used for natural schedules.
+    """
+
+    def time(self) -> float:
+        raise NotImplementedError
+
+    def now(self) -> datetime:
+        raise NotImplementedError
+
+    async def sleep(self, seconds: float) -> None:
+        raise NotImplementedError
+
+
+class LoopClock(Clock):
+    """
+    The default clock, which reads the time of the running event loop,
+    so that interval maths never suffer from wall clock jumps
+    """
+
+    def time(self) -> float:
+        try:
+            return asyncio.get_running_loop().time()
+        except RuntimeError:
+            # Not inside an event loop, the loop uses the monotonic clock
+            # by default
+            return time.monotonic()
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+DEFAULT_CLOCK = LoopClock()
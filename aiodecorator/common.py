@@ -1,4 +1,6 @@
+import asyncio
 from typing import (
+    Any,
     TypeVar,
     Callable,
     Awaitable
@@ -9,3 +11,15 @@ T = TypeVar('T')
 
 Func = Callable[..., Awaitable[T]]
 Decorator = Callable[[Func], Func]
+
+
+def is_coroutine_function(fn: Any) -> bool:
+    """
+    Returns whether `fn` is a coroutine function,
+    or a callable object whose `__call__` is a coroutine function
+    """
+
+    return (
+        asyncio.iscoroutinefunction(fn)
+        or asyncio.iscoroutinefunction(getattr(fn, '__call__', None))
+    )
@@ -0,0 +1,331 @@
+import functools
+import calendar
+from datetime import datetime, timedelta
+from typing import (
+    Dict,
+    Optional,
+    Tuple
+)
+
+from .common import (
+    Decorator,
+    Func,
+    T
+)
+from .clock import (
+    Clock,
+    DEFAULT_CLOCK
+)
+from .observer import (
+    Observer,
+    observe_schedule
+)
+from .stage import (
+    ScheduleStage,
+    with_stage
+)
+
+
+MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+
+MONTH_NAMES = {
+    name: index + 1
+    for index, name in enumerate([
+        'jan', 'feb', 'mar', 'apr', 'may', 'jun',
+        'jul', 'aug', 'sep', 'oct', 'nov', 'dec'
+    ])
+}
+
+WEEKDAY_NAMES = {
+    name: index
+    for index, name in enumerate([
+        'sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'
+    ])
+}
+
+# (min, max, names) of each field
+FIELDS = (
+    (0, 59, None),
+    (0, 23, None),
+    (1, 31, None),
+    (1, 12, MONTH_NAMES),
+    # 7 is also sunday
+    (0, 7, WEEKDAY_NAMES),
+)
+
+# A cron schedule never matches within such years, e.g. `0 0 30 2 *`
+MAX_YEARS = 28
+
+
+def _parse_value(
+    value: str,
+    names: Optional[Dict[str, int]]
+) -> int:
+    if names is not None and value.lower() in names:
+        return names[value.lower()]
+
+    return int(value)
+
+
+def _parse_field(
+    field: str,
+    low: int,
+    high: int,
+    names: Optional[Dict[str, int]]
+) -> int:
+    """
+    Parses a cron field into a bitset, in which bit `n` is set if
+    the value `n` matches
+    """
+
+    bits = 0
+
+    for part in field.split(','):
+        step = 1
+
+        if '/' in part:
+            part, step_str = part.split('/', 1)
+            step = int(step_str)
+
+            if step <= 0:
+                raise ValueError(f'invalid step "{step_str}"')
+
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_str, end_str = part.split('-', 1)
+            start = _parse_value(start_str, names)
+            end = _parse_value(end_str, names)
+        else:
+            start = _parse_value(part, names)
+            # `n/step` means from `n` to the max
+            end = high if step > 1 else start
+
+        if start < low or end > high or start > end:
+            raise ValueError(f'value out of range [{low}, {high}]: "{part}"')
+
+        for value in range(start, end + 1, step):
+            bits |= 1 << value
+
+    return bits
+
+
+def _next_bit(bits: int, start: int) -> Optional[int]:
+    """
+    Returns the smallest set bit of `bits` which is not less than `start`
+    """
+
+    masked = bits >> start
+
+    if not masked:
+        return None
+
+    return start + (masked & -masked).bit_length() - 1
+
+
+class CronScheduler:
+    """
+    A scheduler of a cron expression, which is parsed once into bitsets.
+
+    The next time is computed by jumping directly to the next matching value
+    of each field, from months down to minutes, rather than scanning
+    minute by minute.
+
+    Args:
+        expression (str): the cron expression of five fields `minute hour day-of-month month day-of-week`, or a macro such as `@hourly`
+    """
+
+    __slots__ = (
+        'expression',
+        'minutes',
+        'hours',
+        'days',
+        'months',
+        'weekdays',
+        '_day_or_weekday',
+        '_day_bits_cache'
+    )
+
+    expression: str
+    minutes: int
+    hours: int
+    days: int
+    months: int
+    weekdays: int
+
+    # Whether a day matches either day-of-month or day-of-week,
+    # which is the case only if both of them are restricted
+    _day_or_weekday: bool
+
+    # (year, month) -> bitset of matching days
+    _day_bits_cache: Dict[Tuple[int, int], int]
+
+    def __init__(self, expression: str):
+        self.expression = expression
+
+        fields = MACROS.get(expression.strip().lower(), expression).split()
+
+        if len(fields) != 5:
+            raise ValueError(
+                f'a cron expression should have 5 fields, but got "{expression}"'
+            )
+
+        (
+            self.minutes,
+            self.hours,
+            self.days,
+            self.months,
+            weekdays
+        ) = (
+            _parse_field(field, low, high, names)
+            for field, (low, high, names) in zip(fields, FIELDS)
+        )
+
+        # 7 -> 0
+        if weekdays & 1 << 7:
+            weekdays = (weekdays | 1) & ~ (1 << 7)
+
+        self.weekdays = weekdays
+        self._day_or_weekday = not (
+            fields[2].startswith('*') or fields[4].startswith('*')
+        )
+        self._day_bits_cache = {}
+
+    def _day_bits(self, year: int, month: int) -> int:
+        key = (year, month)
+        bits = self._day_bits_cache.get(key)
+
+        if bits is not None:
+            return bits
+
+        first_weekday, days_in_month = calendar.monthrange(year, month)
+
+        # The cron weekday of the first day, 0 = sunday
+        first_weekday = (first_weekday + 1) % 7
+
+        weekday_bits = 0
+        for offset in range(7):
+            if self.weekdays & 1 << (first_weekday + offset) % 7:
+                for day in range(offset + 1, days_in_month + 1, 7):
+                    weekday_bits |= 1 << day
+
+        # Days beyond the end of the month
+        in_month = (1 << days_in_month + 1) - 2
+
+        if self._day_or_weekday:
+            bits = (self.days | weekday_bits) & in_month
+        else:
+            bits = self.days & weekday_bits & in_month
+
+        if len(self._day_bits_cache) > 24:
+            self._day_bits_cache.clear()
+
+        self._day_bits_cache[key] = bits
+        return bits
+
+    def next_time(self, now: datetime) -> datetime:
+        """
+        Returns the first matching time strictly after `now`
+        """
+
+        time = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        max_year = time.year + MAX_YEARS
+
+        while time.year <= max_year:
+            month = _next_bit(self.months, time.month)
+
+            if month is None:
+                time = time.replace(
+                    year=time.year + 1, month=1, day=1, hour=0, minute=0
+                )
+                continue
+
+            if month != time.month:
+                time = time.replace(month=month, day=1, hour=0, minute=0)
+
+            day = _next_bit(self._day_bits(time.year, month), time.day)
+
+            if day is None:
+                # The first day of the next month
+                time = time.replace(day=1, hour=0, minute=0)
+                time = (time + timedelta(days=32)).replace(day=1)
+                continue
+
+            if day != time.day:
+                time = time.replace(day=day, hour=0, minute=0)
+
+            hour = _next_bit(self.hours, time.hour)
+
+            if hour is None:
+                time = time.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+
+            if hour != time.hour:
+                time = time.replace(hour=hour, minute=0)
+
+            minute = _next_bit(self.minutes, time.minute)
+
+            if minute is None:
+                time = time.replace(minute=0) + timedelta(hours=1)
+                continue
+
+            return time.replace(minute=minute)
+
+        raise ValueError(
+            f'cron expression "{self.expression}" never matches'
+        )
+
+
+def schedule_cron(
+    expression: str,
+    clock: Clock = DEFAULT_CLOCK,
+    observer: Optional[Observer] = None
+) -> Decorator:
+    """
+    Returns a decorator that schedules the function `fn`
+    to run once at the next time matching the cron expression.
+
+    Args:
+        expression (str): the cron expression of five fields `minute hour day-of-month month day-of-week`, or a macro such as `@hourly`
+        clock (Clock = DEFAULT_CLOCK): the clock to read the current wall clock time from and to sleep with
+        observer (Observer | None = None): if specified, the observer to record the metrics of scheduling
+
+    For example::
+
+        @repeat(-1)
+        @schedule_cron('*/15 9-16 * * mon-fri')
+        async def my_function():
+            pass
+
+    The function will be called every 15 minutes between 09:00 and 17:00 on weekdays.
+    """
+
+    scheduler = CronScheduler(expression)
+
+    def decorator(fn: Func) -> Func:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            now = clock.now()
+            wait = scheduler.next_time(now) - now
+
+            if observer is None:
+                await clock.sleep(wait.total_seconds())
+            else:
+                await observe_schedule(observer, clock, wait.total_seconds())
+
+            return await fn(*args, **kwargs)
+        return wrapper
+
+    def get_wait() -> float:
+        now = clock.now()
+        return (scheduler.next_time(now) - now).total_seconds()
+
+    return with_stage(decorator, ScheduleStage(get_wait, clock, observer))
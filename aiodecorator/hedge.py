@@ -0,0 +1,153 @@
+import asyncio
+import functools
+from typing import (
+    Dict,
+    Optional,
+    Set
+)
+
+from .common import (
+    Decorator,
+    Func,
+    T
+)
+from .clock import (
+    Clock,
+    DEFAULT_CLOCK
+)
+from .quantile import P2Quantile
+from .retry import RetryBudget
+
+
+# The number of observed calls before the percentile delay takes effect
+MIN_SAMPLES = 20
+
+
+def hedge(
+    hedges: int = 1,
+    delay: Optional[float] = None,
+    percentile: Optional[float] = None,
+    budget: Optional[RetryBudget] = None,
+    clock: Clock = DEFAULT_CLOCK
+) -> Decorator:
+    """
+    Returns a decorator that calls the function `fn` again, without canceling
+    the previous call, if it has not completed after a delay, which is
+    known as hedged requests. It returns the result of the first call
+    which succeeds, and cancels the others.
+
+    It should only be used for idempotent functions.
+
+    Args:
+        hedges (int = 1): the maximum number of extra calls
+        delay (float | None = None): the delay in seconds before each extra call. If `percentile` is specified, it is only used before enough calls are observed, and `None` means no extra calls until then
+        percentile (float | None = None): if specified, the delay is the `percentile`-quantile of the observed durations of the first calls, e.g. 0.95. A first call which is canceled, such as when an extra call wins, counts the time it has run as a lower bound, so that hedging does not hide the slow calls it is meant for
+        budget (RetryBudget | None = None): the token bucket which each extra call takes a token from, and which could be shared with `retry()`. If the budget is exhausted, no extra call is made, so that hedging could not multiply the load
+        clock (Clock = DEFAULT_CLOCK): the clock to measure durations with
+
+    Usage::
+
+        @hedge(2, percentile=0.95, budget=RetryBudget(10, 1))
+        async def read(key):
+            pass
+    """
+
+    if hedges < 0:
+        raise ValueError(f'hedges must not be negative, but got {hedges}')
+
+    if delay is None and percentile is None:
+        raise ValueError('either delay or percentile should be specified')
+
+    def decorator(fn: Func) -> Func:
+        sketch = P2Quantile(percentile) if percentile is not None else None
+
+        def get_delay() -> Optional[float]:
+            if sketch is None or sketch.count < MIN_SAMPLES:
+                return delay
+
+            return sketch.value
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            # Task -> the time it starts
+            running: Dict[asyncio.Task, float] = {}
+            exception: Optional[BaseException] = None
+            # The time of the latest call, or of the latest hedge skipped
+            # due to the budget
+            launched_at = clock.time()
+
+            def launch() -> asyncio.Task:
+                task = asyncio.ensure_future(fn(*args, **kwargs))
+                running[task] = launched_at
+                return task
+
+            primary = launch()
+            launched = 1
+
+            try:
+                while running:
+                    wait: Optional[float] = None
+
+                    if launched <= hedges:
+                        hedge_delay = get_delay()
+
+                        if hedge_delay is not None:
+                            # Counts from the latest call, so that a failed
+                            # call does not put off the next hedge
+                            wait = launched_at + hedge_delay - clock.time()
+
+                    if wait is not None and wait <= 0:
+                        done: Set[asyncio.Task] = set()
+                    else:
+                        done, _ = await asyncio.wait(
+                            running,
+                            timeout=wait,
+                            return_when=asyncio.FIRST_COMPLETED
+                        )
+
+                    if not done:
+                        # Time to hedge
+                        launched += 1
+                        launched_at = clock.time()
+
+                        if budget is None or budget.try_acquire():
+                            launch()
+
+                        continue
+
+                    for task in done:
+                        start = running.pop(task)
+
+                        if task.cancelled():
+                            exception = asyncio.CancelledError()
+                            continue
+
+                        error = task.exception()
+
+                        if error is not None:
+                            exception = error
+                            continue
+
+                        if sketch is not None and task is primary:
+                            sketch.add(clock.time() - start)
+
+                        return task.result()
+
+                # All calls failed
+                assert exception is not None
+                raise exception
+
+            finally:
+                if sketch is not None and primary in running:
+                    # The primary call is about to be canceled, and the time
+                    # it has run is a lower bound of its duration
+                    sketch.add(clock.time() - running[primary])
+
+                for task in running:
+                    task.cancel()
+
+                if running:
+                    await asyncio.gather(*running, return_exceptions=True)
+
+        return wrapper
+    return decorator
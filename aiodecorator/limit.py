@@ -0,0 +1,299 @@
+import heapq
+import asyncio
+import functools
+import itertools
+from collections import deque
+
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+    Union
+)
+
+from .common import (
+    Decorator,
+    Func,
+    T
+)
+from .throttle import KeyFunc
+
+
+class LimitQueueFullError(Exception):
+    pass
+
+
+class LimitQueueTimeoutError(Exception):
+    pass
+
+
+PriorityFunc = Callable[..., float]
+WeightFunc = Callable[[Hashable], int]
+
+
+def _expire(future: asyncio.Future, max_wait: float) -> None:
+    if not future.done():
+        future.set_exception(LimitQueueTimeoutError(
+            f'waited longer than max_wait={max_wait} seconds'
+        ))
+
+
+class Limiter:
+    """
+    A semaphore whose waiters are queued by key and priority.
+
+    Waiting keys are served in weighted round-robin, i.e. a key with
+    weight `w` is granted at most `w` slots in a row before the next key,
+    and the waiters of the same key are served by priority,
+    and then first in first out.
+
+    See `limit()` for the arguments
+    """
+
+    __slots__ = (
+        'max_concurrency',
+        'active',
+        'waiting',
+        'max_queue',
+        'max_wait',
+        '_prioritized',
+        '_weight',
+        '_queues',
+        '_keys',
+        '_credits',
+        '_counter'
+    )
+
+    max_concurrency: int
+
+    # The number of calls in flight, and the number of waiters
+    # which are neither granted nor gone
+    active: int
+    waiting: int
+
+    max_queue: Optional[int]
+    max_wait: Optional[float]
+
+    _prioritized: bool
+    _weight: Optional[WeightFunc]
+
+    # key -> the waiters of the key, which is a heap of
+    # (priority, seq, future) if prioritized, or else a deque of futures.
+    # Gone waiters are removed lazily
+    _queues: Dict[Hashable, Union[list, deque]]
+
+    # The keys which have waiters, in the round-robin order
+    _keys: deque
+
+    # key -> the remaining slots of the current turn of the key
+    _credits: Dict[Hashable, int]
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        prioritized: bool = False,
+        weight: Optional[WeightFunc] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.waiting = 0
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self._prioritized = prioritized
+        self._weight = weight
+        self._queues = {}
+        self._keys = deque()
+        self._credits = {}
+        self._counter = itertools.count()
+
+    def try_acquire(self) -> bool:
+        if self.active < self.max_concurrency and not self.waiting:
+            self.active += 1
+            return True
+
+        return False
+
+    async def acquire(
+        self,
+        key: Hashable = None,
+        priority: float = 0
+    ) -> None:
+        if self.try_acquire():
+            return
+
+        if self.max_queue is not None and self.waiting >= self.max_queue:
+            raise LimitQueueFullError(
+                f'too many waiting calls, max_queue={self.max_queue}'
+            )
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._push(key, priority, future)
+        self.waiting += 1
+
+        handle = None
+        if self.max_wait is not None:
+            handle = loop.call_later(
+                self.max_wait, _expire, future, self.max_wait
+            )
+
+        try:
+            await future
+        except BaseException:
+            if (
+                future.done()
+                and not future.cancelled()
+                and future.exception() is None
+            ):
+                # Granted, but the caller is canceled before it resumes
+                self.release()
+            else:
+                self.waiting -= 1
+
+                if not future.done():
+                    future.cancel()
+            raise
+        finally:
+            if handle is not None:
+                handle.cancel()
+
+    def release(self) -> None:
+        if self.waiting:
+            future = self._pop()
+
+            if future is not None:
+                # Hand the slot over to the waiter
+                self.waiting -= 1
+                future.set_result(None)
+                return
+
+        self.active -= 1
+
+    def _push(
+        self,
+        key: Hashable,
+        priority: float,
+        future: asyncio.Future
+    ) -> None:
+        queue = self._queues.get(key)
+
+        if queue is None:
+            queue = [] if self._prioritized else deque()
+            self._queues[key] = queue
+            self._keys.append(key)
+
+        if isinstance(queue, list):
+            # Prioritized
+            heapq.heappush(queue, (priority, next(self._counter), future))
+        else:
+            queue.append(future)
+
+    def _pop(self) -> Optional[asyncio.Future]:
+        """
+        Returns the next waiter which is not gone
+        """
+
+        keys = self._keys
+        queues = self._queues
+        credits = self._credits
+
+        while keys:
+            key = keys[0]
+            queue = queues[key]
+
+            if isinstance(queue, list):
+                future = heapq.heappop(queue)[2]
+            else:
+                future = queue.popleft()
+
+            live = not future.done()
+
+            if not queue:
+                del queues[key]
+                keys.popleft()
+                credits.pop(key, None)
+
+            elif live:
+                remaining = credits.get(key)
+
+                if remaining is None:
+                    remaining = 1 if self._weight is None else self._weight(key)
+
+                remaining -= 1
+
+                if remaining > 0:
+                    credits[key] = remaining
+                else:
+                    # The turn of the key is over
+                    credits.pop(key, None)
+                    keys.rotate(-1)
+
+            if live:
+                return future
+
+        return None
+
+
+def limit(
+    max_concurrency: int,
+    key: Optional[KeyFunc] = None,
+    weight: Optional[WeightFunc] = None,
+    priority: Optional[PriorityFunc] = None,
+    max_queue: Optional[int] = None,
+    max_wait: Optional[float] = None
+) -> Decorator:
+    """
+    Returns a decorator that limits the number of concurrent calls
+    of the function `fn` in flight to `max_concurrency`, and the other calls
+    wait in a queue until a slot is released.
+
+    Args:
+        max_concurrency (int): the maximum number of calls in flight
+        key (Callable[..., Hashable] | None = None): if specified, waiting calls are queued by the return value of `key(*args, **kwargs)`, and the keys are served in round robin, so that a noisy key could not starve the others
+        weight (Callable[[Hashable], int] | None = None): returns the weight of a key, i.e. the number of slots in a row which the key is granted in its turn of the round robin. Defaults to 1 for all keys
+        priority (Callable[..., float] | None = None): if specified, the waiting calls of the same key are served in the ascending order of `priority(*args, **kwargs)`
+        max_queue (int | None = None): the maximum number of waiting calls, if exceeded, the call is shed with `LimitQueueFullError`
+        max_wait (float | None = None): the maximum seconds a call could wait in the queue, if exceeded, the call is shed with `LimitQueueTimeoutError`
+
+    Usage::
+
+        @limit(10, key=lambda tenant, query: tenant, max_queue=100, max_wait=1)
+        async def query(tenant, query):
+            async with pool.acquire() as connection:
+                ...
+    """
+
+    if max_concurrency < 1:
+        raise ValueError(
+            f'max_concurrency must be positive, but got {max_concurrency}'
+        )
+
+    def decorator(fn: Func) -> Func:
+        limiter = Limiter(
+            max_concurrency,
+            max_queue,
+            max_wait,
+            priority is not None,
+            weight
+        )
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            if not limiter.try_acquire():
+                # Only compute the key and the priority when it has to wait
+                await limiter.acquire(
+                    None if key is None else key(*args, **kwargs),
+                    0 if priority is None else priority(*args, **kwargs)
+                )
+
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                limiter.release()
+
+        return wrapper
+    return decorator
@@ -0,0 +1,239 @@
+import bisect
+from typing import (
+    Any,
+    Awaitable,
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
+from .clock import Clock
+
+
+class Observer:
+    """
+    The interface to observe what decorators do, such as
+    `throttle(..., observer=observer)`. All methods are no-ops,
+    and a subclass could override them to export metrics elsewhere.
+
+    Decorators only call the observer if it is specified,
+    so there is no cost if it is not.
+
+    The metric names are in the form of `'<decorator>.<event>'`,
+    see the README for all of them.
+    """
+
+    __slots__ = ()
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Increase the counter `name` by `value`
+        """
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record `value`, which is in seconds, into the histogram `name`
+        """
+
+
+# The upper bounds of histogram buckets in seconds,
+# which are 1, 2.5 and 5 times of powers of 10, from 1µs to 500s
+DEFAULT_BOUNDS: Tuple[float, ...] = tuple(
+    m * 10. ** e
+    for e in range(-6, 3)
+    for m in (1, 2.5, 5)
+)
+
+
+class Histogram:
+    """
+    A histogram with fixed buckets, whose cost is constant
+
+    Args:
+        bounds (Tuple[float, ...] = DEFAULT_BOUNDS): the upper bounds of buckets in ascending order, and there is an extra bucket for larger values
+    """
+
+    __slots__ = (
+        'bounds',
+        'buckets',
+        'count',
+        'sum',
+        'min',
+        'max'
+    )
+
+    bounds: Tuple[float, ...]
+    buckets: List[int]
+    count: int
+    sum: float
+    min: float
+    max: float
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BOUNDS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def add(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+        if value < self.min:
+            self.min = value
+
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Returns the upper bound of the bucket which the `q`-quantile falls in,
+        which is no more than the max value
+        """
+
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+
+        for index, count in enumerate(self.buckets):
+            seen += count
+
+            if seen >= rank and count:
+                if index == len(self.bounds):
+                    break
+
+                return min(self.bounds[index], self.max)
+
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': [
+                (bound, count)
+                for bound, count in zip(
+                    self.bounds + (float('inf'),),
+                    self.buckets
+                )
+                if count
+            ]
+        }
+
+
+class Metrics(Observer):
+    """
+    An observer which keeps counters and histograms in memory
+
+    Args:
+        bounds (Tuple[float, ...] = DEFAULT_BOUNDS): the upper bounds of the buckets of histograms
+
+    Usage::
+
+        metrics = Metrics()
+
+        @throttle(10, 1, 'wait', observer=metrics)
+        async def request():
+            pass
+
+        print(metrics.snapshot())
+    """
+
+    __slots__ = (
+        'counters',
+        'histograms',
+        '_bounds'
+    )
+
+    counters: Dict[str, int]
+    histograms: Dict[str, Histogram]
+    _bounds: Tuple[float, ...]
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BOUNDS):
+        self.counters = {}
+        self.histograms = {}
+        self._bounds = bounds
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        histogram = self.histograms.get(name)
+
+        if histogram is None:
+            histogram = Histogram(self._bounds)
+            self.histograms[name] = histogram
+
+        histogram.add(value)
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Any]:
+        """
+        Returns a copy of all metrics as plain data
+
+        Args:
+            reset (bool = False): whether to reset the metrics after the snapshot
+        """
+
+        snapshot = {
+            'counters': dict(self.counters),
+            'histograms': {
+                name: histogram.snapshot()
+                for name, histogram in self.histograms.items()
+            }
+        }
+
+        if reset:
+            self.counters = {}
+            self.histograms = {}
+
+        return snapshot
+
+
+async def observe_call(
+    observer: Observer,
+    name: str,
+    clock: Clock,
+    awaitable: Awaitable
+) -> Any:
+    """
+    Awaits `awaitable`, and records how long it takes into
+    the histogram `name`, whether it succeeds or not
+    """
+
+    start = clock.time()
+
+    try:
+        return await awaitable
+    finally:
+        observer.observe(name, clock.time() - start)
+
+
+async def observe_schedule(
+    observer: Observer,
+    clock: Clock,
+    wait: float
+) -> None:
+    """
+    Sleeps `wait` seconds until the scheduled time, and records the wait,
+    and the lateness of waking up which is caused by a busy event loop
+    """
+
+    start = clock.time()
+
+    observer.count('schedule.runs')
+    observer.observe('schedule.wait', wait)
+
+    await clock.sleep(wait)
+
+    observer.observe('schedule.lateness', max(0., clock.time() - start - wait))
@@ -0,0 +1,318 @@
+import os
+import asyncio
+import functools
+import threading
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Literal,
+    Optional,
+    Tuple
+)
+
+from .common import T
+from .limit import (
+    Limiter,
+    LimitQueueFullError
+)
+
+
+class OffloadQueueFullError(LimitQueueFullError):
+    pass
+
+
+PoolType = Literal['thread', 'process']
+OffloadOverflowType = Literal['wait', 'reject']
+
+
+class _Waiter:
+    __slots__ = (
+        'loop',
+        'future',
+        'granted'
+    )
+
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    granted: bool
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Slots:
+    """
+    A thread-safe semaphore of the workers of a pool.
+
+    Pools live for the whole process, so a slot is released by the worker
+    thread which finishes the job rather than by the event loop which
+    submitted it, and the waiters could come from different event loops,
+    so that no slot is lost if a loop is closed before its job finishes.
+
+    Args:
+        max_workers (int): the number of slots
+    """
+
+    __slots__ = (
+        'max_workers',
+        'active',
+        '_waiters',
+        '_lock'
+    )
+
+    max_workers: int
+    active: int
+    _waiters: deque
+    _lock: threading.Lock
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.active = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.active < self.max_workers and not self._waiters:
+                self.active += 1
+                return True
+
+        return False
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            if self.active < self.max_workers and not self._waiters:
+                self.active += 1
+                return
+
+            waiter = _Waiter(loop)
+            self._waiters.append(waiter)
+
+        try:
+            await waiter.future
+        except BaseException:
+            with self._lock:
+                granted = waiter.granted
+
+                if not granted:
+                    self._waiters.remove(waiter)
+
+            if granted:
+                # Granted, but the caller is canceled before it resumes
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+
+                try:
+                    waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+                except RuntimeError:
+                    # The loop of the waiter is closed
+                    continue
+
+                # Hand the slot over to the waiter
+                waiter.granted = True
+                return
+
+            self.active -= 1
+
+
+class Pool:
+    """
+    An executor with the slots of its workers, so that a job is submitted
+    to the executor only if a worker is free, and the jobs waiting for
+    a worker could be dropped before they start, such as by `timeout()`.
+
+    Args:
+        pool (str): 'thread' or 'process'
+        max_workers (int): the number of workers
+    """
+
+    __slots__ = (
+        'pool',
+        'max_workers',
+        'slots',
+        '_executor'
+    )
+
+    pool: PoolType
+    max_workers: int
+    slots: Slots
+    _executor: Optional[Executor]
+
+    def __init__(self, pool: PoolType, max_workers: int):
+        self.pool = pool
+        self.max_workers = max_workers
+        self.slots = Slots(max_workers)
+        self._executor = None
+
+    @property
+    def executor(self) -> Executor:
+        # Created lazily, so that no worker is started until it is used
+        if self._executor is None:
+            Class = (
+                ThreadPoolExecutor if self.pool == 'thread'
+                else ProcessPoolExecutor
+            )
+            self._executor = Class(max_workers=self.max_workers)
+
+        return self._executor
+
+    def submit(
+        self,
+        fn: Callable[..., T],
+        args: tuple,
+        kwargs: dict
+    ) -> asyncio.Future:
+        """
+        Submits the job, which should be called after a slot is acquired,
+        and the slot is released once the worker finishes it,
+        even if the caller or its event loop has gone
+        """
+
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self.slots.release()
+            raise
+
+        def on_done(_: Future) -> None:
+            self.slots.release()
+
+        future.add_done_callback(on_done)
+        return asyncio.wrap_future(future)
+
+
+_pools: Dict[Tuple[PoolType, int], Pool] = {}
+_pools_lock = threading.Lock()
+
+
+def default_max_workers(pool: PoolType) -> int:
+    cpus = os.cpu_count() or 1
+    # The same as the defaults of `concurrent.futures`
+    return min(32, cpus + 4) if pool == 'thread' else cpus
+
+
+def get_pool(pool: PoolType, max_workers: Optional[int] = None) -> Pool:
+    """
+    Returns the shared pool of the type and the number of workers
+    """
+
+    if pool not in ('thread', 'process'):
+        raise ValueError(f'unknown pool type "{pool}"')
+
+    if max_workers is None:
+        max_workers = default_max_workers(pool)
+
+    if max_workers < 1:
+        raise ValueError(
+            f'max_workers must be positive, but got {max_workers}'
+        )
+
+    key = (pool, max_workers)
+
+    with _pools_lock:
+        shared = _pools.get(key)
+
+        if shared is None:
+            shared = Pool(pool, max_workers)
+            _pools[key] = shared
+
+    return shared
+
+
+def offload(
+    pool: PoolType = 'thread',
+    max_workers: Optional[int] = None,
+    max_queue: Optional[int] = None,
+    overflow: OffloadOverflowType = 'wait'
+) -> Callable[[Callable[..., T]], Callable[..., Any]]:
+    """
+    Returns a decorator that makes the blocking function `fn` a coroutine
+    function, which runs `fn` in a thread pool or a process pool.
+
+    Pools are shared by all decorated functions with the same `pool` and `max_workers`. A call is submitted to the pool only when a worker is free, so a call which is canceled while waiting, such as by `timeout()`, never starts. A call which has started could not be stopped, but its worker is not reused until it finishes.
+
+    Args:
+        pool (str = 'thread'): 'thread' or 'process'. For 'process', `fn` and its arguments should be picklable, so decorate without the `@` syntax, e.g. `parse_async = offload('process')(parse)`
+        max_workers (int | None = None): the number of workers of the pool, defaults to the default of `concurrent.futures`
+        max_queue (int | None = None): the maximum number of calls of the function waiting for a worker
+        overflow (str = 'wait'): what to do with a call if there are already `max_queue` calls waiting
+        - 'wait': wait until there is room in the queue, which applies backpressure to callers
+        - 'reject': raise `OffloadQueueFullError`
+
+    Usage::
+
+        @timeout(1)
+        @offload(max_workers=4, max_queue=100)
+        def parse(data):
+            ...
+
+        result = await parse(data)
+    """
+
+    if overflow not in ('wait', 'reject'):
+        raise ValueError(f'unknown overflow "{overflow}"')
+
+    if max_queue is not None and max_queue < (overflow == 'wait'):
+        # A queue of no room would block the callers forever
+        raise ValueError(
+            f'max_queue must be positive for "{overflow}", but got {max_queue}'
+        )
+
+    shared = get_pool(pool, max_workers)
+
+    def decorator(fn: Callable[..., T]) -> Callable[..., Any]:
+        admission: Optional[Limiter] = None
+
+        if max_queue is not None:
+            # Holds a permit while waiting for a worker
+            admission = Limiter(
+                max_queue,
+                0 if overflow == 'reject' else None
+            )
+
+        slots = shared.slots
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            if not slots.try_acquire():
+                if admission is None:
+                    await slots.acquire()
+                else:
+                    try:
+                        await admission.acquire()
+                    except LimitQueueFullError:
+                        raise OffloadQueueFullError(
+                            f'too many waiting calls, max_queue={max_queue}'
+                        ) from None
+
+                    try:
+                        await slots.acquire()
+                    finally:
+                        admission.release()
+
+            return await shared.submit(fn, args, kwargs)
+
+        return wrapper
+    return decorator
@@ -0,0 +1,312 @@
+import asyncio
+import functools
+import contextlib
+from typing import (
+    AsyncGenerator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
+from .common import (
+    Decorator,
+    Func,
+    T
+)
+from .observer import observe_schedule
+from .repeat import (
+    ticks,
+    REPEAT_INFINITY
+)
+from .stage import (
+    RepeatStage,
+    ScheduleStage,
+    TimeoutStage,
+    Stage
+)
+from .timeout import active_timers
+
+
+# The kinds of fused stages
+FIXED_DELAY = 0
+FIXED_RATE = 1
+SCHEDULE = 2
+TIMEOUT = 3
+
+NO_TIMEOUT = contextlib.nullcontext()
+
+# Converts the time of the loop to the deadline of a timeout stage
+GetDeadline = Callable[[float], float]
+
+
+def get_deadline(stage: TimeoutStage) -> Optional[GetDeadline]:
+    """
+    Returns the function to get the deadline of the stage in the time of
+    the loop, or `None` if the stage does nothing
+    """
+
+    at = stage.at
+    clock = stage.clock
+
+    if at is not None:
+        return lambda now: now + at - clock.time()
+
+    seconds = stage.seconds
+
+    if seconds is None or seconds <= 0:
+        # `timeout()` without a limit
+        return None
+
+    return lambda now: now + seconds
+
+
+def fuse(stages: List[Stage], fn: Func) -> Func:
+    """
+    Returns a wrapper which runs `stages`, from the outermost to
+    the innermost, and `fn` as if the decorators were stacked,
+    but in a single coroutine frame.
+
+    Since no stage catches exceptions, a timeout of any stage aborts
+    the whole stack just like stacked decorators do, so that all timeouts
+    share one `asyncio.timeout()` which is rescheduled to the nearest deadline
+    """
+
+    kinds: List[int] = []
+
+    # level -> the stage of the kind at the level
+    repeats: Dict[int, RepeatStage] = {}
+    schedules: Dict[int, ScheduleStage] = {}
+    timeouts: Dict[int, GetDeadline] = {}
+
+    for stage in stages:
+        level = len(kinds)
+
+        if isinstance(stage, RepeatStage):
+            repeats[level] = stage
+            kinds.append(
+                FIXED_DELAY if stage.mode == 'fixed_delay' else FIXED_RATE
+            )
+
+        elif isinstance(stage, ScheduleStage):
+            schedules[level] = stage
+            kinds.append(SCHEDULE)
+
+        else:
+            deadline = get_deadline(stage)
+
+            if deadline is not None:
+                timeouts[level] = deadline
+                kinds.append(TIMEOUT)
+
+    size = len(kinds)
+    has_timeout = bool(timeouts)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs) -> T:
+        # The number of finished iterations of each 'fixed_delay' stage
+        counts = [0] * size
+        # The ticks of each 'fixed_rate' stage
+        iterators: List[Optional[AsyncGenerator[int, None]]] = [None] * size
+        # The deadlines of the timeout stages entered, in the loop time
+        deadlines: List[float] = []
+
+        result = None
+        level = 0
+        # Whether it is entering `level` from the outer one,
+        # or returning to `level` from the inner one
+        entering = True
+
+        timer: Optional[asyncio.Timeout] = None
+        token = None
+
+        try:
+            async with (
+                asyncio.timeout(None) if has_timeout else NO_TIMEOUT
+            ) as timer:
+                if timer is not None:
+                    # So that decorators beneath could tell the timeout,
+                    # the same as `timeout()`
+                    token = active_timers.set(active_timers.get() + (timer,))
+
+                while level >= 0:
+                    if level == size:
+                        result = await fn(*args, **kwargs)
+                        level -= 1
+                        entering = False
+                        continue
+
+                    kind = kinds[level]
+
+                    if kind == FIXED_DELAY:
+                        # The same as `ticks()` of 'fixed_delay'
+                        repeat = repeats[level]
+                        times = repeat.times
+                        interval = repeat.interval
+                        observer = repeat.observer
+
+                        if level + 1 == size:
+                            # The innermost stage, whose iterations
+                            # call `fn` directly in a tight loop
+                            index = 0
+
+                            while times == REPEAT_INFINITY or index < times:
+                                if observer is not None:
+                                    observer.count('repeat.iterations')
+
+                                result = await fn(*args, **kwargs)
+                                index += 1
+
+                                if interval > 0:
+                                    if observer is not None:
+                                        observer.observe('repeat.wait', interval)
+
+                                    await repeat.clock.sleep(interval)
+
+                            level -= 1
+                            entering = False
+                            continue
+
+                        if entering:
+                            counts[level] = 0
+                        else:
+                            counts[level] += 1
+
+                            if interval > 0:
+                                if observer is not None:
+                                    observer.observe('repeat.wait', interval)
+
+                                await repeat.clock.sleep(interval)
+
+                        if times == REPEAT_INFINITY or counts[level] < times:
+                            if observer is not None:
+                                observer.count('repeat.iterations')
+
+                            level += 1
+                            entering = True
+                        else:
+                            level -= 1
+                            entering = False
+
+                    elif kind == FIXED_RATE:
+                        iterator = iterators[level]
+
+                        if iterator is None:
+                            iterator = ticks(*repeats[level])
+                            iterators[level] = iterator
+
+                        try:
+                            await iterator.__anext__()
+                        except StopAsyncIteration:
+                            iterators[level] = None
+                            level -= 1
+                            entering = False
+                        else:
+                            level += 1
+                            entering = True
+
+                    elif kind == SCHEDULE:
+                        if entering:
+                            schedule = schedules[level]
+                            wait = schedule.get_wait()
+
+                            if schedule.observer is None:
+                                await schedule.clock.sleep(wait)
+                            else:
+                                await observe_schedule(
+                                    schedule.observer, schedule.clock, wait
+                                )
+
+                            level += 1
+                        else:
+                            level -= 1
+
+                    elif timer is not None:
+                        if entering:
+                            deadlines.append(
+                                timeouts[level](asyncio.get_running_loop().time())
+                            )
+                            timer.reschedule(min(deadlines))
+                            level += 1
+                        else:
+                            deadlines.pop()
+                            timer.reschedule(
+                                min(deadlines) if deadlines else None
+                            )
+                            level -= 1
+
+            return result
+
+        finally:
+            if token is not None:
+                active_timers.reset(token)
+
+            for iterator in iterators:
+                if iterator is not None:
+                    await iterator.aclose()
+
+    return wrapper
+
+
+def pipeline(*decorators: Decorator) -> Decorator:
+    """
+    Returns a decorator which is the same as stacking `decorators`,
+    the first of which is the outermost, but fuses the adjacent ones
+    of `repeat()`, `schedule_naturally()`, `schedule_cron()` and `timeout()`
+    into a single wrapper, which runs all of them in one coroutine frame
+    rather than one wrapper and one `await` of each layer.
+
+    Other decorators, and `repeat()` with `concurrency` or `aggregate`,
+    and `timeout()` with `percentile` or `observer`, are stacked as usual.
+
+    Args:
+        *decorators (Decorator): the decorators to stack
+
+    Usage::
+
+        @pipeline(
+            repeat(7),
+            schedule_naturally('daily'),
+            repeat(3, 0.1)
+        )
+        async def run():
+            print('hello')
+
+        # The same as
+        #
+        # @repeat(7)
+        # @schedule_naturally('daily')
+        # @repeat(3, 0.1)
+        # async def run():
+    """
+
+    def decorator(fn: Func) -> Func:
+        wrapped = fn
+        # The adjacent fusable decorators, from the innermost
+        run: List[Tuple[Decorator, Stage]] = []
+
+        def flush() -> None:
+            nonlocal wrapped
+
+            if len(run) == 1:
+                # Nothing to fuse
+                wrapped = run[0][0](wrapped)
+            elif run:
+                wrapped = fuse([stage for _, stage in reversed(run)], wrapped)
+
+            run.clear()
+
+        for deco in reversed(decorators):
+            stage = getattr(deco, 'stage', None)
+
+            if stage is None:
+                flush()
+                wrapped = deco(wrapped)
+            else:
+                run.append((deco, stage))
+
+        flush()
+        return wrapped
+
+    return decorator
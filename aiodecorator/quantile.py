@@ -0,0 +1,121 @@
+import bisect
+from typing import (
+    List,
+    Optional
+)
+
+
+class P2Quantile:
+    """
+    A streaming estimator of the `p`-quantile of observed values,
+    with the P² algorithm by Jain and Chlamtac, which keeps only five
+    markers, so that both the memory and the cost of each observation
+    are constant.
+
+    Args:
+        p (float): the quantile to estimate, between 0 and 1 exclusively, e.g. 0.99 for p99
+    """
+
+    __slots__ = (
+        'p',
+        'count',
+        '_heights',
+        '_positions',
+        '_desired',
+        '_increments'
+    )
+
+    p: float
+    count: int
+
+    # The heights of the markers, which are the exact observations
+    # in ascending order before there are five of them
+    _heights: List[float]
+
+    # The actual and desired positions of the markers
+    _positions: List[int]
+    _desired: List[float]
+    _increments: List[float]
+
+    def __init__(self, p: float):
+        if not 0 < p < 1:
+            raise ValueError(f'p must be between 0 and 1, but got {p}')
+
+        self.p = p
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    @property
+    def value(self) -> Optional[float]:
+        """
+        Returns the estimated quantile, or `None` if nothing is observed
+        """
+
+        count = self.count
+        heights = self._heights
+
+        if count == 0:
+            return None
+
+        if count <= 5:
+            return heights[min(count - 1, int(self.p * count))]
+
+        return heights[2]
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        q = self._heights
+
+        if self.count <= 5:
+            bisect.insort(q, x)
+            return
+
+        # Find the cell `k` such that q[k] <= x < q[k + 1]
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+
+        n = self._positions
+        desired = self._desired
+        increments = self._increments
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+
+        for i in range(5):
+            desired[i] += increments[i]
+
+        # Adjust the heights of the middle markers if necessary
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+
+            if (
+                (d >= 1 and n[i + 1] - n[i] > 1)
+                or (d <= -1 and n[i - 1] - n[i] < -1)
+            ):
+                step = 1 if d > 0 else -1
+
+                # Piecewise-parabolic prediction
+                height = q[i] + step / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + step)
+                    * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - step)
+                    * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+
+                if not q[i - 1] < height < q[i + 1]:
+                    # Fall back to linear prediction
+                    height = q[i] + step * (
+                        q[i + step] - q[i]
+                    ) / (n[i + step] - n[i])
+
+                q[i] = height
+                n[i] += step
@@ -1,17 +1,302 @@
-import functools
+import math
 import asyncio
+import functools
+import contextlib
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Union
+)
 
 from .common import (
     Decorator,
     Func,
     T
 )
+from .clock import (
+    Clock,
+    DEFAULT_CLOCK
+)
+from .observer import Observer
+from .stage import (
+    RepeatMode,
+    OverrunPolicy,
+    RepeatStage,
+    with_stage
+)
 
 
 REPEAT_INFINITY = -1
 
+Aggregate = Union[Literal['last', 'all'], Callable[[Any, Any], Any]]
+
+
+# Returns the delay after the iteration of the given index,
+# or `None` to stop
+GetInterval = Callable[[int], Optional[float]]
+
+
+async def ticks(
+    times: int,
+    interval: Union[float, GetInterval] = 0.,
+    mode: RepeatMode = 'fixed_delay',
+    on_overrun: OverrunPolicy = 'skip',
+    clock: Clock = DEFAULT_CLOCK,
+    observer: Optional[Observer] = None
+) -> AsyncGenerator[int, None]:
+    """
+    Yields the index of each iteration when it is time to start it,
+    and sleeps according to `mode` after the iteration is done,
+    i.e. when the generator is resumed.
+
+    For 'fixed_delay', `interval` could also be a function which returns
+    the delay after each iteration, or `None` to stop, such as the backoff
+    of `retry()`. It is not called after the last iteration.
+
+    See `repeat()` for the other arguments
+    """
+
+    if callable(interval):
+        if mode != 'fixed_delay':
+            raise ValueError(
+                'a function as interval is only supported by "fixed_delay"'
+            )
+
+        index = 0
+
+        while times == REPEAT_INFINITY or index < times:
+            if observer is not None:
+                observer.count('repeat.iterations')
+
+            yield index
+            index += 1
+
+            if index == times:
+                return
+
+            wait = interval(index - 1)
+
+            if wait is None:
+                return
+
+            if wait > 0:
+                if observer is not None:
+                    observer.observe('repeat.wait', wait)
+
+                await clock.sleep(wait)
+
+        return
+
+    if mode == 'fixed_delay':
+        index = 0
+
+        while times == REPEAT_INFINITY or index < times:
+            if observer is not None:
+                observer.count('repeat.iterations')
+
+            yield index
+            index += 1
+
+            if interval > 0:
+                if observer is not None:
+                    observer.observe('repeat.wait', interval)
+
+                await clock.sleep(interval)
+
+        return
+
+    start = clock.time()
+
+    # The number of the time slot of the next iteration since `start`
+    slot = 0
+    index = 0
+
+    while times == REPEAT_INFINITY or index < times:
+        if observer is not None:
+            observer.count('repeat.iterations')
+
+        yield index
+        index += 1
+
+        if index == times or interval <= 0:
+            # No need to wait after the last iteration
+            continue
+
+        slot += 1
+        now = clock.time()
+        deadline = start + slot * interval
+
+        if now > deadline:
+            # The iteration took longer than `interval`
+            if observer is not None:
+                observer.count('repeat.overruns')
+
+            if on_overrun == 'skip':
+                # Wait for the next time slot, and skip the missed ones
+                skipped = math.ceil((now - start) / interval)
+
+                if observer is not None:
+                    observer.count('repeat.skipped', skipped - slot)
+
+                slot = skipped
+                deadline = start + slot * interval
+            elif on_overrun == 'queue':
+                # Start the next iteration right now,
+                # and the following ones are scheduled from now on
+                start = now
+                slot = 0
+                deadline = now
+
+            # 'catch_up': start the missed iterations back to back,
+            # until it catches up with the schedule
+
+        sleep = deadline - now
+
+        if sleep > 0:
+            if observer is not None:
+                observer.observe('repeat.wait', sleep)
+
+            await clock.sleep(sleep)
+
+
+async def run_concurrently(
+    fn: Func,
+    args: tuple,
+    kwargs: dict,
+    iterations: AsyncIterator[int],
+    concurrency: int
+) -> AsyncGenerator[Tuple[int, Any], None]:
+    """
+    Starts an iteration of `fn` for each of `iterations` without waiting for
+    the previous ones, with at most `concurrency` of them in flight,
+    and yields `(index, result)` in the order of completion.
+
+    If any iteration fails, all other iterations are canceled,
+    and the exception is raised
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+    completed: asyncio.Queue[Optional[Tuple[int, asyncio.Future]]] = asyncio.Queue()
+    running: Set[asyncio.Future] = set()
+
+    def on_done(index: int, task: asyncio.Future) -> None:
+        running.discard(task)
+        completed.put_nowait((index, task))
+
+    async def launch() -> int:
+        launched = 0
+
+        try:
+            async for index in iterations:
+                await semaphore.acquire()
+
+                # `fn` might return any awaitable rather than a coroutine
+                task = asyncio.ensure_future(fn(*args, **kwargs))
+                running.add(task)
+                task.add_done_callback(functools.partial(on_done, index))
+                launched += 1
+        finally:
+            # No more iterations
+            completed.put_nowait(None)
+
+        return launched
+
+    launcher = asyncio.create_task(launch())
+    launched: Optional[int] = None
+    finished = 0
 
-def repeat(times: int, interval: float = 0.) -> Decorator:
+    try:
+        while launched is None or finished < launched:
+            item = await completed.get()
+
+            if item is None:
+                # Raises if the schedule fails
+                launched = await launcher
+                continue
+
+            index, task = item
+            finished += 1
+            semaphore.release()
+
+            yield index, task.result()
+
+    finally:
+        launcher.cancel()
+
+        for task in running:
+            task.cancel()
+
+        await asyncio.gather(launcher, *running, return_exceptions=True)
+
+
+async def buffered(
+    iterator: AsyncIterator[T],
+    size: int
+) -> AsyncGenerator[T, None]:
+    """
+    Consumes `iterator` in a background task ahead of the consumer,
+    with at most `size` items buffered.
+
+    The background task blocks once the buffer is full,
+    so a slow consumer applies backpressure to the iterator
+    """
+
+    queue: asyncio.Queue[Tuple[bool, Any]] = asyncio.Queue(size)
+
+    async def produce() -> None:
+        try:
+            async for item in iterator:
+                await queue.put((True, item))
+        except Exception as exception:
+            await queue.put((False, exception))
+        else:
+            await queue.put((False, None))
+
+    producer = asyncio.create_task(produce())
+
+    try:
+        while True:
+            ok, item = await queue.get()
+
+            if ok:
+                yield item
+                continue
+
+            if item is not None:
+                raise item
+
+            return
+
+    finally:
+        producer.cancel()
+
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
+
+        if hasattr(iterator, 'aclose'):
+            await iterator.aclose()
+
+
+def repeat(
+    times: int,
+    interval: float = 0.,
+    clock: Clock = DEFAULT_CLOCK,
+    mode: RepeatMode = 'fixed_delay',
+    on_overrun: OverrunPolicy = 'skip',
+    concurrency: int = 1,
+    aggregate: Aggregate = 'last',
+    initial: Any = None,
+    buffer: int = 0,
+    observer: Optional[Observer] = None
+) -> Decorator:
     """
     Returns a decorator that repeats the function `fn`
     `times` times with `interval` seconds between each call
@@ -19,6 +304,22 @@ def repeat(times: int, interval: float = 0.) -> Decorator:
     Args:
         times: `int` The number of times to repeat the function
         interval: `float = 0.` The interval between each call
+        clock: `Clock = DEFAULT_CLOCK` The clock to sleep with
+        mode: `Literal['fixed_delay', 'fixed_rate'] = 'fixed_delay'`
+        - 'fixed_delay': sleep `interval` seconds after each call, so the real period is `interval` plus the time of the call
+        - 'fixed_rate': start each call at `start + n * interval` on the clock, so that the period does not drift
+        on_overrun: `Literal['skip', 'catch_up', 'queue'] = 'skip'` What to do if a call takes longer than `interval`, only used when `mode` is 'fixed_rate'
+        - 'skip': skip the missed time slots, and start the next call at the next time slot
+        - 'catch_up': start the missed calls back to back until it catches up with the schedule
+        - 'queue': start the next call immediately, and schedule the following ones from then on
+        concurrency: `int = 1` The maximum number of calls in flight. If greater than 1, each call is started on schedule without waiting for the previous ones
+        aggregate: `Literal['last', 'all'] | Callable[[Any, Any], Any] = 'last'` How to aggregate the results of calls
+        - 'last': returns the result of the last call
+        - 'all': the decorated function returns an async generator which yields the result of each call as it completes
+        - a function `(accumulated, result) -> accumulated`: returns the reduced result of calls in the order of completion, starting from `initial`
+        initial: `Any = None` The initial value of reducing, only used when `aggregate` is a function
+        buffer: `int = 0` The maximum number of results to produce ahead of the consumer, only used when `aggregate` is 'all'. If 0, the next call starts only after the consumer asks for the next result
+        observer: `Observer | None = None` The observer to record the metrics of iterations
 
     Usage::
 
@@ -27,26 +328,128 @@ def repeat(times: int, interval: float = 0.) -> Decorator:
             pass
 
         # The function will be called 3 times with 1 second between each call.
+
+        @repeat(1000, concurrency=32, aggregate='all')
+        async def poll():
+            pass
+
+        async for result in poll():
+            print(result)
+
+        # At most 32 calls are in flight at the same time
     """
 
+    if mode not in ('fixed_delay', 'fixed_rate'):
+        raise ValueError(f'unknown repeat mode "{mode}"')
+
+    if concurrency < 1:
+        raise ValueError(
+            f'concurrency must be positive, but got {concurrency}'
+        )
+
+    if buffer < 0:
+        raise ValueError(f'buffer must not be negative, but got {buffer}')
+
+    def results(fn: Func, args: tuple, kwargs: dict) -> AsyncGenerator[Tuple[int, Any], None]:
+        """
+        Yields `(index, result)` of each call
+        """
+
+        iterations = ticks(times, interval, mode, on_overrun, clock, observer)
+
+        if concurrency > 1:
+            return run_concurrently(fn, args, kwargs, iterations, concurrency)
+
+        async def run_sequentially() -> AsyncGenerator[Tuple[int, Any], None]:
+            async with contextlib.aclosing(iterations):
+                async for index in iterations:
+                    yield index, await fn(*args, **kwargs)
+
+        return run_sequentially()
+
     def decorator(fn: Func) -> Func:
+        if aggregate == 'all':
+            @functools.wraps(fn)
+            async def generator(*args, **kwargs) -> AsyncGenerator[Any, None]:
+                iterator = results(fn, args, kwargs)
+
+                if buffer > 0:
+                    iterator = buffered(iterator, buffer)
+
+                async with contextlib.aclosing(iterator):
+                    async for _, result in iterator:
+                        yield result
+
+            return generator
+
+        if concurrency == 1 and aggregate == 'last':
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs) -> T:
+                result = None
+
+                async with contextlib.aclosing(
+                    ticks(times, interval, mode, on_overrun, clock, observer)
+                ) as iterations:
+                    async for _ in iterations:
+                        result = await fn(*args, **kwargs)
+
+                return result
+            return wrapper
+
         @functools.wraps(fn)
-        async def wrapper(*args, **kwargs) -> T:
-            result = None
+        async def aggregator(*args, **kwargs) -> Any:
+            last_index = -1
+            accumulated = initial
+
+            async with contextlib.aclosing(
+                results(fn, args, kwargs)
+            ) as iterator:
+                async for index, result in iterator:
+                    if aggregate == 'last':
+                        # Calls might complete out of order
+                        if index > last_index:
+                            last_index = index
+                            accumulated = result
+                    else:
+                        accumulated = aggregate(accumulated, result)
 
-            if times == REPEAT_INFINITY:
-                while True:
-                    result = await fn(*args, **kwargs)
-                    if interval > 0:
-                        await asyncio.sleep(interval)
+            return accumulated
+        return aggregator
 
-            else:
-                for _ in range(times):
-                    result = await fn(*args, **kwargs)
+    return with_stage(
+        decorator,
+        RepeatStage(times, interval, mode, on_overrun, clock, observer)
+        if concurrency == 1 and aggregate == 'last'
+        else None
+    )
 
-                    if interval > 0:
-                        await asyncio.sleep(interval)
 
-            return result
-        return wrapper
-    return decorator
+def repeat_iter(
+    times: int,
+    interval: float = 0.,
+    buffer: int = 0,
+    **kwargs
+) -> Decorator:
+    """
+    Returns a decorator that repeats the function `fn` like `repeat()`,
+    and makes the decorated function an async generator which yields
+    the result of each call as it is produced,
+    so that even an infinite loop could be consumed in constant memory.
+
+    Args:
+        times: `int` The number of times to repeat the function
+        interval: `float = 0.` The interval between each call
+        buffer: `int = 0` The maximum number of results to produce ahead of the consumer. If 0, the next call starts only after the consumer asks for the next result
+        **kwargs: other arguments of `repeat()` except `aggregate` and `initial`
+
+    Usage::
+
+        @repeat_iter(REPEAT_INFINITY, 1, buffer=10)
+        async def poll():
+            return await fetch()
+
+        async for result in poll():
+            print(result)
+    """
+
+    return repeat(times, interval, aggregate='all', buffer=buffer, **kwargs)
@@ -0,0 +1,225 @@
+import random
+import functools
+import contextlib
+from typing import (
+    Literal,
+    Optional,
+    Tuple,
+    Type,
+    Union
+)
+
+from .common import (
+    Decorator,
+    Func,
+    T
+)
+from .clock import (
+    Clock,
+    DEFAULT_CLOCK
+)
+from .repeat import (
+    ticks,
+    REPEAT_INFINITY
+)
+from .throttle import TokenBucketThrottler
+
+
+BackoffType = Literal['constant', 'exponential', 'decorrelated']
+ExceptionTypes = Union[Type[BaseException], Tuple[Type[BaseException], ...]]
+
+
+class RetryBudget:
+    """
+    A token bucket of retries, which could be shared by many functions,
+    so that retries could not multiply the load of a struggling dependency.
+
+    Each retry takes a token, and the first attempts of calls are free.
+
+    Args:
+        limit (int): the number of retries allowed in every `interval` seconds in the long run
+        interval (float): the time interval in seconds
+        burst (int | None = None): the maximum number of retries in a burst, defaults to `limit`
+        clock (Clock = DEFAULT_CLOCK): the clock to read the time from
+    """
+
+    __slots__ = (
+        '_bucket',
+        '_clock'
+    )
+
+    _bucket: TokenBucketThrottler
+    _clock: Clock
+
+    def __init__(
+        self,
+        limit: int,
+        interval: float,
+        burst: Optional[int] = None,
+        clock: Clock = DEFAULT_CLOCK
+    ):
+        self._bucket = TokenBucketThrottler(limit, interval, burst)
+        self._clock = clock
+
+    def try_acquire(self) -> bool:
+        return self._bucket.try_acquire(self._clock.time())
+
+
+class Backoff:
+    """
+    Computes the delay before each retry
+
+    Args:
+        backoff (str): the type of backoff
+        base (float): the base delay in seconds
+        cap (float): the maximum delay in seconds
+        jitter (bool): whether to apply full jitter to the exponential backoff
+    """
+
+    __slots__ = (
+        'backoff',
+        'base',
+        'cap',
+        'jitter',
+        '_previous'
+    )
+
+    backoff: BackoffType
+    base: float
+    cap: float
+    jitter: bool
+    _previous: float
+
+    def __init__(
+        self,
+        backoff: BackoffType,
+        base: float,
+        cap: float,
+        jitter: bool
+    ):
+        self.backoff = backoff
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+        self._previous = base
+
+    def delay(self, attempt: int) -> float:
+        """
+        Returns the delay before the retry after the `attempt`-th attempt,
+        which starts from 0
+        """
+
+        if self.backoff == 'constant':
+            return self.base
+
+        if self.backoff == 'decorrelated':
+            # Decorrelated jitter
+            self._previous = min(
+                self.cap,
+                random.uniform(self.base, self._previous * 3)
+            )
+            return self._previous
+
+        delay = min(self.cap, self.base * 2 ** attempt)
+
+        if self.jitter:
+            # Full jitter
+            delay = random.uniform(0, delay)
+
+        return delay
+
+
+def retry(
+    times: int = 3,
+    exceptions: ExceptionTypes = Exception,
+    backoff: BackoffType = 'exponential',
+    base: float = 0.1,
+    cap: float = 10.,
+    jitter: bool = True,
+    deadline: Optional[float] = None,
+    budget: Optional[RetryBudget] = None,
+    clock: Clock = DEFAULT_CLOCK
+) -> Decorator:
+    """
+    Returns a decorator that calls the function `fn` again if it fails,
+    until it succeeds, or it has been called `times` times.
+
+    If it gives up, the exception of the last attempt is raised.
+
+    Args:
+        times (int = 3): the maximum number of attempts, including the first one. `REPEAT_INFINITY` means no limit
+        exceptions (Type[BaseException] | Tuple[Type[BaseException], ...] = Exception): only retry on these exceptions
+        backoff (str = 'exponential'): the type of backoff
+        - 'constant': wait `base` seconds before each retry
+        - 'exponential': wait `base * 2 ** n` seconds before the n-th retry, no more than `cap`
+        - 'decorrelated': the decorrelated jitter, i.e. wait a random time between `base` and 3 times of the previous delay, no more than `cap`
+        base (float = 0.1): the base delay in seconds
+        cap (float = 10.): the maximum delay in seconds
+        jitter (bool = True): whether to apply full jitter to the exponential backoff, i.e. wait a random time between 0 and the delay
+        deadline (float | None = None): the total time budget in seconds since the first attempt, it gives up if the next retry would start after the deadline
+        budget (RetryBudget | None = None): the retry budget which could be shared across functions, it gives up if the budget is exhausted
+        clock (Clock = DEFAULT_CLOCK): the clock to read the time from and to sleep with
+
+    Usage::
+
+        budget = RetryBudget(10, 1)
+
+        @retry(5, exceptions=ConnectionError, deadline=3, budget=budget)
+        @timeout(1)
+        async def request():
+            pass
+    """
+
+    if times == 0 or times < REPEAT_INFINITY:
+        raise ValueError(f'invalid times {times}')
+
+    def decorator(fn: Func) -> Func:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            start = clock.time()
+            error: Optional[BaseException] = None
+
+            try:
+                # The first attempt, which mostly succeeds, is made
+                # without the machinery of retries
+                return await fn(*args, **kwargs)
+            except exceptions as e:
+                error = e
+
+            delays = Backoff(backoff, base, cap, jitter)
+
+            def get_delay(attempt: int) -> Optional[float]:
+                delay = delays.delay(attempt)
+
+                if (
+                    deadline is not None
+                    and clock.time() + delay - start > deadline
+                ):
+                    return None
+
+                if budget is not None and not budget.try_acquire():
+                    return None
+
+                return delay
+
+            # The attempts are the iterations of `repeat()` with
+            # the backoff as the delay, which stop once it gives up
+            async with contextlib.aclosing(
+                ticks(times, get_delay, clock=clock)
+            ) as attempts:
+                async for attempt in attempts:
+                    if attempt == 0:
+                        # Already made
+                        continue
+
+                    try:
+                        return await fn(*args, **kwargs)
+                    except exceptions as e:
+                        error = e
+
+            # Gives up, and raises the exception of the last attempt
+            assert error is not None
+            raise error
+
+        return wrapper
+    return decorator
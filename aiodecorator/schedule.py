@@ -1,6 +1,5 @@
 import functools
-import asyncio
-from typing import Literal, Callable
+from typing import Literal, Callable, Optional
 from datetime import datetime, timedelta
 
 from .common import (
@@ -8,7 +7,18 @@ from .common import (
     Func,
     T
 )
-
+from .clock import (
+    Clock,
+    DEFAULT_CLOCK
+)
+from .observer import (
+    Observer,
+    observe_schedule
+)
+from .stage import (
+    ScheduleStage,
+    with_stage
+)
 
 
 NaturalUnit = Literal['secondly', 'minutely', 'hourly', 'daily', 'weekly', 'monthly', 'yearly']
@@ -20,44 +30,39 @@ Weekday = Literal[
 
 def next_second(
     now: datetime,
-    _: Weekday,
-    step: int
+    _: Weekday
 ) -> datetime:
-    return (now + timedelta(seconds=1 - step)).replace(microsecond=0)
+    return (now + timedelta(seconds=1)).replace(microsecond=0)
 
 
 def next_minute(
     now: datetime,
-    _: Weekday,
-    step: int
+    _: Weekday
 ) -> datetime:
-    return (now + timedelta(minutes=1 - step)).replace(second=0, microsecond=0)
+    return (now + timedelta(minutes=1)).replace(second=0, microsecond=0)
 
 
 def next_hour(
     now: datetime,
-    _: Weekday,
-    step: int
+    _: Weekday
 ) -> datetime:
     return (
-        now + timedelta(hours=1 - step)
+        now + timedelta(hours=1)
     ).replace(minute=0, second=0, microsecond=0)
 
 
 def next_day(
     now: datetime,
-    _: Weekday,
-    step: int
+    _: Weekday
 ) -> datetime:
     return (
-        now + timedelta(days=1 - step)
+        now + timedelta(days=1)
     ).replace(hour=0, minute=0, second=0, microsecond=0)
 
 
 def next_week(
     now: datetime,
-    weekday: Weekday,
-    step: int
+    weekday: Weekday
 ) -> datetime:
     weekday = weekday.lower()
 
@@ -83,29 +88,29 @@ def next_week(
         days = 7
 
     return (
-        now + timedelta(days=days - step * 7)
+        now + timedelta(days=days)
     ).replace(hour=0, minute=0, second=0, microsecond=0)
 
 
 def next_month(
     now: datetime,
-    _: Weekday,
-    step: int
+    _: Weekday
 ) -> datetime:
-    month = now.month + 1 - step
+    # 0-based month index of the next month
+    month = now.month
 
-    return datetime(now.year + (month // 12), month % 12, 1)
+    return datetime(now.year + month // 12, month % 12 + 1, 1)
 
 
 def next_year(
     now: datetime,
-    _: Weekday,
-    step: int
+    _: Weekday
 ) -> datetime:
-    return datetime(now.year + 1 - step, 1, 1)
+    return datetime(now.year + 1, 1, 1)
 
 
-TypeGetNextTime = Callable[[datetime, Weekday, int], datetime]
+# Returns the first time slot strictly after `now`
+TypeGetNextTime = Callable[[datetime, Weekday], datetime]
 
 
 class TimeScheduler:
@@ -123,23 +128,10 @@ class TimeScheduler:
         day: Weekday,
         delay: timedelta,
     ) -> datetime:
-        step = 0
-        next_time = self._get_next_time(now, day, step) + delay
-
-        while True:
-            step += 1
-            previous_time = self._get_next_time(now, day, step) + delay
-
-            # if the previous time is now, actually the time already passed
-            # so we should return the next time
-            if previous_time <= now:
-                # If the previous time is before the current time,
-                # then the next time is the next time.
-                return next_time
-
-            # Otherwise, the next time is the previous time,
-            # because we should find the nearest time matching the condition.
-            next_time = previous_time
+        # The next time is the first `slot + delay` after `now`,
+        # i.e. the first slot after `now - delay`,
+        # which costs the same no matter how large `delay` is
+        return self._get_next_time(now - delay, day) + delay
 
 
 SCHEDULERS = {
@@ -170,7 +162,9 @@ def get_time_to_wait(
 def schedule_naturally(
     unit: NaturalUnit,
     delay: timedelta = ZERO_TIMEDELTA,
-    weekday: Weekday = DEFAULT_WEEKDAY
+    weekday: Weekday = DEFAULT_WEEKDAY,
+    clock: Clock = DEFAULT_CLOCK,
+    observer: Optional[Observer] = None
 ) -> Decorator:
     """
     Returns a decorator that schedules the function `fn`
@@ -180,6 +174,8 @@ def schedule_naturally(
         unit: `Literal['secondly', 'minutely', 'hourly', 'daily', 'weekly', 'monthly', 'yearly']` The unit of the interval to schedule the next function call
         delay: `timedelta = timedelta(seconds=0)` The delay before the function is called
         weekday: `Weekday = 'monday'` The day of the week to schedule the function, only used when `unit` is `weekly`
+        clock: `Clock = DEFAULT_CLOCK` The clock to read the current wall clock time from and to sleep with
+        observer: `Observer | None = None` The observer to record the metrics of scheduling
 
     For example::
 
@@ -193,9 +189,23 @@ def schedule_naturally(
     def decorator(fn: Func) -> Func:
         @functools.wraps(fn)
         async def wrapper(*args, **kwargs) -> T:
-            wait = get_time_to_wait(datetime.now(), unit, weekday, delay)
+            wait = get_time_to_wait(clock.now(), unit, weekday, delay)
+
+            if observer is None:
+                await clock.sleep(wait.total_seconds())
+            else:
+                await observe_schedule(observer, clock, wait.total_seconds())
 
-            await asyncio.sleep(wait.total_seconds())
             return await fn(*args, **kwargs)
         return wrapper
-    return decorator
+
+    return with_stage(
+        decorator,
+        ScheduleStage(
+            lambda: get_time_to_wait(
+                clock.now(), unit, weekday, delay
+            ).total_seconds(),
+            clock,
+            observer
+        )
+    )
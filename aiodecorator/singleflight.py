@@ -0,0 +1,101 @@
+import asyncio
+import functools
+from typing import (
+    Dict,
+    Hashable,
+    Optional
+)
+
+from .common import (
+    Decorator,
+    Func,
+    T
+)
+from .throttle import KeyFunc
+
+
+def _default_key(*args, **kwargs) -> Hashable:
+    if not kwargs:
+        return args
+
+    return args, tuple(sorted(kwargs.items()))
+
+
+class Flight:
+    """
+    A shared call in flight, and the number of callers waiting for it
+    """
+
+    __slots__ = (
+        'task',
+        'waiters'
+    )
+
+    task: asyncio.Future
+    waiters: int
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+def singleflight(
+    key: Optional[KeyFunc] = None
+) -> Decorator:
+    """
+    Returns a decorator that coalesces concurrent calls of the function `fn`
+    with the same key into a single call, whose result or exception is
+    shared by all of the callers.
+
+    A caller could leave, such as being canceled or timed out, without
+    affecting the others. The shared call is canceled only if all of
+    its callers have left.
+
+    Args:
+        key (Callable[..., Hashable] | None = None): returns the key of a call, defaults to the arguments, which should be hashable
+
+    Usage::
+
+        # Each caller has its own deadline
+        @timeout(1)
+        @singleflight()
+        async def load(user_id):
+            return await db.get_user(user_id)
+    """
+
+    get_key: KeyFunc = _default_key if key is None else key
+
+    def decorator(fn: Func) -> Func:
+        flights: Dict[Hashable, Flight] = {}
+
+        def land(k: Hashable, flight: Flight) -> None:
+            if flights.get(k) is flight:
+                del flights[k]
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            k = get_key(*args, **kwargs)
+            flight = flights.get(k)
+
+            if flight is None:
+                flight = Flight(asyncio.ensure_future(fn(*args, **kwargs)))
+                flights[k] = flight
+                flight.task.add_done_callback(
+                    lambda _: land(k, flight)
+                )
+
+            flight.waiters += 1
+
+            try:
+                return await asyncio.shield(flight.task)
+            finally:
+                flight.waiters -= 1
+
+                if not flight.waiters and not flight.task.done():
+                    # The last caller has left, so that
+                    # a new call should not join the canceled one
+                    land(k, flight)
+                    flight.task.cancel()
+
+        return wrapper
+    return decorator
@@ -0,0 +1,69 @@
+from typing import (
+    Callable,
+    Literal,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Union,
+    cast
+)
+
+from .common import (
+    Decorator,
+    Func
+)
+from .clock import Clock
+from .observer import Observer
+
+
+# The configurations of decorators which `pipeline()` could fuse into
+# a single wrapper. A decorator which could be fused has the attribute
+# `stage`, which is `None` if it is configured with options that
+# could not be fused, such as `repeat(..., concurrency=2)`
+
+
+RepeatMode = Literal['fixed_delay', 'fixed_rate']
+OverrunPolicy = Literal['skip', 'catch_up', 'queue']
+
+
+class RepeatStage(NamedTuple):
+    times: int
+    interval: float
+    mode: RepeatMode
+    on_overrun: OverrunPolicy
+    clock: Clock
+    observer: Optional[Observer]
+
+
+class ScheduleStage(NamedTuple):
+    # Returns the seconds to wait until the next time slot
+    get_wait: Callable[[], float]
+    clock: Clock
+    observer: Optional[Observer]
+
+
+class TimeoutStage(NamedTuple):
+    seconds: Optional[float]
+    # The deadline in the time of `clock`, which overrides `seconds`
+    at: Optional[float]
+    clock: Clock
+
+
+Stage = Union[RepeatStage, ScheduleStage, TimeoutStage]
+
+
+class StagedDecorator(Protocol):
+    stage: Optional[Stage]
+
+    def __call__(self, fn: Func) -> Func:
+        ...
+
+
+def with_stage(decorator: Decorator, stage: Optional[Stage]) -> Decorator:
+    """
+    Attaches `stage` to `decorator` as its attribute `stage`
+    """
+
+    staged = cast(StagedDecorator, decorator)
+    staged.stage = stage
+    return staged
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Generic,
+    Hashable,
+    Optional,
+    TypeVar
+)
+
+
+V = TypeVar('V')
+
+DEFAULT_MAX_KEYS = 10000
+
+
+class _Slot(Generic[V]):
+    __slots__ = (
+        'value',
+        'atime'
+    )
+
+    value: V
+    # The last access time of the slot
+    atime: float
+
+    def __init__(self, value: V, atime: float):
+        self.value = value
+        self.atime = atime
+
+
+class KeyedStore(Generic[V]):
+    """
+    A bounded key-value store which creates values on demand, and evicts
+    the least recently used ones once it exceeds `max_size` or when they have
+    been idle for more than `ttl` seconds.
+
+    Both lookups and evictions are O(1) (amortized for idle eviction),
+    because the entries are always kept in the order of last access.
+
+    Args:
+        factory (Callable[[Hashable], V]): creates the value of a new key
+        max_size (int = 10000): the maximum number of keys to keep
+        ttl (float | None = None): the idle time in seconds after which a key is evicted. `None` means never
+        busy (Callable[[V, float], bool] | None = None): if specified, an idle value is not evicted while `busy(value, now)` returns True, such as a throttler which has booked a slot in the future, and is checked again after another `ttl` seconds
+    """
+
+    __slots__ = (
+        '_factory',
+        '_max_size',
+        '_ttl',
+        '_busy',
+        '_entries'
+    )
+
+    _factory: Callable[[Hashable], V]
+    _max_size: int
+    _ttl: Optional[float]
+    _busy: Optional[Callable[[V, float], bool]]
+    _entries: 'OrderedDict[Hashable, _Slot[V]]'
+
+    def __init__(
+        self,
+        factory: Callable[[Hashable], V],
+        max_size: int = DEFAULT_MAX_KEYS,
+        ttl: Optional[float] = None,
+        busy: Optional[Callable[[V, float], bool]] = None
+    ):
+        if max_size <= 0:
+            raise ValueError(f'max_size must be positive, but got {max_size}')
+
+        self._factory = factory
+        self._max_size = max_size
+        self._ttl = ttl
+        self._busy = busy
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, now: float) -> V:
+        """
+        Get the value of `key`, create it if not exists,
+        and mark it as the most recently used one
+        """
+
+        entries = self._entries
+
+        ttl = self._ttl
+        if ttl is not None:
+            self._evict_idle(now, now - ttl)
+
+        slot = entries.get(key)
+
+        if slot is not None:
+            slot.atime = now
+            entries.move_to_end(key)
+            return slot.value
+
+        if len(entries) >= self._max_size:
+            # Evict the least recently used one
+            entries.popitem(last=False)
+
+        value = self._factory(key)
+        entries[key] = _Slot(value, now)
+        return value
+
+    def discard(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _evict_idle(self, now: float, expire_before: float) -> None:
+        entries = self._entries
+        busy = self._busy
+
+        # The entries are sorted by access time,
+        # so we only need to check the oldest ones,
+        # and each busy one at most once
+        for _ in range(len(entries)):
+            oldest_key = next(iter(entries))
+            slot = entries[oldest_key]
+
+            if slot.atime > expire_before:
+                break
+
+            if busy is not None and busy(slot.value, now):
+                # Keep it as if it is accessed now, so that the order
+                # of access time still holds
+                slot.atime = now
+                entries.move_to_end(oldest_key)
+                continue
+
+            del entries[oldest_key]
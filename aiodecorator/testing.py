@@ -0,0 +1,104 @@
+"""
+Utilities to test time-dependent coroutines in virtual time.
+
+Usage::
+
+    from aiodecorator.testing import run
+
+    async def main():
+        await asyncio.sleep(3600)
+
+    # Returns immediately
+    run(main())
+"""
+
+import asyncio
+import selectors
+from datetime import datetime, timedelta
+from typing import (
+    Coroutine,
+    Any,
+    Optional
+)
+
+from .clock import LoopClock
+from .common import T
+
+
+class _VirtualTimeSelector(selectors.DefaultSelector):  # type: ignore[valid-type,misc]
+    def __init__(self, loop: 'VirtualTimeEventLoop'):
+        super().__init__()
+        self._loop = loop
+
+    def select(self, timeout: Optional[float] = None):
+        if timeout is None:
+            # Nothing is scheduled, wait for real I/O events
+            return super().select(None)
+
+        events = super().select(0)
+
+        if not events and timeout > 0:
+            # Instead of blocking, jump directly to the next timer
+            self._loop.advance(timeout)
+
+        return events
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """
+    An event loop whose clock only moves forward when there is nothing
+    ready to run, and then jumps to the next scheduled timer immediately.
+
+    So `asyncio.sleep(3600)` returns without really sleeping,
+    and `loop.time()` reports as if it did.
+
+    Real I/O and threads still work, but the time they take in reality
+    is not reflected by the virtual clock.
+    """
+
+    _virtual_time: float
+
+    def __init__(self, start: float = 0.):
+        self._virtual_time = start
+        super().__init__(_VirtualTimeSelector(self))
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def advance(self, seconds: float) -> None:
+        self._virtual_time += seconds
+
+
+class VirtualClock(LoopClock):
+    """
+    A clock whose wall clock time `now()` starts from `start` and moves
+    along with the time of the running loop,
+    which is useful to test natural schedules with `VirtualTimeEventLoop`
+
+    Args:
+        start (datetime): the wall clock time at which the clock is firstly read
+    """
+
+    _start: datetime
+    _origin: Optional[float]
+
+    def __init__(self, start: datetime):
+        self._start = start
+        self._origin = None
+
+    def now(self) -> datetime:
+        now = self.time()
+
+        if self._origin is None:
+            self._origin = now
+
+        return self._start + timedelta(seconds=now - self._origin)
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """
+    Run the coroutine `main` in a new `VirtualTimeEventLoop`, like `asyncio.run()`
+    """
+
+    with asyncio.Runner(loop_factory=VirtualTimeEventLoop) as runner:
+        return runner.run(main)
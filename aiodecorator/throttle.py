@@ -1,14 +1,39 @@
+import math
 import time
 import asyncio
 import functools
+import threading
 import contextlib
-
-from typing import Literal, Optional
+from collections import deque
+
+from typing import (
+    Literal,
+    Optional,
+    Callable,
+    Hashable,
+    List,
+    Any,
+    Awaitable
+)
 
 from .common import (
     Decorator,
     Func,
-    T
+    T,
+    is_coroutine_function
+)
+from .clock import (
+    Clock,
+    DEFAULT_CLOCK
+)
+from .backend import ThrottleBackend
+from .observer import (
+    Observer,
+    observe_call
+)
+from .store import (
+    KeyedStore,
+    DEFAULT_MAX_KEYS
 )
 
 
@@ -16,25 +41,147 @@ class ThrottleCanceledError(asyncio.CancelledError):
     pass
 
 
-class Throttler:
+class ThrottleQueueFullError(Exception):
+    pass
+
+
+class BaseThrottler:
+    """
+    The base class of throttlers which holds the state shared by all
+    throttle algorithms. Subclasses implement `acquire()` and `try_acquire()`
+    """
+
     __slots__ = (
-        'tick',
-        'count',
+        'limit',
+        'interval',
         'task',
-        '_canceled_tasks'
+        'queue',
+        '_canceled_tasks',
+        '_timer'
     )
 
-    # A tick is a clock tick with interval `interval`
-    tick: float
-    count: int
+    limit: int
+    interval: float
     task: Optional[asyncio.Task]
+
+    # The pending calls of the 'queue' throttle type,
+    # each of which is a tuple of (due_time, future)
+    queue: Optional[deque]
+
     _canceled_tasks: set
+    _timer: Optional[asyncio.TimerHandle]
 
-    def __init__(self):
-        self.tick = 0.
-        self.count = 0
+    def __init__(
+        self,
+        limit: int,
+        interval: float
+    ):
+        self.limit = limit
+        self.interval = interval
         self.task = None
+        self.queue = None
         self._canceled_tasks = set()
+        self._timer = None
+
+    def acquire(self, now: float) -> float:
+        """
+        Take a slot, and returns the seconds to wait before the slot is available
+        """
+
+        raise NotImplementedError
+
+    def try_acquire(self, now: float) -> bool:
+        """
+        Take a slot only if it is available right now
+        """
+
+        raise NotImplementedError
+
+    @property
+    def pending(self) -> int:
+        return 0 if self.queue is None else len(self.queue)
+
+    def busy(self, now: float) -> bool:
+        """
+        Returns whether the throttler still holds calls back at `now`,
+        so that it should not be evicted and replaced with a fresh one,
+        which would let more calls through
+        """
+
+        return self.pending > 0
+
+    def enqueue(self, sleep: float) -> asyncio.Future:
+        """
+        Put the current call into the dispatch queue, and returns a future
+        which will be resolved after `sleep` seconds.
+
+        All pending calls share a single loop timer,
+        which is always scheduled for the head of the queue.
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if self.queue is None:
+            self.queue = deque()
+
+        # Due times are non-decreasing, because slots are taken in order
+        self.queue.append((loop.time() + sleep, future))
+
+        if self._timer is None:
+            self._schedule(loop)
+
+        return future
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        queue = self.queue
+
+        # Only scheduled for a non-empty queue
+        assert queue is not None
+
+        due, _ = queue[0]
+        self._timer = loop.call_at(due, self._release, loop, due)
+
+    def _release(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        when: float
+    ) -> None:
+        self._timer = None
+
+        queue = self.queue
+
+        # The timer might be fired a little bit earlier than `when`
+        # within the clock resolution of the loop
+        now = max(loop.time(), when)
+
+        while queue:
+            due, future = queue[0]
+
+            if due > now:
+                self._schedule(loop)
+                return
+
+            queue.popleft()
+
+            if not future.done():
+                # Which might be canceled by the caller
+                future.set_result(None)
+
+    async def run(self, coro: Awaitable[T]) -> Optional[T]:
+        """
+        Run the coroutine in a task which could be canceled by `cancel()`,
+        and returns `None` if it is canceled so
+        """
+
+        task = asyncio.ensure_future(coro)
+        self.set_task(task)
+
+        try:
+            with self.context(task):
+                return await task
+        except ThrottleCanceledError:
+            return None
 
     def set_task(
         self,
@@ -42,11 +189,18 @@ class Throttler:
     ) -> None:
         self.task = task
 
-    def cancel(self):
+    def cancel(self) -> bool:
+        """
+        Cancel the running call if any, and returns whether it is canceled
+        """
+
         if self.task is not None:
             self._canceled_tasks.add(self.task)  # Remember which task we canceled
             self.task.cancel()
             self.task = None
+            return True
+
+        return False
 
     @contextlib.contextmanager
     def context(self, task: asyncio.Task):
@@ -64,18 +218,455 @@ class Throttler:
                 raise
 
 
-ThrottleType = Literal['ignore', 'wait', 'replace']
+class Throttler(BaseThrottler):
+    """
+    The fixed-tick counter, which is the default algorithm.
+
+    Notice that it allows up to 2 * `limit` calls across a tick boundary
+    """
+
+    __slots__ = (
+        'tick',
+        'count'
+    )
+
+    # A tick is a clock tick with interval `interval`
+    tick: float
+    count: int
+
+    def __init__(
+        self,
+        limit: int,
+        interval: float
+    ):
+        super().__init__(limit, interval)
+        self.tick = - math.inf
+        self.count = 0
+
+    def acquire(self, now: float) -> float:
+        if now - self.tick > self.interval:
+            # Which means the current execution is the first one
+            # into the interval span.
+            # So we reset the tick and count
+            self.tick = now
+            self.count = 1
+
+            # And we could execute the function immediately
+
+        elif self.count < self.limit:
+            # It does not exceed the limit of the current tick pointer
+            self.count += 1
+
+        else:
+            # Exceed the limit, move the pointer to the next tick
+            self.tick += self.interval
+            self.count = 1
+
+        return self.tick - now
+
+    def try_acquire(self, now: float) -> bool:
+        # For backward compatibility, calls that exceed the limit
+        # still move the tick pointer forward
+        return self.acquire(now) <= 0
+
+    def busy(self, now: float) -> bool:
+        # The current tick, or a tick booked ahead, has not ended
+        return self.tick + self.interval > now or super().busy(now)
+
+
+class TokenBucketThrottler(BaseThrottler):
+    """
+    The token bucket, which refills `limit` tokens every `interval` seconds,
+    and holds at most `burst` tokens.
+
+    So it allows a burst of `burst` calls, and `limit / interval` calls
+    per second in the long run
+    """
+
+    __slots__ = (
+        'burst',
+        'tokens',
+        'updated'
+    )
+
+    burst: int
+    tokens: float
+    updated: float
+
+    def __init__(
+        self,
+        limit: int,
+        interval: float,
+        burst: Optional[int] = None
+    ):
+        super().__init__(limit, interval)
+        self.burst = limit if burst is None else burst
+        self.tokens = float(self.burst)
+        self.updated = - math.inf
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(
+                self.burst,
+                self.tokens + (now - self.updated) * self.limit / self.interval
+            )
+            self.updated = now
+
+    def acquire(self, now: float) -> float:
+        self._refill(now)
+
+        # Tokens might be borrowed from the future,
+        # so that waiting callers are served in order
+        self.tokens -= 1
+
+        if self.tokens >= 0:
+            return 0.
+
+        return - self.tokens * self.interval / self.limit
+
+    def try_acquire(self, now: float) -> bool:
+        self._refill(now)
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+
+        return False
+
+    def busy(self, now: float) -> bool:
+        self._refill(now)
+
+        # Tokens are borrowed from the future, or not refilled yet
+        return self.tokens < self.burst or super().busy(now)
+
+
+class SlidingLogThrottler(BaseThrottler):
+    """
+    The sliding log, which allows a call only if there are less than `limit`
+    calls in the last `interval` seconds.
+
+    It is exact, and keeps a ring buffer of the last `limit` call times,
+    so the memory is constant no matter how many calls there are
+    """
+
+    __slots__ = (
+        'log',
+        'index'
+    )
+
+    log: List[float]
+    index: int
+
+    def __init__(
+        self,
+        limit: int,
+        interval: float
+    ):
+        super().__init__(limit, interval)
+        self.log = [- math.inf] * limit
+        self.index = 0
+
+    def _take(self, at: float) -> None:
+        self.log[self.index] = at
+        self.index = (self.index + 1) % self.limit
+
+    def acquire(self, now: float) -> float:
+        # The `limit`-th latest call, which is the oldest one in the log
+        at = max(now, self.log[self.index] + self.interval)
+        self._take(at)
+        return at - now
+
+    def try_acquire(self, now: float) -> bool:
+        if self.log[self.index] + self.interval > now:
+            return False
+
+        self._take(now)
+        return True
+
+    def busy(self, now: float) -> bool:
+        # The latest call, which might be booked ahead, is still in the log
+        latest = self.log[self.index - 1]
+        return latest + self.interval > now or super().busy(now)
+
+
+class SlidingWindowThrottler(BaseThrottler):
+    """
+    The sliding window counter, which estimates the number of calls
+    in the last `interval` seconds by weighting the counts of the previous
+    and the current aligned windows.
+
+    It is an approximation of the sliding log with only two counters
+    """
+
+    __slots__ = (
+        'start',
+        'previous',
+        'current'
+    )
+
+    # The start time of the current window
+    start: float
+    previous: int
+    current: int
+
+    def __init__(
+        self,
+        limit: int,
+        interval: float
+    ):
+        super().__init__(limit, interval)
+        self.start = 0.
+        self.previous = 0
+        self.current = 0
+
+    def _roll(self, now: float) -> None:
+        if now < self.start + self.interval:
+            return
+
+        windows = (now - self.start) // self.interval
+
+        self.previous = self.current if windows == 1 else 0
+        self.current = 0
+        self.start += windows * self.interval
+
+    def _available_at(self) -> float:
+        """
+        Returns the earliest time in the current window from which
+        one more call is allowed, i.e. the weighted count is below `limit`
+        """
+
+        room = self.limit - self.current
+
+        if room <= 0:
+            return math.inf
+
+        if room >= self.previous:
+            return self.start
+
+        # Solve `previous * (1 - elapsed / interval) + current < limit`
+        return self.start + self.interval * (1 - room / self.previous)
+
+    def acquire(self, now: float) -> float:
+        self._roll(now)
+
+        at = self._available_at()
+
+        if at >= self.start + self.interval:
+            # Reserve a slot in the next window
+            self.start += self.interval
+            self.previous = self.current
+            self.current = 0
+            at = self._available_at()
+
+        self.current += 1
+        return max(at - now, 0.)
+
+    def try_acquire(self, now: float) -> bool:
+        self._roll(now)
+
+        # The weighted count of the last `interval` seconds before the call
+        elapsed = now - self.start
+        count = self.previous * (1 - elapsed / self.interval) + self.current
+
+        if count >= self.limit:
+            return False
+
+        self.current += 1
+        return True
+
+    def busy(self, now: float) -> bool:
+        # The current window, or a window booked ahead, has not ended
+        return self.start + self.interval > now or super().busy(now)
+
+
+class SharedThrottler(BaseThrottler):
+    """
+    Draws permits of aligned fixed windows from a shared `ThrottleBackend`,
+    `backend.batch` permits at a time, and hands them out locally
+    until they are used up or the window expires
+    """
+
+    __slots__ = (
+        'backend',
+        'name',
+        'permits',
+        'expires',
+        '_lock'
+    )
+
+    backend: ThrottleBackend
+    name: str
+    permits: int
+    expires: float
+    _lock: Optional[asyncio.Lock]
+
+    def __init__(
+        self,
+        limit: int,
+        interval: float,
+        backend: ThrottleBackend,
+        name: str
+    ):
+        super().__init__(limit, interval)
+        self.backend = backend
+        self.name = name
+        self.permits = 0
+        self.expires = - math.inf
+        self._lock = None
+
+    def _take_local(self, now: float) -> bool:
+        if self.permits > 0 and now < self.expires:
+            self.permits -= 1
+            return True
+
+        return False
+
+    async def reserve(self) -> float:
+        """
+        Take a permit, and returns 0 if succeeded,
+        or the seconds until the current window expires
+        """
+
+        backend = self.backend
+
+        if self._take_local(backend.time()):
+            return 0.
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # Only one reservation of the throttler is in flight
+        async with self._lock:
+            now = backend.time()
+
+            # The permits might be refilled by another call
+            if self._take_local(now):
+                return 0.
+
+            granted, self.expires = await backend.reserve(
+                self.name,
+                backend.batch,
+                self.limit,
+                self.interval
+            )
+
+            if granted == 0:
+                self.permits = 0
+                return self.expires - now
+
+            self.permits = granted - 1
+            return 0.
+
+
+ThrottleAlgorithm = Literal['fixed', 'token_bucket', 'sliding_log', 'sliding_window']
+
+THROTTLERS = {
+    'fixed': Throttler,
+    'token_bucket': TokenBucketThrottler,
+    'sliding_log': SlidingLogThrottler,
+    'sliding_window': SlidingWindowThrottler
+}
+
+
+def thread_safe(Class: type) -> type:
+    """
+    Returns a subclass of the throttler class `Class` whose slots are taken
+    under a lock of its own, so that a throttler could be shared by
+    coroutines and threads.
+
+    Both sides read `time.monotonic()`, which is also the time of
+    the event loop by default, so they draw from the same budget
+    """
+
+    class ThreadSafeThrottler(Class):
+        __slots__ = (
+            '_lock',
+        )
+
+        # Reentrant, because `try_acquire()` might call `acquire()`
+        _lock: threading.RLock
+
+        def __init__(self, *args):
+            super().__init__(*args)
+            self._lock = threading.RLock()
+
+        def acquire(self, now: float) -> float:
+            with self._lock:
+                return super().acquire(now)
+
+        def try_acquire(self, now: float) -> bool:
+            with self._lock:
+                return super().try_acquire(now)
+
+        def busy(self, now: float) -> bool:
+            with self._lock:
+                return super().busy(now)
+
+    ThreadSafeThrottler.__name__ = ThreadSafeThrottler.__qualname__ = (
+        f'ThreadSafe{Class.__name__}'
+    )
+
+    return ThreadSafeThrottler
+
+
+THREAD_SAFE_THROTTLERS = {
+    algorithm: thread_safe(Class)
+    for algorithm, Class in THROTTLERS.items()
+}
+
+
+def create_throttler(
+    algorithm: ThrottleAlgorithm,
+    limit: int,
+    interval: float,
+    burst: Optional[int] = None,
+    thread_safe: bool = False
+) -> BaseThrottler:
+    throttlers = THREAD_SAFE_THROTTLERS if thread_safe else THROTTLERS
+
+    try:
+        Class = throttlers[algorithm]
+    except KeyError:
+        raise ValueError(f'unknown throttle algorithm "{algorithm}"')
+
+    if algorithm == 'token_bucket':
+        return Class(limit, interval, burst)
+
+    return Class(limit, interval)
+
+
+ThrottleType = Literal['ignore', 'wait', 'replace', 'queue']
+OverflowType = Literal['reject', 'drop']
+KeyFunc = Callable[..., Hashable]
+GetThrottler = Callable[[tuple, dict, float], Any]
 
 
 def throttle(
     limit: int,
     interval: float,
-    throttle_type: ThrottleType = 'ignore'
+    throttle_type: ThrottleType = 'ignore',
+    key: Optional[KeyFunc] = None,
+    max_keys: int = DEFAULT_MAX_KEYS,
+    key_ttl: Optional[float] = None,
+    max_pending: Optional[int] = None,
+    overflow: OverflowType = 'reject',
+    clock: Clock = DEFAULT_CLOCK,
+    algorithm: ThrottleAlgorithm = 'fixed',
+    burst: Optional[int] = None,
+    backend: Optional[ThrottleBackend] = None,
+    name: Optional[str] = None,
+    observer: Optional[Observer] = None,
+    thread_safe: bool = False,
+    sync: Optional[bool] = None
 ) -> Decorator:
     """
     Throttle the function to be called no more than `limit` times
     in every `interval` seconds.
 
+    The function is a coroutine function, or any callable which returns
+    an awaitable. It could also be a sync function, see `sync`, which blocks
+    the calling thread for 'wait' and 'queue', and does not support 'replace'.
+
     Args:
         limit: The maximum number of times the function can be called
             in the given interval.
@@ -84,6 +675,26 @@ def throttle(
         - 'ignore': ignore the function call and return `None` if it exceeds the limit.
         - 'wait': wait for the next tick to execute the function.
         - 'replace': try to cancel the last function call, let it return `None` and execute the current function call.
+        - 'queue': like 'wait', but the calls are queued in FIFO order and released by a single loop timer.
+        key (Callable[..., Hashable] | None = None): if specified, the calls are throttled separately by the return value of `key(*args, **kwargs)`
+        max_keys (int = 10000): the maximum number of keys to keep track of, the least recently used key will be evicted if exceeded. Only used when `key` is specified
+        key_ttl (float | None = None): the idle time in seconds after which the state of a key is evicted, which must not be less than `interval`. A key which has booked a slot ahead or has pending calls is not evicted. Only used when `key` is specified
+        max_pending (int | None = None): the maximum number of pending calls in the queue. Only used when `throttle_type` is 'queue'
+        overflow (str = 'reject'): what to do with a call if the queue is full.
+        - 'reject': raise `ThrottleQueueFullError`
+        - 'drop': ignore the function call and return `None`
+        clock (Clock = DEFAULT_CLOCK): the clock to read the time from and to sleep with, defaults to the time of the running event loop
+        algorithm (str = 'fixed'): the throttle algorithm.
+        - 'fixed': the fixed-tick counter, which allows up to 2 * `limit` calls across a tick boundary
+        - 'token_bucket': allows a burst of `burst` calls, and `limit` calls per `interval` in the long run
+        - 'sliding_log': exactly no more than `limit` calls in any `interval` seconds, with O(limit) memory
+        - 'sliding_window': approximates 'sliding_log' with two counters
+        burst (int | None = None): the capacity of the token bucket, defaults to `limit`. Only used when `algorithm` is 'token_bucket'
+        backend (ThrottleBackend | None = None): if specified, the limit is shared by all processes using the same backend. Only the 'fixed' algorithm is supported, and 'queue' behaves like 'wait'
+        name (str | None = None): the name of the shared state in the backend, defaults to the qualified name of the function
+        observer (Observer | None = None): if specified, the observer to record the metrics of throttling
+        thread_safe (bool = False): if True, the throttle state is guarded by locks, and shared by all functions decorated by the returned decorator, so that coroutines and sync functions running in threads could draw from the same budget
+        sync (bool | None = None): whether the function is a sync function. `None` means it is only if `thread_safe` is True and it is not a coroutine function, otherwise it is treated as a function which returns an awaitable
 
     Example::
 
@@ -92,56 +703,276 @@ def throttle(
             pass
 
         # The function will be called at most 10 times per second
+
+        @throttle(limit=10, interval=1, key=lambda tenant: tenant)
+        async def my_tenant_function(tenant):
+            pass
+
+        # The function will be called at most 10 times per second for each tenant
+
+        budget = throttle(limit=10, interval=1, throttle_type='wait', thread_safe=True)
+
+        @budget
+        async def fetch():
+            pass
+
+        @budget
+        def parse():
+            pass
+
+        # fetch() and parse() in threads are called at most 10 times per second in total
     """
 
+    if thread_safe and backend is not None:
+        raise ValueError('a backend could not be used with thread_safe')
+
+    if key_ttl is not None and key_ttl < interval:
+        raise ValueError(
+            f'key_ttl must not be less than interval, but got {key_ttl}'
+        )
+
+    def getter(create: Callable[[Hashable], Any], locked: bool) -> GetThrottler:
+        """
+        Returns the function to get the throttler of a call
+        """
+
+        if key is None:
+            single = create(None)
+
+            def get_throttler(args, kwargs, now: float) -> Any:
+                return single
+
+            return get_throttler
+
+        get_key: KeyFunc = key
+        store: KeyedStore[Any] = KeyedStore(
+            create,
+            max_keys,
+            key_ttl,
+            # Keep the keys whose slots are booked ahead or which have
+            # pending calls, even if they are idle for `key_ttl`
+            lambda throttler, now: throttler.busy(now)
+        )
+
+        if not locked:
+            def get_throttler(args, kwargs, now: float) -> Any:
+                return store.get(get_key(*args, **kwargs), now)
+
+            return get_throttler
+
+        lock = threading.Lock()
+
+        def get_locked_throttler(args, kwargs, now: float) -> Any:
+            k = get_key(*args, **kwargs)
+
+            with lock:
+                return store.get(k, now)
+
+        return get_locked_throttler
+
+    def local(safe: bool) -> GetThrottler:
+        def create(k: Hashable) -> Any:
+            return create_throttler(algorithm, limit, interval, burst, safe)
+
+        return getter(create, safe)
+
+    # Thread-safe throttlers are shared by all decorated functions
+    shared_getter = local(True) if thread_safe else None
+
     def decorator(fn: Func) -> Func:
-        throttler = Throttler()
+        is_async = (
+            not sync if sync is not None
+            # Only infer sync functions for thread-safe throttles, so that
+            # a callable which returns an awaitable is still awaited
+            else not thread_safe or is_coroutine_function(fn)
+        )
+
+        if backend is not None:
+            if algorithm != 'fixed':
+                raise ValueError(
+                    'a backend only supports the "fixed" algorithm'
+                )
+
+            if not is_async:
+                raise ValueError(
+                    'a backend only supports coroutine functions'
+                )
+
+            shared_name = (
+                f'{fn.__module__}.{fn.__qualname__}' if name is None
+                else name
+            )
+
+            def create(k: Hashable) -> Any:
+                return SharedThrottler(
+                    limit,
+                    interval,
+                    backend,
+                    shared_name if k is None else f'{shared_name}:{k}'
+                )
+
+            get_throttler = getter(create, False)
+
+        elif shared_getter is not None:
+            get_throttler = shared_getter
+
+        else:
+            # Sync functions might be called in threads
+            get_throttler = local(not is_async)
+
+        if not is_async:
+            return blocking(fn, get_throttler)
+
+        async def observed(
+            observer: Observer,
+            throttler,
+            start: float,
+            args,
+            kwargs
+        ) -> Any:
+            observer.count('throttle.calls')
+
+            if throttle_type in ('wait', 'queue'):
+                observer.observe('throttle.wait', clock.time() - start)
+
+            coro = fn(*args, **kwargs)
+
+            if throttle_type == 'replace':
+                coro = throttler.run(coro)
+
+            return await observe_call(observer, 'throttle.exec', clock, coro)
 
         @functools.wraps(fn)
         async def wrapper(*args, **kwargs) -> T:
-            now = time.time()
+            now = clock.time()
+            throttler = get_throttler(args, kwargs, now)
 
-            if now - throttler.tick > interval:
-                # Which means the current execution is the first one
-                # into the interval span.
-                # So we reset the tick and count
-                throttler.tick = now
-                throttler.count = 1
+            if throttle_type == 'queue':
+                if (
+                    max_pending is not None
+                    and throttler.pending >= max_pending
+                ):
+                    if overflow == 'drop':
+                        if observer is not None:
+                            observer.count('throttle.dropped')
+                        return None
 
-                # And we could execute the function immediately
+                    if observer is not None:
+                        observer.count('throttle.rejected')
 
-            elif throttler.count < limit:
-                # It does not exceed the limit of the current tick pointer
-                throttler.count += 1
+                    raise ThrottleQueueFullError(
+                        f'too many pending calls, max_pending={max_pending}'
+                    )
 
-            else:
-                # Exceed the limit, move the pointer to the next tick
-                throttler.tick += interval
-                throttler.count = 1
+                sleep = throttler.acquire(now)
+
+                # Keep FIFO order even if the slot is already available
+                if sleep > 0 or throttler.pending:
+                    await throttler.enqueue(sleep)
 
-            sleep = throttler.tick - now
+            elif throttle_type == 'wait':
+                sleep = throttler.acquire(now)
 
-            if sleep > 0:
+                if sleep > 0:
+                    # Throttle!
+                    await clock.sleep(sleep)
+
+            elif not throttler.try_acquire(now):
                 if throttle_type == 'ignore':
                     # Just return None of the current call
-                    return
-                elif throttle_type == 'wait':
-                    # Throttle!
-                    await asyncio.sleep(sleep)
-                elif throttle_type == 'replace':
-                    throttler.cancel()
+                    if observer is not None:
+                        observer.count('throttle.ignored')
+                    return None
 
-            task = asyncio.create_task(fn(*args, **kwargs))
-            throttler.set_task(task)
+                # 'replace'
+                if throttler.cancel() and observer is not None:
+                    observer.count('throttle.replaced')
 
-            try:
-                with throttler.context(task):
-                    result = await task
-            except ThrottleCanceledError:
-                return None
+            if observer is not None:
+                return await observed(observer, throttler, now, args, kwargs)
+
+            if throttle_type != 'replace':
+                # Only 'replace' needs a task handle to cancel,
+                # so just await the coroutine directly
+                return await fn(*args, **kwargs)
+
+            return await throttler.run(fn(*args, **kwargs))
+
+        if backend is None:
+            return wrapper
+
+        @functools.wraps(fn)
+        async def shared_wrapper(*args, **kwargs) -> T:
+            now = clock.time()
+            throttler = get_throttler(args, kwargs, now)
+
+            while True:
+                sleep = await throttler.reserve()
+
+                if sleep <= 0:
+                    break
+
+                if throttle_type == 'ignore':
+                    if observer is not None:
+                        observer.count('throttle.ignored')
+                    return None
+
+                if throttle_type == 'replace':
+                    if throttler.cancel() and observer is not None:
+                        observer.count('throttle.replaced')
+                    break
+
+                # 'wait' and 'queue', try again in the next window
+                await clock.sleep(sleep)
 
-            return result
+            if observer is not None:
+                return await observed(observer, throttler, now, args, kwargs)
+
+            if throttle_type == 'replace':
+                return await throttler.run(fn(*args, **kwargs))
+
+            return await fn(*args, **kwargs)
+
+        return shared_wrapper
+
+    def blocking(fn: Callable[..., T], get_throttler: GetThrottler) -> Callable[..., T]:
+        if throttle_type == 'replace':
+            raise ValueError(
+                'throttle type "replace" is not supported for sync functions'
+            )
+
+        @functools.wraps(fn)
+        def sync_wrapper(*args, **kwargs) -> T:
+            now = clock.time()
+            throttler = get_throttler(args, kwargs, now)
+
+            if throttle_type == 'ignore':
+                if not throttler.try_acquire(now):
+                    if observer is not None:
+                        observer.count('throttle.ignored')
+                    return None
+
+            else:
+                # 'wait' and 'queue', blocks the current thread
+                sleep = throttler.acquire(now)
+
+                if sleep > 0:
+                    time.sleep(sleep)
+
+                if observer is not None:
+                    observer.observe('throttle.wait', clock.time() - now)
+
+            if observer is None:
+                return fn(*args, **kwargs)
+
+            observer.count('throttle.calls')
+            start = clock.time()
+
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observer.observe('throttle.exec', clock.time() - start)
 
-        return wrapper
+        return sync_wrapper
 
     return decorator
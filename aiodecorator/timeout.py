@@ -1,23 +1,83 @@
 import functools
 import asyncio
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Awaitable,
+    Tuple
+)
 
 from .common import (
     Decorator,
     Func,
     T
 )
+from .clock import (
+    Clock,
+    DEFAULT_CLOCK
+)
+from .quantile import P2Quantile
+from .stage import (
+    TimeoutStage,
+    with_stage
+)
+from .observer import (
+    Observer,
+    observe_call
+)
+
+
+# The number of observed calls before the adaptive timeout takes effect
+MIN_SAMPLES = 20
+
+# The timers of the `timeout()`s which enclose the running code of a task,
+# so that a decorator beneath them could tell a timeout from other cancellations
+active_timers: ContextVar[Tuple[asyncio.Timeout, ...]] = ContextVar(
+    'active_timers',
+    default=()
+)
+
+
+def timed_out() -> bool:
+    """
+    Returns whether the running task is canceled by an enclosing `timeout()`
+    """
+
+    return any(timer.expired() for timer in active_timers.get())
+
+
+async def run_within(timer: asyncio.Timeout, awaitable: Awaitable) -> Any:
+    async with timer:
+        token = active_timers.set(active_timers.get() + (timer,))
+
+        try:
+            return await awaitable
+        finally:
+            active_timers.reset(token)
 
 
 def timeout(
     seconds: int | None = None,
-    at: float | None = None
+    at: float | None = None,
+    clock: Clock = DEFAULT_CLOCK,
+    percentile: float | None = None,
+    multiplier: float = 1.5,
+    min_seconds: float | None = None,
+    max_seconds: float | None = None,
+    observer: Observer | None = None
 ) -> Decorator:
     """
     Make the function automatically cancel itself if it takes too long to execute.
 
     Args:
-        seconds (int | None = None): seconds to timeout
-        at (float | None = None): deadline to timeout, `at` has higher priority than `seconds`
+        seconds (int | None = None): seconds to timeout. If `percentile` is specified, it is only used before enough calls are observed
+        at (float | None = None): deadline to timeout in the time of `clock`, `at` has higher priority than `seconds`
+        clock (Clock = DEFAULT_CLOCK): the clock which `at` and durations are measured by, defaults to the time of the running event loop
+        percentile (float | None = None): if specified, the timeout is adaptive, which is `multiplier` times the `percentile`-quantile of the durations of observed calls
+        multiplier (float = 1.5): the multiplier of the observed quantile
+        min_seconds (float | None = None): the lower bound of the adaptive timeout
+        max_seconds (float | None = None): the upper bound of the adaptive timeout, which is also the timeout before enough calls are observed if `seconds` is not specified
+        observer (Observer | None = None): if specified, the observer to record the metrics of calls and timeouts
 
     Example::
 
@@ -26,23 +86,123 @@ def timeout(
             pass
 
         # The function will be cancelled if it takes longer than 1 second
+
+        @timeout(percentile=0.99, multiplier=1.5, min_seconds=0.1, max_seconds=5)
+        def request():
+            pass
+
+        # The function will be cancelled if it takes longer than
+        # 1.5 times of p99 of its observed durations, between 0.1 and 5 seconds
     """
 
+    if percentile is not None and at is not None:
+        raise ValueError('percentile could not be used with at')
+
     def decorator(fn: Func) -> Func:
+        wrapper = (
+            adaptive(fn, P2Quantile(percentile)) if percentile is not None
+            else fixed(fn)
+        )
+
+        if observer is None:
+            return wrapper
+
+        return observed(observer, fn, wrapper)
+
+    def observed(observer: Observer, fn: Func, timed: Func) -> Func:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            observer.count('timeout.calls')
+
+            try:
+                return await observe_call(
+                    observer, 'timeout.exec', clock, timed(*args, **kwargs)
+                )
+            except TimeoutError:
+                observer.count('timeout.timeouts')
+                raise
+
+        return wrapper
+
+    def fixed(fn: Func) -> Func:
         @functools.wraps(fn)
         async def wrapper(*args, **kwargs) -> T:
             coro = fn(*args, **kwargs)
 
             if at is not None:
-                async with asyncio.timeout_at(at):
-                    return await coro
+                loop = asyncio.get_running_loop()
+
+                # Convert the deadline to the time of the loop
+                return await run_within(
+                    asyncio.timeout_at(loop.time() + at - clock.time()),
+                    coro
+                )
 
             if seconds is None or seconds <= 0:
                 return await coro
 
-            async with asyncio.timeout(seconds):
-                return await coro
+            # The same as `run_within()`, inlined for the common case
+            async with asyncio.timeout(seconds) as timer:
+                token = active_timers.set(active_timers.get() + (timer,))
+
+                try:
+                    return await coro
+                finally:
+                    active_timers.reset(token)
+
+        return wrapper
+
+    def adaptive(fn: Func, sketch: P2Quantile) -> Func:
+        def get_seconds() -> float | None:
+            if sketch.count < MIN_SAMPLES:
+                limit = seconds if seconds and seconds > 0 else max_seconds
+                # No need to clamp with `min_seconds` without observations
+                if limit is not None and max_seconds is not None:
+                    limit = min(limit, max_seconds)
+                return limit
+
+            value = sketch.value
+
+            # Never `None` once there are enough samples
+            assert value is not None
+
+            limit = value * multiplier
+
+            if min_seconds is not None:
+                limit = max(limit, min_seconds)
+
+            if max_seconds is not None:
+                limit = min(limit, max_seconds)
+
+            return limit
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            limit = get_seconds()
+            start = clock.time()
+
+            if limit is None:
+                result = await fn(*args, **kwargs)
+            else:
+                try:
+                    result = await run_within(
+                        asyncio.timeout(limit), fn(*args, **kwargs)
+                    )
+                except TimeoutError:
+                    # The duration is at least `limit`, which is observed,
+                    # so that the timeout could grow if the latency rises,
+                    # rather than cutting every call forever
+                    sketch.add(limit)
+                    raise
+
+            sketch.add(clock.time() - start)
+            return result
 
         return wrapper
 
-    return decorator
+    return with_stage(
+        decorator,
+        TimeoutStage(seconds, at, clock)
+        if percentile is None and observer is None
+        else None
+    )
@@ -0,0 +1,233 @@
+import heapq
+import asyncio
+import itertools
+from datetime import datetime
+from typing import (
+    Any,
+    Callable,
+    List,
+    Optional
+)
+
+from .clock import (
+    Clock,
+    DEFAULT_CLOCK
+)
+
+
+class TimerEntry:
+    __slots__ = (
+        'when',
+        'seq',
+        'callback',
+        'args',
+        'canceled',
+        '_timer'
+    )
+
+    when: float
+    seq: int
+    callback: Callable[..., Any]
+    args: tuple
+    canceled: bool
+    _timer: Optional['SharedTimer']
+
+    def __init__(
+        self,
+        when: float,
+        seq: int,
+        callback: Callable[..., Any],
+        args: tuple,
+        timer: 'SharedTimer'
+    ):
+        self.when = when
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.canceled = False
+        self._timer = timer
+
+    def __lt__(self, other: 'TimerEntry') -> bool:
+        return (self.when, self.seq) < (other.when, other.seq)
+
+    def cancel(self) -> None:
+        """
+        Cancel the entry in O(1), which is lazily removed from the heap
+        """
+
+        if self.canceled:
+            return
+
+        self.canceled = True
+        self.callback = _noop
+        self.args = ()
+
+        if self._timer is not None:
+            self._timer._on_cancel()
+            self._timer = None
+
+
+def _noop(*args) -> None:
+    pass
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class SharedTimer(Clock):
+    """
+    A clock whose `sleep()` is driven by a single heap and a single loop
+    timer, which could be shared by thousands of scheduled coroutines,
+    so that the loop only holds one timer handle for all of them.
+
+    Entries are added in O(log n) and canceled in O(1).
+
+    Args:
+        clock (Clock = DEFAULT_CLOCK): the underlying clock to read the time from
+
+    Usage::
+
+        timer = SharedTimer()
+
+        @repeat(-1, clock=timer)
+        @schedule_naturally('daily', clock=timer)
+        async def job(customer):
+            ...
+
+        for customer in customers:
+            asyncio.create_task(job(customer))
+    """
+
+    _clock: Clock
+    _heap: List[TimerEntry]
+    _canceled: int
+    _handle: Optional[asyncio.TimerHandle]
+
+    def __init__(self, clock: Clock = DEFAULT_CLOCK):
+        self._clock = clock
+        self._heap = []
+        self._canceled = 0
+        self._counter = itertools.count()
+        self._handle = None
+
+    def __len__(self) -> int:
+        """
+        Returns the number of entries which are not canceled
+        """
+
+        return len(self._heap) - self._canceled
+
+    def time(self) -> float:
+        return self._clock.time()
+
+    def now(self) -> datetime:
+        return self._clock.now()
+
+    async def sleep(self, seconds: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        entry = self.call_later(seconds, _wake, future)
+
+        try:
+            await future
+        finally:
+            # Canceled while sleeping
+            entry.cancel()
+
+    def call_later(
+        self,
+        delay: float,
+        callback: Callable[..., Any],
+        *args
+    ) -> TimerEntry:
+        return self.call_at(self.time() + delay, callback, *args)
+
+    def call_at(
+        self,
+        when: float,
+        callback: Callable[..., Any],
+        *args
+    ) -> TimerEntry:
+        """
+        Schedule `callback(*args)` to be called at `when` in the time of the clock
+        """
+
+        entry = TimerEntry(when, next(self._counter), callback, args, self)
+        heapq.heappush(self._heap, entry)
+
+        if self._heap[0] is entry:
+            # The new entry is the earliest one
+            self._arm()
+
+        return entry
+
+    def _on_cancel(self) -> None:
+        self._canceled += 1
+
+        heap = self._heap
+
+        # Compact the heap if most of the entries are canceled,
+        # so that the memory is bounded by the number of live entries.
+        # It is compacted in place, since `_fire()` might be popping
+        # from the same list while a callback cancels entries
+        if self._canceled > 64 and self._canceled * 2 > len(heap):
+            heap[:] = [entry for entry in heap if not entry.canceled]
+            heapq.heapify(heap)
+            self._canceled = 0
+
+    def _arm(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        heap = self._heap
+
+        # Drop canceled entries at the top
+        while heap and heap[0].canceled:
+            heapq.heappop(heap)
+            self._canceled -= 1
+
+        if not heap:
+            return
+
+        loop = asyncio.get_running_loop()
+
+        when = heap[0].when
+
+        # Convert the time of the clock to the time of the loop
+        self._handle = loop.call_at(
+            loop.time() + when - self.time(),
+            self._fire,
+            when
+        )
+
+    def _fire(self, when: float) -> None:
+        self._handle = None
+
+        heap = self._heap
+
+        # The loop timer might be fired a little bit earlier than `when`
+        # within the clock resolution of the loop
+        now = max(self.time(), when)
+
+        while heap and heap[0].when <= now:
+            entry = heapq.heappop(heap)
+
+            if entry.canceled:
+                self._canceled -= 1
+                continue
+
+            # Fired entries could not be canceled anymore
+            entry._timer = None
+            entry.canceled = True
+
+            try:
+                entry.callback(*entry.args)
+            except Exception as exception:
+                asyncio.get_running_loop().call_exception_handler({
+                    'message': 'Exception in callback of SharedTimer',
+                    'exception': exception
+                })
+
+        self._arm()
@@ -0,0 +1,72 @@
+"""
+Measures the cost of computing the next time of `schedule_naturally`
+with different delays, and of `schedule_cron` with sparse expressions
+
+Usage::
+
+    python -m benchmark.bench_schedule
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from aiodecorator.cron import CronScheduler
+from aiodecorator.schedule import (
+    get_time_to_wait,
+    DEFAULT_WEEKDAY
+)
+
+
+CALLS = 100000
+
+NOW = datetime(2025, 1, 1, 12, 34, 56, 789)
+
+CASES = [
+    ('secondly', timedelta(seconds=0)),
+    ('secondly', timedelta(minutes=1)),
+    ('secondly', timedelta(hours=1)),
+    ('secondly', timedelta(days=1)),
+    ('daily', timedelta(hours=23)),
+    ('weekly', timedelta(days=6)),
+    ('monthly', timedelta(days=27)),
+]
+
+CRON_CASES = [
+    '* * * * *',
+    '*/15 9-16 * * mon-fri',
+    '0 0 1 1 *',
+    '0 0 29 2 *',
+]
+
+
+def measure(unit, delay, calls: int = CALLS) -> float:
+    start = time.perf_counter()
+
+    for _ in range(calls):
+        get_time_to_wait(NOW, unit, DEFAULT_WEEKDAY, delay)
+
+    return (time.perf_counter() - start) / calls
+
+
+def measure_cron(expression: str, calls: int = CALLS) -> float:
+    scheduler = CronScheduler(expression)
+    start = time.perf_counter()
+
+    for _ in range(calls):
+        scheduler.next_time(NOW)
+
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    for unit, delay in CASES:
+        cost = measure(unit, delay)
+        print(f'{unit:>9}, delay={str(delay):>16}: {cost * 1e6:.3f} us/call')
+
+    for expression in CRON_CASES:
+        cost = measure_cron(expression)
+        print(f'{expression:>27}: {cost * 1e6:.3f} us/call')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Measures the per-call overhead of `throttle` for each throttle type
+
+Usage::
+
+    python -m benchmark.bench_throttle
+"""
+
+import time
+import asyncio
+
+from aiodecorator import throttle
+
+
+CALLS = 100000
+
+
+async def noop():
+    return None
+
+
+async def measure(fn, calls: int = CALLS) -> float:
+    start = time.perf_counter()
+
+    for _ in range(calls):
+        await fn()
+
+    return (time.perf_counter() - start) / calls
+
+
+async def main():
+    baseline = await measure(noop)
+    print(f'{"bare":>8}: {baseline * 1e6:.3f} us/call')
+
+    for throttle_type in ('ignore', 'wait', 'queue', 'replace'):
+        # Never exceed the limit, so that only the overhead is measured
+        throttled = throttle(CALLS * 10, 1, throttle_type)(noop)
+        cost = await measure(throttled)
+
+        print(
+            f'{throttle_type:>8}: {cost * 1e6:.3f} us/call, '
+            f'overhead {(cost - baseline) * 1e6:.3f} us'
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,425 @@
+"""
+Measures calls per second and the peak memory allocated per call of
+each decorator and of common stacks of decorators, and compares them
+with a stored baseline
+
+Usage::
+
+    python -m benchmark.suite
+    python -m benchmark.suite --filter throttle
+    python -m benchmark.suite --save benchmark/baseline.json
+    python -m benchmark.suite --compare benchmark/baseline.json
+
+In compare mode, the exit code is 1 if any case is slower than
+the baseline by more than `--threshold`
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional
+)
+
+from aiodecorator import (
+    throttle,
+    timeout,
+    repeat,
+    schedule_naturally,
+    retry,
+    circuit_breaker,
+    limit,
+    singleflight,
+    async_cache,
+    pipeline,
+    LoopClock,
+    Metrics
+)
+from aiodecorator.cron import CronScheduler
+from aiodecorator.schedule import (
+    get_time_to_wait,
+    DEFAULT_WEEKDAY
+)
+
+
+# The calls of each round, and each case is measured in the best of `ROUNDS`
+CALLS = 20000
+ROUNDS = 5
+
+# The calls to measure the allocation, which is much slower with tracemalloc
+ALLOC_CALLS = 200
+
+# The iterations of each call of the `repeat(-1)` stack
+STACK_ITERATIONS = 100
+
+NOW = datetime(2025, 1, 1, 12, 34, 56, 789)
+
+
+class InstantClock(LoopClock):
+    """
+    A clock which never sleeps, so that only the cost of scheduling
+    is measured
+    """
+
+    async def sleep(self, seconds: float) -> None:
+        pass
+
+
+INSTANT = InstantClock()
+
+
+class Case(NamedTuple):
+    name: str
+    # Creates the function to call, which is sync or async
+    make: Callable[[], Callable[[], Any]]
+    # The number of iterations of each call, such as `repeat(n)`
+    iterations: int = 1
+
+
+class Stop(Exception):
+    pass
+
+
+async def noop():
+    return None
+
+
+def unlimited(throttle_type: str, **kwargs) -> Callable[[], Any]:
+    # Never exceed the limit, so that only the overhead is measured
+    return throttle(10 ** 9, 1, throttle_type, **kwargs)(noop)
+
+
+def stack(decorators: List[Any], fused: bool) -> Callable[[Any], Any]:
+    if fused:
+        return pipeline(*decorators)
+
+    def decorator(fn):
+        for deco in reversed(decorators):
+            fn = deco(fn)
+        return fn
+
+    return decorator
+
+
+def repeat_stack(fused: bool = False) -> Callable[[], Any]:
+    """
+    `repeat(-1)` over `schedule_naturally` over `timeout`,
+    which is stopped after `STACK_ITERATIONS` iterations
+    """
+
+    count = 0
+
+    @stack([
+        repeat(-1, clock=INSTANT),
+        schedule_naturally('minutely', clock=INSTANT),
+        timeout(60)
+    ], fused)
+    async def job():
+        nonlocal count
+        count += 1
+
+        if count % STACK_ITERATIONS == 0:
+            raise Stop()
+
+    async def call():
+        try:
+            await job()
+        except Stop:
+            pass
+
+    return call
+
+
+def daily_stack(fused: bool = False) -> Callable[[], Any]:
+    """
+    The stack in the README, `repeat(10)` over `schedule_naturally('daily')`
+    over `repeat(10, 0.1)`, i.e. 100 iterations of each call
+    """
+
+    return stack([
+        repeat(10, clock=INSTANT),
+        schedule_naturally('daily', clock=INSTANT),
+        repeat(10, 0.1, clock=INSTANT)
+    ], fused)(noop)
+
+
+def cron() -> Callable[[], Any]:
+    scheduler = CronScheduler('*/15 9-16 * * mon-fri')
+    return lambda: scheduler.next_time(NOW)
+
+
+def cached() -> Callable[[], Any]:
+    fn = async_cache()(noop)
+    return fn
+
+
+CASES: List[Case] = [
+    Case('bare', lambda: noop),
+
+    Case('throttle:ignore', lambda: unlimited('ignore')),
+    Case('throttle:wait', lambda: unlimited('wait')),
+    Case('throttle:queue', lambda: unlimited('queue')),
+    Case('throttle:replace', lambda: unlimited('replace')),
+    Case(
+        'throttle:wait:token_bucket',
+        lambda: unlimited('wait', algorithm='token_bucket')
+    ),
+    Case(
+        'throttle:wait:sliding_window',
+        lambda: unlimited('wait', algorithm='sliding_window')
+    ),
+    Case(
+        'throttle:wait:keyed',
+        lambda: unlimited('wait', key=lambda: 'key')
+    ),
+    Case(
+        'throttle:wait:thread_safe',
+        lambda: unlimited('wait', thread_safe=True)
+    ),
+    Case(
+        'throttle:wait:sync',
+        lambda: throttle(10 ** 9, 1, 'wait', sync=True)(lambda: None)
+    ),
+    Case(
+        'throttle:wait:observed',
+        lambda: unlimited('wait', observer=Metrics())
+    ),
+
+    Case('timeout', lambda: timeout(60)(noop)),
+    Case('timeout:adaptive', lambda: timeout(percentile=0.99)(noop)),
+
+    Case('repeat(100)', lambda: repeat(100)(noop), 100),
+    Case(
+        'repeat(100):fixed_rate',
+        lambda: repeat(100, 1, clock=INSTANT, mode='fixed_rate')(noop),
+        100
+    ),
+
+    Case(
+        'schedule:next_time:secondly',
+        lambda: lambda: get_time_to_wait(
+            NOW, 'secondly', DEFAULT_WEEKDAY, timedelta(days=1)
+        )
+    ),
+    Case(
+        'schedule:next_time:monthly',
+        lambda: lambda: get_time_to_wait(
+            NOW, 'monthly', DEFAULT_WEEKDAY, timedelta(days=27)
+        )
+    ),
+    Case('schedule:next_time:cron', cron),
+
+    Case('retry', lambda: retry()(noop)),
+    Case('circuit_breaker', lambda: circuit_breaker()(noop)),
+    Case('limit', lambda: limit(10)(noop)),
+    Case('singleflight', lambda: singleflight()(noop)),
+    Case('async_cache:hit', cached),
+
+    Case(
+        'stack:throttle+timeout',
+        lambda: throttle(10 ** 9, 1, 'wait')(timeout(60)(noop))
+    ),
+    Case(
+        'stack:retry+circuit_breaker+timeout',
+        lambda: retry()(circuit_breaker()(timeout(60)(noop)))
+    ),
+    Case(
+        'stack:repeat+schedule_naturally+timeout',
+        repeat_stack,
+        STACK_ITERATIONS
+    ),
+    Case(
+        'pipeline:repeat+schedule_naturally+timeout',
+        lambda: repeat_stack(True),
+        STACK_ITERATIONS
+    ),
+    Case('stack:repeat+schedule_naturally+repeat', daily_stack, 100),
+    Case(
+        'pipeline:repeat+schedule_naturally+repeat',
+        lambda: daily_stack(True),
+        100
+    ),
+]
+
+
+async def measure_time(fn: Callable[[], Any], calls: int) -> float:
+    """
+    Returns the seconds of each call
+    """
+
+    is_async = asyncio.iscoroutinefunction(fn)
+    best = float('inf')
+
+    # Warm up
+    for _ in range(calls // 10):
+        if is_async:
+            await fn()
+        else:
+            fn()
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+
+        if is_async:
+            for _ in range(calls):
+                await fn()
+        else:
+            for _ in range(calls):
+                fn()
+
+        best = min(best, (time.perf_counter() - start) / calls)
+
+    return best
+
+
+async def measure_alloc(fn: Callable[[], Any], calls: int) -> float:
+    """
+    Returns the average peak bytes allocated during each call
+    """
+
+    is_async = asyncio.iscoroutinefunction(fn)
+    total = 0
+
+    tracemalloc.start()
+
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+
+            if is_async:
+                await fn()
+            else:
+                fn()
+
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - current
+    finally:
+        tracemalloc.stop()
+
+    return total / calls
+
+
+async def run(
+    cases: List[Case],
+    calls: int
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+
+    for case in cases:
+        fn = case.make()
+        iterations = case.iterations
+
+        # A call of `repeat(n)` has `n` iterations
+        seconds = await measure_time(fn, max(1, calls // iterations))
+        alloc = await measure_alloc(fn, max(1, ALLOC_CALLS // iterations))
+
+        results[case.name] = {
+            'us': seconds / iterations * 1e6,
+            'alloc': alloc / iterations
+        }
+
+    return results
+
+
+def report(
+    results: Dict[str, Dict[str, float]],
+    baseline: Optional[Dict[str, Dict[str, float]]],
+    threshold: float
+) -> List[str]:
+    """
+    Prints the results, and returns the names of regressed cases
+    """
+
+    regressions = []
+    width = max(len(name) for name in results)
+
+    header = f'{"case":<{width}}  {"us/call":>9}  {"calls/s":>11}  {"alloc B":>8}'
+    if baseline is not None:
+        header += f'  {"baseline":>9}  {"change":>8}'
+
+    print(header)
+
+    for name, result in results.items():
+        us = result['us']
+        line = (
+            f'{name:<{width}}  {us:>9.3f}  {1e6 / us:>11,.0f}  '
+            f'{result["alloc"]:>8.0f}'
+        )
+
+        if baseline is not None:
+            base = baseline.get(name)
+
+            if base is None:
+                line += f'  {"-":>9}  {"new":>8}'
+            else:
+                change = us / base['us'] - 1
+                line += f'  {base["us"]:>9.3f}  {change:>+8.1%}'
+
+                if change > threshold:
+                    line += '  REGRESSION'
+                    regressions.append(name)
+
+        print(line)
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Benchmark the per-call overhead of decorators'
+    )
+    parser.add_argument(
+        '--filter',
+        default='',
+        help='only run the cases whose names contain the string'
+    )
+    parser.add_argument(
+        '--calls',
+        type=int,
+        default=CALLS,
+        help='the number of calls of each round'
+    )
+    parser.add_argument('--save', help='save the results as the baseline')
+    parser.add_argument('--compare', help='compare with the baseline')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.2,
+        help='the ratio of slowdown to be considered as a regression'
+    )
+    args = parser.parse_args(argv)
+
+    cases = [case for case in CASES if args.filter in case.name]
+    results = asyncio.run(run(cases, args.calls))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if regressions:
+        print(f'\n{len(regressions)} regression(s): {", ".join(regressions)}')
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
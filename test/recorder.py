@@ -0,0 +1,84 @@
+import asyncio
+from typing import (
+    Any,
+    Callable,
+    Container,
+    List,
+    Sequence,
+    Set,
+    Union
+)
+
+
+def _index(index: int, args: tuple) -> Any:
+    return index
+
+
+class Recorder:
+    """
+    A coroutine function for tests which records its calls.
+
+    Args:
+        duration (float | Sequence[float] = 0.): the seconds each call takes, or the seconds the n-th call takes
+        fail (bool | Container[int] = False): whether each call fails with `ConnectionError`, or the indexes of the calls which fail
+        result (Callable[[int, tuple], Any]): returns the result of the n-th call from its index and args, defaults to the index
+
+    Usage::
+
+        fn = Recorder(1, fail={1})
+        wrapped = retry(1)(fn)
+
+        assert run(wrapped('a')) == 0
+        assert fn.calls == [('a',)]
+    """
+
+    # The positional args of each call in the order of starting
+    calls: List[tuple]
+    # The loop time at which each call starts
+    starts: List[float]
+    # The indexes of the calls which are canceled
+    canceled: Set[int]
+    active: int
+    max_active: int
+
+    def __init__(
+        self,
+        duration: Union[float, Sequence[float]] = 0.,
+        fail: Union[bool, Container[int]] = False,
+        result: Callable[[int, tuple], Any] = _index
+    ):
+        self._duration = duration
+        self._fail = fail
+        self._result = result
+
+        self.calls = []
+        self.starts = []
+        self.canceled = set()
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, *args, **kwargs) -> Any:
+        index = len(self.calls)
+        self.calls.append(args)
+        self.starts.append(asyncio.get_running_loop().time())
+
+        duration = self._duration
+        if not isinstance(duration, (int, float)):
+            duration = duration[index]
+
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+
+        try:
+            await asyncio.sleep(duration)
+        except asyncio.CancelledError:
+            self.canceled.add(index)
+            raise
+        finally:
+            self.active -= 1
+
+        fail = self._fail
+        if fail is True or (not isinstance(fail, bool) and index in fail):
+            raise ConnectionError(index)
+
+        return self._result(index, args)
@@ -0,0 +1,194 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from aiodecorator import throttle
+from aiodecorator.testing import run
+from aiodecorator.backend import (
+    MmapBackend,
+    RedisBackend,
+    ThrottleBackendError
+)
+
+
+# A large interval, so that the tests never cross the boundary of a window
+INTERVAL = 1e6
+
+
+def reserve_all(path: str) -> int:
+    backend = MmapBackend(path, slots=16)
+    granted = 0
+
+    async def main():
+        nonlocal granted
+
+        while True:
+            count, _ = await backend.reserve('key', 1, 100, INTERVAL)
+            if not count:
+                return
+
+            granted += count
+
+    asyncio.run(main())
+    backend.close()
+    return granted
+
+
+def test_mmap_backend_processes(tmp_path):
+    path = str(tmp_path / 'throttle')
+
+    with ProcessPoolExecutor(4) as executor:
+        results = list(executor.map(reserve_all, [path] * 4))
+
+    assert sum(results) == 100
+
+
+@pytest.mark.asyncio
+async def test_mmap_backend(tmp_path):
+    path = str(tmp_path / 'throttle')
+    a = MmapBackend(path, slots=2)
+    b = MmapBackend(path, slots=2)
+
+    assert (await a.reserve('x', 3, 5, INTERVAL))[0] == 3
+    assert (await b.reserve('x', 3, 5, INTERVAL))[0] == 2
+    assert (await a.reserve('x', 3, 5, INTERVAL))[0] == 0
+
+    # Another key
+    assert (await b.reserve('y', 3, 5, INTERVAL))[0] == 3
+
+    with pytest.raises(ThrottleBackendError):
+        await a.reserve('z', 1, 5, INTERVAL)
+
+    a.close()
+    b.close()
+
+
+async def start_redis_server(delays=()):
+    """
+    A stand-in Redis server which only supports `INCRBY` and `PEXPIRE`,
+    and sleeps `delays[n]` seconds before the reply of the n-th `INCRBY`
+    """
+
+    data = {}
+    delays = list(delays)
+
+    async def handle(reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+
+            args = []
+            for _ in range(int(line[1:])):
+                await reader.readline()
+                args.append((await reader.readline()).strip().decode())
+
+            command, name, value = args
+
+            if command == 'INCRBY':
+                if delays:
+                    await asyncio.sleep(delays.pop(0))
+
+                data[name] = data.get(name, 0) + int(value)
+                writer.write(f':{data[name]}\r\n'.encode())
+            elif command == 'PEXPIRE':
+                writer.write(b':1\r\n')
+            else:
+                writer.write(b'-ERR unknown command\r\n')
+
+        writer.close()
+
+    return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+
+@pytest.mark.asyncio
+async def test_redis_backend():
+    server = await start_redis_server()
+    port = server.sockets[0].getsockname()[1]
+
+    a = RedisBackend(port=port, batch=3)
+    b = RedisBackend(port=port, batch=3)
+
+    assert (await a.reserve('x', 3, 5, INTERVAL))[0] == 3
+    assert (await b.reserve('x', 3, 5, INTERVAL))[0] == 2
+    assert (await a.reserve('x', 3, 5, INTERVAL))[0] == 0
+
+    a.close()
+    b.close()
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_cancel():
+    server = await start_redis_server(delays=[0.2])
+    port = server.sockets[0].getsockname()[1]
+
+    backend = RedisBackend(port=port)
+
+    # Canceled before the replies are read
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.05):
+            await backend.reserve('k', 1, 1, INTERVAL)
+
+    await asyncio.sleep(0.3)
+
+    # The counter is still increased by the canceled reservation,
+    # and the stale replies are not read as the ones of this reservation
+    assert (await backend.reserve('k', 1, 1, INTERVAL))[0] == 0
+    assert (await backend.reserve('k', 1, 1, INTERVAL))[0] == 0
+
+    backend.close()
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_throttle_backend(tmp_path):
+    path = str(tmp_path / 'throttle')
+
+    async def call(tenant: str = ''):
+        return True
+
+    # Two workers sharing the same limit
+    workers = [
+        throttle(
+            10, INTERVAL,
+            backend=MmapBackend(path, batch=4),
+            key=lambda tenant: tenant,
+            name='call'
+        )(call)
+        for _ in range(2)
+    ]
+
+    results = await asyncio.gather(*[
+        worker(tenant)
+        for tenant in ('a', 'b')
+        for worker in workers
+        for _ in range(10)
+    ])
+
+    assert results.count(True) == 20
+
+    with pytest.raises(ValueError):
+        throttle(
+            10, 1,
+            backend=MmapBackend(path),
+            algorithm='token_bucket'
+        )(call)
+
+
+def test_throttle_backend_wait(tmp_path):
+    def clock():
+        return asyncio.get_running_loop().time()
+
+    backend = MmapBackend(str(tmp_path / 'throttle'), batch=2, clock=clock)
+
+    @throttle(2, 10, 'wait', backend=backend)
+    async def throttled():
+        return clock()
+
+    async def main():
+        return await asyncio.gather(*[throttled() for _ in range(5)])
+
+    # Each window grants 2 permits
+    assert run(main()) == [0, 0, 10, 10, 20]
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from aiodecorator import (
+    batch,
+    throttle
+)
+from aiodecorator.testing import run
+
+from .recorder import Recorder
+
+
+def bulk(fail: bool = False) -> Recorder:
+    # Each call takes a batch of items, and returns them multiplied by 10
+    return Recorder(
+        fail=fail,
+        result=lambda index, args: [item * 10 for item in args[0]]
+    )
+
+
+def test_batch():
+    fn = bulk()
+    batched = batch(3)(fn)
+
+    async def main():
+        return await asyncio.gather(*[batched(i) for i in range(7)])
+
+    assert run(main()) == [i * 10 for i in range(7)]
+    assert [items for items, in fn.calls] == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_batch_max_wait():
+    fn = bulk()
+    batched = batch(100, 1)(fn)
+
+    async def main():
+        first = asyncio.create_task(batched(1))
+        await asyncio.sleep(0.5)
+        second = asyncio.create_task(batched(2))
+        await asyncio.sleep(1)
+        third = asyncio.create_task(batched(3))
+        return await asyncio.gather(first, second, third)
+
+    assert run(main()) == [10, 20, 30]
+    assert fn.starts == [1, 2.5]
+    assert fn.calls == [([1, 2],), ([3],)]
+
+
+def test_batch_exception():
+    fn = bulk(fail=True)
+    batched = batch(2)(fn)
+
+    async def main():
+        return await asyncio.gather(
+            batched(1), batched(2), return_exceptions=True
+        )
+
+    assert all(isinstance(r, ConnectionError) for r in run(main()))
+
+
+def test_batch_wrong_results():
+    async def fn(items):
+        return items[:1]
+
+    batched = batch(2)(fn)
+
+    async def main():
+        return await asyncio.gather(
+            batched(1), batched(2), return_exceptions=True
+        )
+
+    assert all(isinstance(r, ValueError) for r in run(main()))
+
+
+def test_batch_canceled_caller():
+    fn = bulk()
+    batched = batch(10, 1)(fn)
+
+    async def main():
+        first = asyncio.create_task(batched(1))
+        second = asyncio.create_task(batched(2))
+        await asyncio.sleep(0.5)
+        first.cancel()
+        return await second
+
+    assert run(main()) == 20
+    assert [items for items, in fn.calls] == [[2]]
+
+
+def test_batch_throttle():
+    fn = bulk()
+    batched = batch(5)(throttle(1, 1, 'wait')(fn))
+
+    async def main():
+        return await asyncio.gather(*[batched(i) for i in range(10)])
+
+    assert run(main()) == [i * 10 for i in range(10)]
+
+    # The rate limit applies to batches
+    assert fn.starts == [0, 1]
+
+
+def test_batch_invalid():
+    with pytest.raises(ValueError):
+        batch(0)
@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from aiodecorator import async_cache
+from aiodecorator.testing import run
+
+from .recorder import Recorder
+
+
+def loader(duration: float = 1., fail: bool = False) -> Recorder:
+    # Returns the args and the version, which is the number of loads
+    return Recorder(
+        duration,
+        fail,
+        lambda index, args: (args, index + 1)
+    )
+
+
+def test_cache():
+    fn = loader()
+    cached = async_cache()(fn)
+
+    async def main():
+        first = await cached(1)
+        second = await cached(1)
+        other = await cached(2)
+        return first, second, other
+
+    assert run(main()) == (((1,), 1), ((1,), 1), ((2,), 2))
+    assert cached.cache_info() == (1, 0, 2, 0, 10000, 2)
+
+    cached.cache_clear()
+    assert cached.cache_info() == (0, 0, 0, 0, 10000, 0)
+
+
+def test_cache_lru():
+    fn = loader(0)
+    cached = async_cache(max_size=2)(fn)
+
+    async def main():
+        for args in [1, 2, 1, 3, 1, 2]:
+            await cached(args)
+
+    run(main())
+
+    # 2 is evicted by 3, and then 3 by 2
+    assert fn.calls == [(1,), (2,), (3,), (2,)]
+    info = cached.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.size) == (2, 4, 2, 2)
+
+
+def test_cache_ttl():
+    fn = loader()
+    cached = async_cache(ttl=10)(fn)
+
+    async def main():
+        await cached(1)
+        await asyncio.sleep(5)
+        await cached(1)
+        await asyncio.sleep(5)
+        return await cached(1)
+
+    assert run(main()) == ((1,), 2)
+    assert len(fn.calls) == 2
+
+
+def test_cache_stale_while_revalidate():
+    fn = loader()
+    cached = async_cache(ttl=10, stale_ttl=100)(fn)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        await cached(1)
+        await asyncio.sleep(20)
+
+        # Stale, but returned immediately
+        start = loop.time()
+        stale = await cached(1)
+        assert loop.time() == start
+
+        # The background refresh is in flight
+        also_stale = await cached(1)
+        await asyncio.sleep(2)
+        fresh = await cached(1)
+
+        # Too stale to be returned
+        await asyncio.sleep(200)
+        reloaded = await cached(1)
+
+        return stale, also_stale, fresh, reloaded
+
+    assert run(main()) == (((1,), 1), ((1,), 1), ((1,), 2), ((1,), 3))
+    assert cached.cache_info().stale_hits == 2
+
+
+def test_cache_single_flight():
+    fn = loader()
+    cached = async_cache()(fn)
+
+    async def main():
+        return await asyncio.gather(*[cached(1) for _ in range(10)])
+
+    assert run(main()) == [((1,), 1)] * 10
+    assert len(fn.calls) == 1
+    assert cached.cache_info().misses == 10
+
+
+def test_cache_exception():
+    fn = loader(fail=True)
+    cached = async_cache()(fn)
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await cached(1)
+
+    run(main())
+
+    assert len(fn.calls) == 2
+    assert cached.cache_info().size == 0
+
+
+def test_cache_canceled_caller():
+    fn = loader()
+    cached = async_cache()(fn)
+
+    async def main():
+        task = asyncio.create_task(cached(1))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        await asyncio.sleep(1)
+
+        # Still cached
+        return await cached(1)
+
+    assert run(main()) == ((1,), 1)
+    assert len(fn.calls) == 1
+
+
+def test_cache_clear_in_flight():
+    fn = loader()
+    cached = async_cache()(fn)
+
+    async def main():
+        task = asyncio.create_task(cached(1))
+        await asyncio.sleep(0.5)
+        cached.cache_clear()
+
+        # Not put back by the load in flight since before
+        old = await task
+        return old, await cached(1), await cached(1)
+
+    assert run(main()) == (((1,), 1), ((1,), 2), ((1,), 2))
+    assert len(fn.calls) == 2
+    assert cached.cache_info().size == 1
+
+
+def test_cache_clear_in_refresh():
+    fn = loader()
+    cached = async_cache(ttl=10, stale_ttl=100)(fn)
+
+    async def main():
+        await cached(1)
+        await asyncio.sleep(20)
+
+        stale = await cached(1)
+        cached.cache_clear()
+        await asyncio.sleep(2)
+
+        return stale, await cached(1)
+
+    assert run(main()) == (((1,), 1), ((1,), 3))
+    assert cached.cache_info().stale_hits == 0
+
+
+def test_cache_invalid():
+    with pytest.raises(ValueError):
+        async_cache(max_size=0)
@@ -0,0 +1,304 @@
+import asyncio
+
+import pytest
+
+from aiodecorator import (
+    circuit_breaker,
+    CircuitOpenError,
+    timeout
+)
+from aiodecorator.circuit_breaker import CircuitBreaker
+from aiodecorator.testing import run
+
+from .recorder import Recorder
+
+
+async def outcomes(fn, times: int, *args):
+    results = []
+
+    for _ in range(times):
+        try:
+            results.append(await fn(*args))
+        except CircuitOpenError:
+            results.append('open')
+        except Exception as e:
+            results.append(type(e).__name__)
+
+    return results
+
+
+def test_opens_on_failure_rate():
+    fn = Recorder(fail=True)
+    wrapped = circuit_breaker(min_calls=3, recovery=10)(fn)
+
+    results = run(outcomes(wrapped, 5))
+
+    assert results == ['ConnectionError'] * 3 + ['open'] * 2
+    assert len(fn.calls) == 3
+
+
+def test_min_calls():
+    fn = Recorder(fail=True)
+    wrapped = circuit_breaker(min_calls=10)(fn)
+
+    results = run(outcomes(wrapped, 5))
+
+    assert results == ['ConnectionError'] * 5
+
+
+def record(breaker: CircuitBreaker, now: float, outcome: int) -> None:
+    breaker.after_call(now, outcome, breaker.before_call(now))
+
+
+def test_half_open():
+    breaker = CircuitBreaker(0.5, None, 10, 10, 2, 5, 1)
+
+    record(breaker, 0, 1)
+    record(breaker, 0, 1)
+    assert breaker.state == 'open'
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(4)
+
+    probe = breaker.before_call(5)
+    assert breaker.state == 'half_open'
+
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(5)
+
+    # The probe fails, open again
+    breaker.after_call(6, 1, probe)
+    assert breaker.state == 'open'
+    assert breaker.opened_at == 6
+
+    record(breaker, 11, 0)
+    assert breaker.state == 'closed'
+    assert breaker.calls == 0
+
+
+def test_call_admitted_before_open():
+    breaker = CircuitBreaker(0.5, None, 10, 10, 2, 5, 1)
+
+    slow = breaker.before_call(0)
+    record(breaker, 0, 1)
+    record(breaker, 0, 1)
+    probe = breaker.before_call(5)
+
+    # Not a probe, so it neither closes the circuit
+    # nor gives back the slot of the probe
+    breaker.after_call(6, 0, slow)
+    assert breaker.state == 'half_open'
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(6)
+
+    # Nor opens it again
+    breaker.after_call(6, 1, slow)
+    assert breaker.state == 'half_open'
+
+    breaker.after_call(7, 0, probe)
+    assert breaker.state == 'closed'
+
+
+def test_slow_call_finishes_in_half_open():
+    async def fn(duration: float, fail: bool):
+        await asyncio.sleep(duration)
+
+        if fail:
+            raise ConnectionError('failed')
+
+        return 'ok'
+
+    wrapped = circuit_breaker(min_calls=2, recovery=5)(fn)
+
+    async def main():
+        # Admitted while the circuit is closed, and succeeds at 60
+        slow = asyncio.create_task(wrapped(60, False))
+        await asyncio.sleep(0)
+
+        await outcomes(wrapped, 2, 0, True)
+        await asyncio.sleep(5)
+
+        # The probe is in flight until 100
+        probe = asyncio.create_task(wrapped(95, False))
+        await asyncio.sleep(60)
+
+        assert await slow == 'ok'
+
+        # Still half open with the probe in flight
+        results = await outcomes(wrapped, 5, 0, False)
+        assert await probe == 'ok'
+
+        return results + await outcomes(wrapped, 1, 0, False)
+
+    assert run(main()) == ['open'] * 5 + ['ok']
+
+
+def test_recover():
+    state = {'fail': True}
+
+    async def fn():
+        if state['fail']:
+            raise ConnectionError('failed')
+        return 'ok'
+
+    wrapped = circuit_breaker(min_calls=2, recovery=5)(fn)
+
+    async def main():
+        assert await outcomes(wrapped, 3) == [
+            'ConnectionError', 'ConnectionError', 'open'
+        ]
+
+        state['fail'] = False
+        await asyncio.sleep(5)
+
+        return await outcomes(wrapped, 3)
+
+    assert run(main()) == ['ok'] * 3
+
+
+def test_rolling_window():
+    fn = Recorder(fail=True)
+    wrapped = circuit_breaker(min_calls=3, window=10, buckets=10)(fn)
+
+    async def main():
+        results = []
+
+        # Failures spread wider than the window never open the circuit
+        for _ in range(6):
+            results += await outcomes(wrapped, 1)
+            await asyncio.sleep(5)
+
+        return results
+
+    assert run(main()) == ['ConnectionError'] * 6
+
+
+def test_window_expires_after_idle():
+    breaker = CircuitBreaker(0.5, None, 10, 10, 3, 5, 1)
+
+    record(breaker, 0, 1)
+    record(breaker, 0.5, 1)
+    assert breaker.calls == 2
+
+    # Long after the window
+    record(breaker, 1000, 0)
+    assert (breaker.calls, breaker.failures) == (1, 0)
+
+
+def test_timeout_rate():
+    fn = Recorder(2)
+    wrapped = circuit_breaker(
+        failure_rate=1,
+        timeout_rate=0.5,
+        min_calls=2,
+        timeout=1
+    )(fn)
+
+    assert run(outcomes(wrapped, 3)) == ['TimeoutError'] * 2 + ['open']
+
+
+def test_stacked_timeout():
+    fn = Recorder(2)
+    wrapped = circuit_breaker(min_calls=2)(timeout(1)(fn))
+
+    assert run(outcomes(wrapped, 3)) == ['TimeoutError'] * 2 + ['open']
+
+
+def test_outer_timeout():
+    fn = Recorder(2)
+    wrapped = timeout(1)(circuit_breaker(min_calls=2)(fn))
+
+    # Canceled by the outer timeout, which is also a timeout
+    assert run(outcomes(wrapped, 3)) == ['TimeoutError'] * 2 + ['open']
+
+
+def test_canceled_probe_not_counted():
+    state = {'sleep': 0.}
+
+    async def fn():
+        await asyncio.sleep(state['sleep'])
+        raise ConnectionError('failed')
+
+    wrapped = circuit_breaker(min_calls=2, recovery=5)(fn)
+
+    async def main():
+        await outcomes(wrapped, 2)
+        await asyncio.sleep(5)
+
+        # The probe is canceled by the caller
+        state['sleep'] = 2
+        task = asyncio.create_task(wrapped())
+        await asyncio.sleep(1)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # Still half open, so the next probe is allowed,
+        # and the circuit opens again once it fails
+        state['sleep'] = 0
+        return await outcomes(wrapped, 3)
+
+    assert run(main()) == ['ConnectionError', 'open', 'open']
+
+
+def test_canceled_probe():
+    breaker = CircuitBreaker(0.5, None, 10, 10, 2, 5, 1)
+    record(breaker, 0, 1)
+    record(breaker, 0, 1)
+
+    breaker.cancel_call(breaker.before_call(5))
+
+    # The probe is given back, but the circuit is not closed
+    assert breaker.state == 'half_open'
+    breaker.before_call(5)
+
+
+def test_canceled_probe_by_timeout():
+    state = {'sleep': 0.}
+
+    async def fn():
+        await asyncio.sleep(state['sleep'])
+        raise ConnectionError('failed')
+
+    wrapped = circuit_breaker(min_calls=2, recovery=5)(fn)
+    timed = timeout(1)(wrapped)
+
+    async def main():
+        await outcomes(wrapped, 2)
+        await asyncio.sleep(5)
+
+        state['sleep'] = 2
+
+        # The probe times out, so the circuit opens again
+        return await outcomes(timed, 2)
+
+    assert run(main()) == ['TimeoutError', 'open']
+
+
+def test_exceptions():
+    fn = Recorder(fail=True)
+    wrapped = circuit_breaker(min_calls=2, exceptions=ValueError)(fn)
+
+    assert run(outcomes(wrapped, 4)) == ['ConnectionError'] * 4
+
+
+def test_key():
+    async def fn(host):
+        if host == 'bad':
+            raise ConnectionError('failed')
+        return host
+
+    wrapped = circuit_breaker(min_calls=2, key=lambda host: host)(fn)
+
+    async def main():
+        bad = await outcomes(wrapped, 3, 'bad')
+        good = await outcomes(wrapped, 3, 'good')
+        return bad, good
+
+    assert run(main()) == (
+        ['ConnectionError'] * 2 + ['open'],
+        ['good'] * 3
+    )
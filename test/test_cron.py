@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+
+from aiodecorator import (
+    schedule_cron,
+    repeat
+)
+from aiodecorator.cron import CronScheduler
+from aiodecorator.testing import (
+    run,
+    VirtualClock
+)
+
+
+def test_cron_next_time():
+    cases = [
+        # Every 15 minutes on weekdays between 09:00 and 17:00
+        (
+            '*/15 9-16 * * mon-fri',
+            # Friday
+            datetime(2025, 1, 3, 16, 50),
+            # Monday
+            datetime(2025, 1, 6, 9, 0)
+        ),
+        (
+            '*/15 9-16 * * mon-fri',
+            datetime(2025, 1, 6, 9, 0),
+            datetime(2025, 1, 6, 9, 15)
+        ),
+        (
+            '@hourly',
+            datetime(2025, 1, 1, 23, 59, 59),
+            datetime(2025, 1, 2, 0, 0)
+        ),
+        (
+            '0 0 29 2 *',
+            datetime(2025, 3, 1),
+            datetime(2028, 2, 29)
+        ),
+        (
+            '30 2 31 * *',
+            datetime(2025, 1, 31, 3, 0),
+            datetime(2025, 3, 31, 2, 30)
+        ),
+        (
+            # Either the 13th or a friday
+            '0 0 13 * 5',
+            datetime(2025, 6, 1),
+            datetime(2025, 6, 6)
+        ),
+        (
+            # 7 is also sunday
+            '0 0 * * 7',
+            datetime(2025, 1, 1),
+            datetime(2025, 1, 5)
+        ),
+        (
+            '59 23 31 dec *',
+            datetime(2025, 12, 31, 23, 59),
+            datetime(2026, 12, 31, 23, 59)
+        ),
+    ]
+
+    for index, (expression, now, expected) in enumerate(cases):
+        assert CronScheduler(expression).next_time(now) == expected, \
+            f'Case {index} failed'
+
+
+def test_cron_invalid():
+    for expression in [
+        '* * * *',
+        '60 * * * *',
+        '* * 0 * *',
+        '*/0 * * * *',
+        '5-1 * * * *',
+        'x * * * *'
+    ]:
+        with pytest.raises(ValueError):
+            CronScheduler(expression)
+
+    with pytest.raises(ValueError):
+        CronScheduler('0 0 30 2 *').next_time(datetime(2025, 1, 1))
+
+
+def test_schedule_cron():
+    clock = VirtualClock(datetime(2025, 1, 3, 16, 20))
+    times = []
+
+    @repeat(4)
+    @schedule_cron('*/15 9-16 * * mon-fri', clock=clock)
+    async def test():
+        times.append(clock.now())
+
+    run(test())
+
+    assert times == [
+        datetime(2025, 1, 3, 16, 30),
+        datetime(2025, 1, 3, 16, 45),
+        datetime(2025, 1, 6, 9, 0),
+        datetime(2025, 1, 6, 9, 15),
+    ]
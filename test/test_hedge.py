@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from aiodecorator import (
+    hedge,
+    RetryBudget
+)
+from aiodecorator.testing import run
+
+from .recorder import Recorder
+
+
+async def timed(coro):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    result = await coro
+    return result, loop.time() - start
+
+
+def test_hedge():
+    fn = Recorder([10, 0.5, 0.5])
+
+    result, elapsed = run(timed(hedge(2, delay=1)(fn)()))
+
+    # The second call wins
+    assert result == 1
+    assert elapsed == 1.5
+    assert fn.starts == [0, 1]
+    assert fn.canceled == {0}
+
+
+def test_hedge_fast():
+    fn = Recorder([0.5])
+
+    assert run(hedge(2, delay=1)(fn)()) == 0
+    assert len(fn.calls) == 1
+
+
+def test_hedge_staggered():
+    fn = Recorder([10, 10, 1])
+
+    result, elapsed = run(timed(hedge(2, delay=1)(fn)()))
+
+    assert result == 2
+    assert elapsed == 3
+    assert fn.starts == [0, 1, 2]
+    assert fn.canceled == {0, 1}
+
+
+def test_hedge_failure():
+    fn = Recorder([2, 1], {1})
+
+    # The hedge fails, and the first call wins
+    assert run(hedge(1, delay=1)(fn)()) == 0
+
+    fn = Recorder([2, 1], {0, 1})
+
+    with pytest.raises(ConnectionError):
+        run(hedge(1, delay=1)(fn)())
+
+
+def test_hedge_budget():
+    fn = Recorder([10, 1, 1])
+
+    async def main():
+        budget = RetryBudget(1, 100)
+        hedged = hedge(1, delay=1, budget=budget)(fn)
+
+        first = await timed(hedged())
+        # The budget is exhausted, no more hedging
+        second = await timed(hedged())
+        return first, second
+
+    assert run(main()) == ((1, 2), (2, 1))
+
+
+def test_hedge_percentile():
+    fn = Recorder([0.1, 0.3] * 10 + [10, 0.5])
+
+    async def main():
+        hedged = hedge(1, percentile=0.5)(fn)
+
+        # Not hedged before warmed up
+        for _ in range(20):
+            await hedged()
+
+        return await timed(hedged())
+
+    result, elapsed = run(main())
+
+    # Hedged after about the median of 0.1 and 0.3
+    assert result == 21
+    assert 0.6 < elapsed < 0.8
+    assert len(fn.calls) == 22
+
+
+def test_hedge_invalid():
+    with pytest.raises(ValueError):
+        hedge(1)
+
+    with pytest.raises(ValueError):
+        hedge(-1, delay=1)
+
+
+def test_hedge_after_failure():
+    fn = Recorder([10, 0.5, 1], {1})
+
+    result, elapsed = run(timed(hedge(2, delay=1)(fn)()))
+
+    # The failed hedge does not put off the next one
+    assert result == 2
+    assert elapsed == 3
+    assert fn.starts == [0, 1, 2]
+
+
+def test_hedge_percentile_canceled_primary():
+    # The first calls are always slow, and the hedges are fast
+    fn = Recorder([10, 0.1] * 21)
+
+    async def main():
+        hedged = hedge(1, delay=1, percentile=0.5)(fn)
+
+        for _ in range(20):
+            await hedged()
+
+        return await timed(hedged())
+
+    result, elapsed = run(main())
+
+    # The canceled first calls ran for 1.1 seconds, which is the delay,
+    # rather than the 0.1 seconds of the winning hedges
+    assert result == 41
+    assert elapsed == pytest.approx(1.2)
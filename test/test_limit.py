@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from aiodecorator import (
+    limit,
+    LimitQueueFullError,
+    LimitQueueTimeoutError
+)
+from aiodecorator.limit import Limiter
+from aiodecorator.testing import run
+
+from .recorder import Recorder
+
+
+def tracked() -> Recorder:
+    # Each call takes 1 second, and returns its args
+    return Recorder(1, result=lambda index, args: args)
+
+
+async def gather(fn, calls):
+    tasks = []
+
+    for args in calls:
+        tasks.append(asyncio.create_task(fn(*args)))
+        # Make sure the calls are queued in order
+        await asyncio.sleep(0)
+
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_limit():
+    fn = tracked()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        await gather(limit(2)(fn), [(i,) for i in range(5)])
+        return loop.time()
+
+    assert run(main()) == 3
+    assert fn.max_active == 2
+    assert fn.calls == [(i,) for i in range(5)]
+
+
+def test_limit_fair():
+    fn = tracked()
+    limited = limit(1, key=lambda tenant, index: tenant)(fn)
+
+    calls = [('noisy', i) for i in range(4)] + [('quiet', 0), ('other', 0)]
+    run(gather(limited, calls))
+
+    assert fn.calls == [
+        ('noisy', 0),
+        ('noisy', 1),
+        ('quiet', 0),
+        ('other', 0),
+        ('noisy', 2),
+        ('noisy', 3)
+    ]
+
+
+def test_limit_weight():
+    fn = tracked()
+    limited = limit(
+        1,
+        key=lambda tenant, index: tenant,
+        weight=lambda tenant: 2 if tenant == 'a' else 1
+    )(fn)
+
+    calls = [('a', i) for i in range(5)] + [('b', i) for i in range(3)]
+    run(gather(limited, calls))
+
+    assert [tenant for tenant, _ in fn.calls] == list('aaabaabb')
+
+
+def test_limit_priority():
+    fn = tracked()
+    limited = limit(1, priority=lambda index: -index)(fn)
+
+    run(gather(limited, [(i,) for i in range(5)]))
+
+    # The first one starts without waiting
+    assert fn.calls == [(0,), (4,), (3,), (2,), (1,)]
+
+
+def test_limit_max_queue():
+    fn = tracked()
+    limited = limit(1, max_queue=2)(fn)
+
+    results = run(gather(limited, [(i,) for i in range(5)]))
+
+    assert results[:3] == [(0,), (1,), (2,)]
+    assert all(isinstance(r, LimitQueueFullError) for r in results[3:])
+
+
+def test_limit_max_wait():
+    fn = tracked()
+    limited = limit(1, max_wait=1.5)(fn)
+
+    results = run(gather(limited, [(i,) for i in range(4)]))
+
+    assert results[:2] == [(0,), (1,)]
+    assert all(isinstance(r, LimitQueueTimeoutError) for r in results[2:])
+    assert fn.calls == [(0,), (1,)]
+
+
+def test_limit_cancel_waiter():
+    fn = tracked()
+    limited = limit(1)(fn)
+
+    async def main():
+        first = asyncio.create_task(limited(0))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(limited(1))
+        third = asyncio.create_task(limited(2))
+        await asyncio.sleep(0.5)
+
+        second.cancel()
+        await asyncio.gather(first, third, return_exceptions=True)
+
+    run(main())
+
+    assert fn.calls == [(0,), (2,)]
+
+
+def test_limiter_cancel_after_grant():
+    async def main():
+        limiter = Limiter(1)
+        await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        # Granted, but canceled before it resumes
+        limiter.release()
+        waiter.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert (limiter.active, limiter.waiting) == (0, 0)
+
+    run(main())
+
+
+def test_limit_invalid():
+    with pytest.raises(ValueError):
+        limit(0)
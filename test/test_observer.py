@@ -0,0 +1,182 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from aiodecorator import (
+    throttle,
+    timeout,
+    repeat,
+    schedule_naturally,
+    schedule_cron,
+    Metrics
+)
+from aiodecorator.observer import Histogram
+from aiodecorator.testing import run, VirtualClock
+
+
+def test_histogram():
+    histogram = Histogram((1, 2, 4))
+
+    assert histogram.quantile(0.5) is None
+
+    for value in [0.5, 1.5, 1.5, 3, 10]:
+        histogram.add(value)
+
+    assert histogram.buckets == [1, 2, 1, 1]
+    assert histogram.quantile(0.5) == 2
+    assert histogram.quantile(0.1) == 1
+    assert histogram.quantile(0.99) == 10
+
+    snapshot = histogram.snapshot()
+    assert (snapshot['count'], snapshot['sum']) == (5, 16.5)
+    assert (snapshot['min'], snapshot['max']) == (0.5, 10)
+    assert snapshot['buckets'][-1] == (float('inf'), 1)
+
+
+def test_metrics_snapshot_reset():
+    metrics = Metrics()
+    metrics.count('a')
+    metrics.count('a', 2)
+    metrics.observe('b', 0.1)
+
+    snapshot = metrics.snapshot(reset=True)
+
+    assert snapshot['counters'] == {'a': 3}
+    assert snapshot['histograms']['b']['count'] == 1
+    assert metrics.snapshot() == {'counters': {}, 'histograms': {}}
+
+
+async def call_many(fn, times: int):
+    return await asyncio.gather(*[fn() for _ in range(times)])
+
+
+def test_throttle_ignore():
+    metrics = Metrics()
+
+    @throttle(2, 1, observer=metrics)
+    async def fn():
+        await asyncio.sleep(0.5)
+
+    run(call_many(fn, 5))
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {
+        'throttle.calls': 2,
+        'throttle.ignored': 3
+    }
+    assert snapshot['histograms']['throttle.exec']['sum'] == 1
+
+
+def test_throttle_wait():
+    metrics = Metrics()
+
+    @throttle(1, 1, 'wait', observer=metrics)
+    async def fn():
+        pass
+
+    run(call_many(fn, 3))
+
+    wait = metrics.snapshot()['histograms']['throttle.wait']
+    assert (wait['count'], wait['sum'], wait['max']) == (3, 3, 2)
+
+
+def test_throttle_queue_overflow():
+    metrics = Metrics()
+
+    @throttle(1, 1, 'queue', max_pending=1, overflow='drop', observer=metrics)
+    async def fn():
+        pass
+
+    run(call_many(fn, 3))
+
+    assert metrics.snapshot()['counters'] == {
+        'throttle.calls': 2,
+        'throttle.dropped': 1
+    }
+
+
+def test_throttle_replace():
+    metrics = Metrics()
+
+    @throttle(1, 1, 'replace', observer=metrics)
+    async def fn():
+        await asyncio.sleep(10)
+
+    async def main():
+        first = asyncio.create_task(fn())
+        await asyncio.sleep(0)
+        await fn()
+        return await first
+
+    run(main())
+
+    assert metrics.snapshot()['counters'] == {
+        'throttle.calls': 2,
+        'throttle.replaced': 1
+    }
+
+
+def test_timeout():
+    metrics = Metrics()
+
+    @timeout(1, observer=metrics)
+    async def fn(seconds):
+        await asyncio.sleep(seconds)
+
+    async def main():
+        await fn(0.5)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await fn(2)
+
+    run(main())
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'timeout.calls': 2, 'timeout.timeouts': 1}
+    assert snapshot['histograms']['timeout.exec']['sum'] == 1.5
+
+
+def test_repeat():
+    metrics = Metrics()
+    durations = iter([0.5, 2.5, 0.5, 0.5])
+
+    @repeat(4, 1, mode='fixed_rate', observer=metrics)
+    async def fn():
+        await asyncio.sleep(next(durations))
+
+    run(fn())
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {
+        'repeat.iterations': 4,
+        'repeat.overruns': 1,
+        'repeat.skipped': 2
+    }
+    assert snapshot['histograms']['repeat.wait']['count'] == 3
+
+
+def test_schedule():
+    metrics = Metrics()
+    clock = VirtualClock(datetime(2025, 1, 1, 12, 0, 30))
+
+    @schedule_naturally('minutely', clock=clock, observer=metrics)
+    async def natural():
+        pass
+
+    @schedule_cron('*/5 * * * *', clock=clock, observer=metrics)
+    async def cron():
+        pass
+
+    async def main():
+        await natural()
+        await cron()
+
+    run(main())
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'schedule.runs': 2}
+
+    wait = snapshot['histograms']['schedule.wait']
+    assert (wait['count'], wait['sum']) == (2, 30 + 240)
+    assert snapshot['histograms']['schedule.lateness']['max'] == 0
@@ -0,0 +1,231 @@
+import asyncio
+import threading
+
+import pytest
+
+from aiodecorator import (
+    offload,
+    timeout,
+    OffloadQueueFullError
+)
+from aiodecorator.offload import (
+    get_pool,
+    Pool
+)
+
+
+def square(x):
+    return x * x
+
+
+# Decorated without `@`, so that `square` could be pickled by name
+square_in_process = offload('process', max_workers=1)(square)
+
+
+def gated():
+    """
+    Returns a blocking function which waits for the gate to open,
+    and records its args in the order of starting
+    """
+
+    gate = threading.Event()
+    started = []
+
+    def fn(x):
+        started.append(x)
+        gate.wait(5)
+        return x
+
+    return fn, gate, started
+
+
+async def wait_started(started, count):
+    while len(started) < count:
+        await asyncio.sleep(0.001)
+
+
+def test_offload():
+    calling_thread = threading.get_ident()
+
+    @offload()
+    def fn(x):
+        return x, threading.get_ident()
+
+    async def main():
+        return await fn(1)
+
+    result, thread = asyncio.run(main())
+
+    assert result == 1
+    assert thread != calling_thread
+
+
+def test_offload_process():
+    async def main():
+        return await asyncio.gather(*[square_in_process(i) for i in range(3)])
+
+    assert asyncio.run(main()) == [0, 1, 4]
+
+
+def test_shared_pool():
+    # The pool is shared by functions with the same config
+    assert get_pool('thread', 2) is get_pool('thread', 2)
+    assert get_pool('thread', 2) is not get_pool('thread', 3)
+    assert get_pool('thread', 2) is not get_pool('process', 2)
+
+    fn, gate, started = gated()
+    a = offload(max_workers=2)(fn)
+    b = offload(max_workers=2)(fn)
+
+    async def main():
+        tasks = [
+            asyncio.create_task(a(1)),
+            asyncio.create_task(b(2)),
+            asyncio.create_task(b(3))
+        ]
+
+        await wait_started(started, 2)
+        await asyncio.sleep(0.01)
+
+        # Only 2 workers for both functions
+        assert started == [1, 2]
+
+        gate.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(main()) == [1, 2, 3]
+    assert started == [1, 2, 3]
+
+
+def test_max_queue_reject():
+    fn, gate, started = gated()
+    fn = offload(max_workers=1, max_queue=1, overflow='reject')(fn)
+
+    async def main():
+        running = asyncio.create_task(fn(1))
+        await wait_started(started, 1)
+
+        queued = asyncio.create_task(fn(2))
+        await asyncio.sleep(0)
+
+        with pytest.raises(OffloadQueueFullError):
+            await fn(3)
+
+        gate.set()
+        return await asyncio.gather(running, queued)
+
+    assert asyncio.run(main()) == [1, 2]
+    assert started == [1, 2]
+
+
+def test_max_queue_wait():
+    fn, gate, started = gated()
+    fn = offload(max_workers=1, max_queue=1)(fn)
+
+    async def main():
+        running = asyncio.create_task(fn(1))
+        await wait_started(started, 1)
+
+        tasks = [asyncio.create_task(fn(i)) for i in (2, 3, 4)]
+        await asyncio.sleep(0.01)
+
+        # The callers are held back rather than rejected
+        assert all(not task.done() for task in tasks)
+
+        gate.set()
+        return await asyncio.gather(running, *tasks)
+
+    assert asyncio.run(main()) == [1, 2, 3, 4]
+    assert started == [1, 2, 3, 4]
+
+
+def test_timeout_drops_queued():
+    fn, gate, started = gated()
+    pooled = offload(max_workers=1)(fn)
+    expiring = timeout(0.05)(pooled)
+
+    async def main():
+        running = asyncio.create_task(pooled(1))
+        await wait_started(started, 1)
+
+        # Expires while waiting for the worker
+        with pytest.raises(TimeoutError):
+            await expiring(2)
+
+        gate.set()
+        return await asyncio.gather(running, pooled(3))
+
+    assert asyncio.run(main()) == [1, 3]
+    # The expired call never started
+    assert started == [1, 3]
+
+
+def test_canceled_running_keeps_worker():
+    fn, gate, started = gated()
+    fn = offload(max_workers=1)(fn)
+
+    async def main():
+        running = asyncio.create_task(fn(1))
+        await wait_started(started, 1)
+
+        running.cancel()
+        await asyncio.sleep(0)
+
+        # The worker is still busy, so the next call waits for it
+        task = asyncio.create_task(fn(2))
+        await asyncio.sleep(0.01)
+        assert started == [1]
+
+        gate.set()
+        return await task
+
+    assert asyncio.run(main()) == 2
+    assert started == [1, 2]
+
+
+def test_slot_outlives_loop():
+    fn, gate, started = gated()
+    pooled = offload(max_workers=1)(fn)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(timeout(0.05)(pooled)(1))
+
+    # The loop is closed while the worker is still busy
+    gate.set()
+
+    async def main():
+        return await asyncio.wait_for(pooled(2), 5)
+
+    assert asyncio.run(main()) == 2
+    assert started == [1, 2]
+
+
+def test_submit_error_releases_slot():
+    shared = Pool('thread', 1)
+    shared.executor.shutdown()
+
+    async def main():
+        await shared.slots.acquire()
+
+        with pytest.raises(RuntimeError):
+            shared.submit(square, (1,), {})
+
+    asyncio.run(main())
+    assert shared.slots.active == 0
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        offload('fiber')
+
+    with pytest.raises(ValueError):
+        offload(max_workers=0)
+
+    with pytest.raises(ValueError):
+        offload(overflow='drop')
+
+    with pytest.raises(ValueError):
+        offload(max_queue=0)
+
+    # No queue at all
+    offload(max_queue=0, overflow='reject')
@@ -0,0 +1,198 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from aiodecorator import (
+    pipeline,
+    repeat,
+    schedule_naturally,
+    schedule_cron,
+    timeout,
+    retry,
+    Metrics
+)
+from aiodecorator.testing import run, VirtualClock
+
+
+START = datetime(2025, 1, 1, 12, 30)
+
+
+def stacked_and_fused(make_decorators, make_fn):
+    """
+    Runs the function with the decorators stacked and pipelined,
+    and returns `(result or exception, records)` of both
+    """
+
+    outcomes = []
+
+    for fused in (False, True):
+        clock = VirtualClock(START)
+        records = []
+        decorators = make_decorators(clock)
+        fn = make_fn(clock, records)
+
+        if fused:
+            fn = pipeline(*decorators)(fn)
+        else:
+            for decorator in reversed(decorators):
+                fn = decorator(fn)
+
+        async def main():
+            try:
+                return await fn(1, b=2)
+            except Exception as e:
+                return type(e)
+
+        outcomes.append((run(main()), records))
+
+    return outcomes
+
+
+def recorder(duration: float = 0.):
+    def make(clock, records):
+        async def fn(a, b):
+            records.append((clock.now(), a, b))
+            await asyncio.sleep(duration)
+            return len(records)
+
+        return fn
+
+    return make
+
+
+def test_pipeline():
+    stacked, fused = stacked_and_fused(
+        lambda clock: [
+            repeat(7, clock=clock),
+            schedule_naturally('daily', clock=clock),
+            repeat(3, 0.1, clock=clock)
+        ],
+        recorder()
+    )
+
+    assert fused == stacked
+
+    result, records = fused
+    assert result == 21
+    assert len(records) == 21
+    assert records[3][0] == datetime(2025, 1, 3)
+
+
+def test_pipeline_fixed_rate_and_cron():
+    stacked, fused = stacked_and_fused(
+        lambda clock: [
+            repeat(2, clock=clock),
+            schedule_cron('*/15 * * * *', clock=clock),
+            repeat(3, 1, clock=clock, mode='fixed_rate')
+        ],
+        recorder(1.5)
+    )
+
+    assert fused == stacked
+    assert fused[0] == 6
+
+
+@pytest.mark.parametrize('seconds', [1, 5])
+def test_pipeline_timeout(seconds):
+    stacked, fused = stacked_and_fused(
+        lambda clock: [
+            timeout(10),
+            repeat(3, 1, clock=clock),
+            timeout(seconds)
+        ],
+        recorder(2)
+    )
+
+    assert fused == stacked
+
+
+def test_pipeline_outer_timeout():
+    stacked, fused = stacked_and_fused(
+        lambda clock: [
+            timeout(5),
+            repeat(3, 1, clock=clock),
+            timeout(10)
+        ],
+        recorder(1)
+    )
+
+    # The outer timeout fires in the third iteration
+    assert fused == stacked
+    assert fused[0] is TimeoutError
+    assert len(fused[1]) == 3
+
+
+def test_pipeline_not_fused():
+    failures = 0
+
+    async def fn():
+        nonlocal failures
+        failures += 1
+
+        if failures % 2:
+            raise ValueError()
+
+        return failures
+
+    # `retry` is stacked between the fused stages
+    fn = pipeline(
+        repeat(2),
+        timeout(1),
+        retry(3, base=0),
+        repeat(1, concurrency=2)
+    )(fn)
+
+    assert run(fn()) == 4
+    assert failures == 4
+
+
+def test_pipeline_observer():
+    results = []
+
+    for fused in (False, True):
+        metrics = Metrics()
+        decorators = [
+            repeat(2, 1, observer=metrics),
+            schedule_naturally(
+                'hourly', clock=VirtualClock(START), observer=metrics
+            ),
+            repeat(3, 1, observer=metrics)
+        ]
+
+        async def fn():
+            pass
+
+        if fused:
+            fn = pipeline(*decorators)(fn)
+        else:
+            for decorator in reversed(decorators):
+                fn = decorator(fn)
+
+        run(fn())
+        results.append(metrics.snapshot())
+
+    assert results[0] == results[1]
+    assert results[1]['counters']['repeat.iterations'] == 8
+
+
+def test_pipeline_cancel():
+    canceled = []
+
+    async def fn():
+        await asyncio.sleep(10)
+
+    async def main():
+        task = asyncio.create_task(
+            pipeline(repeat(3, 1, mode='fixed_rate'), timeout(100))(fn)()
+        )
+        await asyncio.sleep(5)
+        task.cancel()
+
+        try:
+            await task
+        except asyncio.CancelledError:
+            canceled.append(True)
+
+    run(main())
+    assert canceled == [True]
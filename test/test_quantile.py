@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from aiodecorator.quantile import P2Quantile
+
+
+def exact(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+@pytest.mark.parametrize('p', [0.5, 0.9, 0.99])
+def test_p2_uniform(p):
+    rng = random.Random(42)
+    sketch = P2Quantile(p)
+    values = [rng.random() for _ in range(20000)]
+
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.count == 20000
+    assert sketch.value == pytest.approx(exact(values, p), abs=0.01)
+
+
+def test_p2_long_tail():
+    rng = random.Random(1)
+    sketch = P2Quantile(0.95)
+    values = [rng.expovariate(10) for _ in range(20000)]
+
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.value == pytest.approx(exact(values, 0.95), rel=0.05)
+
+
+def test_p2_few_samples():
+    sketch = P2Quantile(0.5)
+    assert sketch.value is None
+
+    for value in [3, 1, 2]:
+        sketch.add(value)
+
+    assert sketch.value == 2
+
+
+def test_p2_invalid():
+    with pytest.raises(ValueError):
+        P2Quantile(1)
@@ -2,9 +2,11 @@ import pytest
 import asyncio
 
 from aiodecorator import (
-    repeat, REPEAT_INFINITY,
+    repeat, REPEAT_INFINITY, repeat_iter,
     schedule_naturally
 )
+from aiodecorator.repeat import ticks
+from aiodecorator.testing import run
 
 
 @pytest.mark.asyncio
@@ -111,3 +113,251 @@ async def test_schedule_natually():
         await task
 
     assert count == 3
+
+
+def run_fixed_rate(on_overrun, durations, times=None):
+    """
+    Returns the start times of iterations, which take `durations` seconds
+    """
+
+    starts = []
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        origin = loop.time()
+
+        @repeat(
+            times or len(durations), 1,
+            mode='fixed_rate',
+            on_overrun=on_overrun
+        )
+        async def test():
+            starts.append(loop.time() - origin)
+            await asyncio.sleep(durations[len(starts) - 1])
+
+        await test()
+        return loop.time() - origin
+
+    return starts, run(main())
+
+
+def test_repeat_fixed_rate():
+    starts, total = run_fixed_rate('skip', [0.5] * 5)
+
+    # No drift
+    assert starts == [0, 1, 2, 3, 4]
+
+    # No wait after the last iteration
+    assert total == 4.5
+
+
+def test_repeat_fixed_rate_overrun():
+    durations = [0.5, 2.5, 0.5, 0.5, 0.5]
+
+    assert run_fixed_rate('skip', durations)[0] == [0, 1, 4, 5, 6]
+    assert run_fixed_rate('catch_up', durations)[0] == [0, 1, 3.5, 4, 4.5]
+    assert run_fixed_rate('queue', durations)[0] == [0, 1, 3.5, 4.5, 5.5]
+
+
+def test_ticks_interval_function():
+    asked = []
+
+    def get_interval(index):
+        asked.append(index)
+        return index + 1
+
+    async def main(times, interval):
+        loop = asyncio.get_running_loop()
+        return [loop.time() async for _ in ticks(times, interval)]
+
+    # Not asked after the last iteration
+    assert run(main(3, get_interval)) == [0, 1, 3]
+    assert asked == [0, 1]
+
+    # Stops once it returns `None`
+    assert run(main(REPEAT_INFINITY, lambda index: None)) == [0]
+
+
+def test_repeat_invalid_mode():
+    with pytest.raises(ValueError):
+        repeat(1, mode='unknown')
+
+
+def test_repeat_concurrency():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def main():
+        loop = asyncio.get_running_loop()
+
+        @repeat(100, concurrency=10)
+        async def test():
+            nonlocal in_flight, max_in_flight
+
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(1)
+            in_flight -= 1
+
+            return loop.time()
+
+        return await test()
+
+    # 100 calls of 1 second each in 10 seconds
+    assert run(main()) == 10
+    assert max_in_flight == 10
+
+
+def test_repeat_concurrency_on_schedule():
+    async def main():
+        loop = asyncio.get_running_loop()
+        starts = []
+
+        @repeat(4, 1, concurrency=4, aggregate='all')
+        async def test():
+            starts.append(loop.time())
+            # Slower than the interval
+            await asyncio.sleep(10 - len(starts))
+            return len(starts)
+
+        results = [result async for result in test()]
+
+        return starts, results
+
+    starts, results = run(main())
+
+    # Started on schedule even though the previous ones are still running
+    assert starts == [0, 1, 2, 3]
+
+    # In the order of completion
+    assert results == [4, 4, 4, 4]
+
+
+def test_repeat_aggregate():
+    async def main():
+        count = 0
+
+        @repeat(5, concurrency=2, aggregate=lambda total, n: total + n, initial=0)
+        async def reduced():
+            nonlocal count
+            count += 1
+            return count
+
+        @repeat(3, aggregate='all')
+        async def all_results():
+            return 1
+
+        @repeat(5, concurrency=3)
+        async def last(*args):
+            # The last call completes first
+            delay = 5 - len(args[0])
+            args[0].append(None)
+            await asyncio.sleep(delay)
+            return len(args[0])
+
+        return (
+            await reduced(),
+            [result async for result in all_results()],
+            await last([])
+        )
+
+    assert run(main()) == (15, [1, 1, 1], 5)
+
+
+def test_repeat_concurrency_error():
+    started = 0
+    canceled = 0
+
+    async def main():
+        @repeat(REPEAT_INFINITY, concurrency=3)
+        async def test():
+            nonlocal started, canceled
+            started += 1
+
+            if started == 3:
+                raise ValueError('boom')
+
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                canceled += 1
+                raise
+
+        with pytest.raises(ValueError):
+            await test()
+
+    run(main())
+
+    assert started == 3
+    assert canceled == 2
+
+    with pytest.raises(ValueError):
+        repeat(1, concurrency=0)
+
+
+def test_repeat_iter_lazy():
+    count = 0
+
+    async def main():
+        @repeat_iter(REPEAT_INFINITY)
+        async def test():
+            nonlocal count
+            count += 1
+            return count
+
+        results = []
+
+        async for result in test():
+            results.append(result)
+
+            if result == 3:
+                break
+
+        return results
+
+    assert run(main()) == [1, 2, 3]
+
+    # No call ahead of the consumer
+    assert count == 3
+
+
+def test_repeat_iter_buffer():
+    count = 0
+
+    async def main():
+        @repeat_iter(REPEAT_INFINITY, buffer=2)
+        async def test():
+            nonlocal count
+            count += 1
+            return count
+
+        iterator = test()
+
+        assert await anext(iterator) == 1
+
+        # Let the producer run ahead
+        await asyncio.sleep(1)
+
+        # The one being yielded, and 2 in the buffer, and 1 blocked
+        assert count == 4
+        assert await anext(iterator) == 2
+
+        await iterator.aclose()
+
+    run(main())
+
+
+def test_repeat_iter_error():
+    async def main():
+        @repeat_iter(3, buffer=1)
+        async def test():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            async for _ in test():
+                pass
+
+    run(main())
+
+    with pytest.raises(ValueError):
+        repeat_iter(1, buffer=-1)
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from aiodecorator import (
+    retry,
+    RetryBudget,
+    REPEAT_INFINITY
+)
+from aiodecorator.retry import Backoff
+from aiodecorator.testing import run
+
+
+def flaky(failures: int, exception: type = ConnectionError):
+    """
+    Returns a function which fails `failures` times before it succeeds,
+    and the times when it is called
+    """
+
+    times = []
+
+    async def fn():
+        times.append(asyncio.get_running_loop().time())
+
+        if len(times) <= failures:
+            raise exception('failed')
+
+        return len(times)
+
+    return fn, times
+
+
+def test_retry():
+    fn, times = flaky(2)
+
+    assert run(retry(3, backoff='constant', base=1)(fn)()) == 3
+    assert times == [0, 1, 2]
+
+
+def test_retry_give_up():
+    fn, times = flaky(5)
+
+    with pytest.raises(ConnectionError):
+        run(retry(3, backoff='exponential', jitter=False)(fn)())
+
+    assert times == pytest.approx([0, 0.1, 0.3])
+
+
+def test_retry_exceptions():
+    fn, times = flaky(1, ValueError)
+
+    with pytest.raises(ValueError):
+        run(retry(3, exceptions=ConnectionError)(fn)())
+
+    assert len(times) == 1
+
+
+def test_retry_deadline():
+    fn, times = flaky(100)
+
+    with pytest.raises(ConnectionError):
+        run(retry(
+            REPEAT_INFINITY,
+            backoff='constant',
+            base=1,
+            deadline=5
+        )(fn)())
+
+    assert times == [0, 1, 2, 3, 4, 5]
+
+
+def test_retry_budget():
+    budget = RetryBudget(2, 60)
+
+    async def main():
+        calls = []
+
+        @retry(10, backoff='constant', base=1, budget=budget)
+        async def fn(index: int):
+            calls.append(index)
+            raise ConnectionError('failed')
+
+        results = await asyncio.gather(
+            fn(0), fn(1), fn(2),
+            return_exceptions=True
+        )
+
+        return calls, results
+
+    calls, results = run(main())
+
+    # 3 first attempts, and only 2 retries in total
+    assert sorted(calls) == [0, 0, 1, 1, 2]
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_backoff():
+    exponential = Backoff('exponential', 1, 5, True)
+
+    for attempt in range(10):
+        assert 0 <= exponential.delay(attempt) <= min(5, 2 ** attempt)
+
+    decorrelated = Backoff('decorrelated', 1, 5, True)
+    previous = 1
+
+    for attempt in range(10):
+        delay = decorrelated.delay(attempt)
+        assert 1 <= delay <= min(5, previous * 3)
+        previous = delay
+
+    with pytest.raises(ValueError):
+        retry(0)
@@ -1,7 +1,8 @@
 import pytest
 from datetime import datetime, timedelta
 
-from aiodecorator import schedule_naturally
+from aiodecorator import schedule_naturally, repeat
+from aiodecorator.testing import run, VirtualClock
 from aiodecorator.schedule import (
     get_time_to_wait,
     DEFAULT_WEEKDAY,
@@ -127,6 +128,28 @@ def test_get_time_to_wait():
             ZERO_TIMEDELTA,
             timedelta(days=9)
         ),
+        (
+            datetime(2025, 11, 22, 0, 0, 0),
+            'monthly',
+            DEFAULT_WEEKDAY,
+            ZERO_TIMEDELTA,
+            timedelta(days=9)
+        ),
+        (
+            datetime(2025, 12, 22, 0, 0, 0),
+            'monthly',
+            DEFAULT_WEEKDAY,
+            timedelta(days=1),
+            timedelta(days=11)
+        ),
+        (
+            datetime(2025, 1, 1, 0, 0, 0, 50),
+            'secondly',
+            DEFAULT_WEEKDAY,
+            # A large delay costs the same
+            timedelta(hours=1, microseconds=100),
+            timedelta(microseconds=50)
+        ),
         (
             datetime(2025, 9, 22, 0, 0, 0),
             'yearly',
@@ -143,3 +166,21 @@ def test_get_time_to_wait():
             now, unit, weekday, delay
         ) == expected, f'Case {index} failed'
         index += 1
+
+
+def test_schedule_naturally_virtual_time():
+    clock = VirtualClock(datetime(2025, 1, 1, 0, 30))
+    times = []
+
+    @repeat(3)
+    @schedule_naturally('hourly', delay=timedelta(minutes=5), clock=clock)
+    async def test():
+        times.append(clock.now())
+
+    run(test())
+
+    assert times == [
+        datetime(2025, 1, 1, 1, 5),
+        datetime(2025, 1, 1, 2, 5),
+        datetime(2025, 1, 1, 3, 5),
+    ]
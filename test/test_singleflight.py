@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from aiodecorator import (
+    singleflight,
+    timeout
+)
+from aiodecorator.testing import run
+
+from .recorder import Recorder
+
+
+def counted(duration: float = 1., fail: bool = False) -> Recorder:
+    # Returns the number of calls so far
+    return Recorder(duration, fail, lambda index, args: index + 1)
+
+
+def test_singleflight():
+    fn = counted()
+    coalesced = singleflight()(fn)
+
+    async def main():
+        results = await asyncio.gather(
+            *[coalesced(1) for _ in range(100)],
+            coalesced(2),
+            coalesced(2, extra=True)
+        )
+
+        # A new call after the flight lands
+        return results, await coalesced(1)
+
+    results, after = run(main())
+
+    assert results == [1] * 100 + [2, 3]
+    assert after == 4
+    assert fn.calls == [(1,), (2,), (2,), (1,)]
+
+
+def test_singleflight_key():
+    fn = counted()
+    coalesced = singleflight(key=lambda user, request_id: user)(fn)
+
+    async def main():
+        return await asyncio.gather(coalesced('a', 1), coalesced('a', 2))
+
+    assert run(main()) == [1, 1]
+    assert fn.calls == [('a', 1)]
+
+
+def test_singleflight_exception():
+    fn = counted(fail=True)
+    coalesced = singleflight()(fn)
+
+    async def main():
+        return await asyncio.gather(
+            coalesced(1), coalesced(1), return_exceptions=True
+        )
+
+    results = run(main())
+
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert len(fn.calls) == 1
+
+
+def test_singleflight_cancel_one():
+    fn = counted()
+    coalesced = singleflight()(fn)
+
+    async def main():
+        first = asyncio.create_task(coalesced(1))
+        second = asyncio.create_task(coalesced(1))
+        await asyncio.sleep(0.5)
+
+        first.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        return await second
+
+    assert run(main()) == 1
+    assert fn.calls == [(1,)]
+
+
+def test_singleflight_cancel_all():
+    fn = counted()
+    coalesced = singleflight()(fn)
+
+    async def main():
+        tasks = [asyncio.create_task(coalesced(1)) for _ in range(2)]
+        await asyncio.sleep(0.5)
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Not joined to the canceled flight
+        return await coalesced(1)
+
+    assert run(main()) == 2
+    assert fn.calls == [(1,), (1,)]
+    assert fn.canceled == {0}
+
+
+def test_singleflight_timeout():
+    fn = counted(2)
+    coalesced = singleflight()(fn)
+
+    async def main():
+        return await asyncio.gather(
+            timeout(1)(coalesced)(1),
+            coalesced(1),
+            return_exceptions=True
+        )
+
+    impatient, patient = run(main())
+
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert patient == 1
+    assert fn.calls == [(1,)]
@@ -0,0 +1,66 @@
+import pytest
+
+from aiodecorator.store import KeyedStore
+
+
+def test_keyed_store_lru():
+    store = KeyedStore(lambda key: [], max_size=2)
+
+    a = store.get('a', 0)
+    store.get('b', 0)
+
+    # 'a' becomes the most recently used one
+    assert store.get('a', 1) is a
+
+    store.get('c', 2)
+
+    assert len(store) == 2
+    assert 'a' in store
+    assert 'b' not in store
+
+
+def test_keyed_store_ttl():
+    store = KeyedStore(lambda key: [], ttl=10)
+
+    a = store.get('a', 0)
+    store.get('b', 5)
+
+    assert store.get('a', 9) is a
+
+    # 'b' has been idle for 10 seconds
+    store.get('c', 15)
+
+    assert 'b' not in store
+    assert 'a' in store
+
+    assert store.get('a', 30) is not a
+    assert len(store) == 1
+
+
+def test_keyed_store_ttl_busy():
+    # A value is busy until the time it holds
+    store = KeyedStore(
+        lambda key: [0],
+        ttl=10,
+        busy=lambda value, now: value[0] > now
+    )
+
+    a = store.get('a', 0)
+    a[0] = 25
+
+    # Idle for 10 seconds, but still busy
+    assert store.get('b', 10) is not a
+    assert 'a' in store
+
+    # Checked again after another 10 seconds
+    assert store.get('b', 19) is not a
+    assert store.get('b', 20) is not a
+    assert 'a' in store
+
+    store.get('b', 30)
+    assert 'a' not in store
+
+
+def test_keyed_store_invalid_max_size():
+    with pytest.raises(ValueError):
+        KeyedStore(lambda key: [], max_size=0)
@@ -0,0 +1,34 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from aiodecorator.testing import (
+    run,
+    VirtualClock
+)
+
+
+def test_virtual_time():
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        await asyncio.sleep(3600)
+        await asyncio.gather(
+            asyncio.sleep(10),
+            asyncio.sleep(20)
+        )
+
+        return loop.time() - start
+
+    assert run(main()) == 3620
+
+
+def test_virtual_clock():
+    clock = VirtualClock(datetime(2025, 1, 1))
+
+    async def main():
+        assert clock.now() == datetime(2025, 1, 1)
+        await clock.sleep(86400)
+        return clock.now()
+
+    assert run(main()) == datetime(2025, 1, 1) + timedelta(days=1)
@@ -1,9 +1,19 @@
 import time
 import asyncio
+import threading
 import pytest
 
 from aiodecorator import (
-    throttle
+    throttle,
+    ThrottleQueueFullError
+)
+from aiodecorator.testing import run
+from aiodecorator.throttle import (
+    TokenBucketThrottler,
+    SlidingLogThrottler,
+    SlidingWindowThrottler,
+    create_throttler,
+    THREAD_SAFE_THROTTLERS
 )
 
 
@@ -160,3 +170,392 @@ async def test_throttle_replace_with_external_cancel():
 
     assert result == expected
     assert errors_list == expected_errors
+
+
+@pytest.mark.asyncio
+async def test_throttle_key():
+    @throttle(2, 1, 'ignore', key=lambda tenant, index: tenant)
+    async def throttled(tenant: str, index: int):
+        return index
+
+    tasks = [
+        throttled(tenant, index)
+        for tenant in ('a', 'b')
+        for index in range(4)
+    ]
+
+    result = await asyncio.gather(*tasks)
+
+    assert result == [0, 1, None, None, 0, 1, None, None]
+
+
+@pytest.mark.asyncio
+async def test_throttle_key_max_keys():
+    @throttle(1, 10, 'ignore', key=lambda tenant: tenant, max_keys=1)
+    async def throttled(tenant: str):
+        return tenant
+
+    assert await throttled('a') == 'a'
+    assert await throttled('a') is None
+
+    # 'a' is evicted by 'b', so its budget is reset
+    assert await throttled('b') == 'b'
+    assert await throttled('a') == 'a'
+
+
+@pytest.mark.parametrize('throttle_type', ['wait', 'queue'])
+@pytest.mark.parametrize('algorithm', [
+    'fixed',
+    'token_bucket',
+    'sliding_log',
+    'sliding_window'
+])
+def test_throttle_key_ttl_booked(throttle_type, algorithm):
+    async def main():
+        loop = asyncio.get_running_loop()
+
+        @throttle(
+            1, 10, throttle_type,
+            key=lambda tenant: tenant,
+            key_ttl=10,
+            algorithm=algorithm
+        )
+        async def throttled(tenant: str):
+            return loop.time()
+
+        tasks = [
+            asyncio.create_task(throttled(tenant))
+            for tenant in ('a', 'a', 'a')
+        ]
+
+        # 'a' is idle for `key_ttl`, but has booked slots ahead
+        await asyncio.sleep(10)
+        await throttled('b')
+        tasks.append(asyncio.create_task(throttled('a')))
+
+        return await asyncio.gather(*tasks)
+
+    times = run(main())
+
+    # The new call of 'a' is still throttled by the booked slots
+    assert all(
+        later - earlier >= 10
+        for earlier, later in zip(times, times[1:])
+    )
+
+
+def test_throttle_invalid_key_ttl():
+    with pytest.raises(ValueError):
+        throttle(1, 10, key=lambda tenant: tenant, key_ttl=5)
+
+
+@pytest.mark.asyncio
+async def test_throttle_queue():
+    @throttle(5, 1, 'queue')
+    async def throttled(index: int, now: float):
+        return index, format(time.time() - now, '.0f')
+
+    now = time.time()
+
+    tasks = [
+        asyncio.create_task(throttled(index, now))
+        for index in range(15)
+    ]
+
+    result = await asyncio.gather(*tasks)
+
+    assert result == [
+        (index, str(index // 5))
+        for index in range(15)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_throttle_queue_max_pending():
+    @throttle(1, 0.1, 'queue', max_pending=2)
+    async def throttled(index: int):
+        return index
+
+    tasks = [
+        asyncio.create_task(throttled(index))
+        for index in range(5)
+    ]
+
+    result = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert result[:3] == [0, 1, 2]
+    assert all(
+        isinstance(error, ThrottleQueueFullError)
+        for error in result[3:]
+    )
+
+    @throttle(1, 0.1, 'queue', max_pending=1, overflow='drop')
+    async def dropped(index: int):
+        return index
+
+    assert await asyncio.gather(
+        *[dropped(index) for index in range(3)]
+    ) == [0, 1, None]
+
+
+@pytest.mark.asyncio
+async def test_throttle_queue_cancel_waiter():
+    @throttle(1, 0.1, 'queue')
+    async def throttled(index: int):
+        return index
+
+    tasks = [
+        asyncio.create_task(throttled(index))
+        for index in range(3)
+    ]
+
+    await asyncio.sleep(0)
+    tasks[1].cancel()
+
+    result = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert result[0] == 0
+    assert isinstance(result[1], asyncio.CancelledError)
+    assert result[2] == 2
+
+
+def test_throttle_virtual_time():
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        @throttle(10, 60, 'wait')
+        async def throttled():
+            return loop.time() - start
+
+        return await asyncio.gather(*[throttled() for _ in range(30)])
+
+    # Half an hour of throttling runs in no time
+    assert run(main()) == [
+        float(i // 10 * 60)
+        for i in range(30)
+    ]
+
+
+def test_token_bucket_throttler():
+    throttler = TokenBucketThrottler(10, 1, burst=5)
+
+    assert [throttler.try_acquire(0) for _ in range(6)] == [True] * 5 + [False]
+
+    # 1 token per 0.1 second
+    assert throttler.try_acquire(0.1)
+    assert not throttler.try_acquire(0.1)
+
+    # Borrow tokens from the future
+    assert throttler.acquire(0.1) == pytest.approx(0.1)
+    assert throttler.acquire(0.1) == pytest.approx(0.2)
+
+    # Never exceeds the burst
+    assert [throttler.try_acquire(100) for _ in range(6)] == [True] * 5 + [False]
+
+
+def test_sliding_log_throttler():
+    throttler = SlidingLogThrottler(2, 1)
+
+    assert throttler.try_acquire(0.9)
+    assert throttler.try_acquire(0.9)
+
+    # No double burst across the boundary of a window
+    assert not throttler.try_acquire(1.1)
+    assert throttler.try_acquire(1.9)
+
+    assert throttler.acquire(1.9) == pytest.approx(0)
+    assert throttler.acquire(1.9) == pytest.approx(1)
+
+
+def test_sliding_window_throttler():
+    throttler = SlidingWindowThrottler(4, 1)
+
+    assert [throttler.try_acquire(0.5) for _ in range(5)] == [True] * 4 + [False]
+
+    # The weighted count is 4 * 0.75 = 3
+    assert throttler.try_acquire(1.25)
+    assert not throttler.try_acquire(1.25)
+
+    # The weighted count is 4 * 0.5 + 1 = 3
+    assert throttler.try_acquire(1.5)
+    assert not throttler.try_acquire(1.5)
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 10])
+def test_sliding_window_throttler_steady_rate(limit):
+    throttler = SlidingWindowThrottler(limit, 1)
+
+    # All calls arrive at once, and wait for their slots
+    times = [throttler.acquire(0) for _ in range(limit * 20)]
+
+    assert times == sorted(times)
+
+    # About `limit` calls in every interval in the long run
+    assert len([t for t in times if 10 <= t < 20]) == pytest.approx(
+        limit * 10, abs=1
+    )
+
+    if limit == 1:
+        assert times[:3] == [0, 1, 2]
+
+
+def test_create_throttler_unknown():
+    with pytest.raises(ValueError):
+        create_throttler('unknown', 1, 1)
+
+
+@pytest.mark.parametrize('algorithm', [
+    'token_bucket',
+    'sliding_log',
+    'sliding_window'
+])
+def test_throttle_algorithm_rate(algorithm):
+    async def main():
+        loop = asyncio.get_running_loop()
+
+        @throttle(5, 1, 'wait', algorithm=algorithm)
+        async def throttled():
+            return loop.time()
+
+        return await asyncio.gather(*[throttled() for _ in range(50)])
+
+    times = run(main())
+
+    assert times == sorted(times)
+    assert times[-1] < 15
+
+    # No more than `limit` calls in any `interval`,
+    # allowing the approximation of the sliding window
+    for index in range(len(times) - 10):
+        assert times[index + 10] - times[index] >= 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('throttle_type', ['ignore', 'wait', 'queue'])
+async def test_throttle_runs_in_caller_task(throttle_type):
+    @throttle(1, 1, throttle_type)
+    async def throttled():
+        return asyncio.current_task()
+
+    assert await throttled() is asyncio.current_task()
+
+
+def test_throttle_sync_ignore():
+    @throttle(2, 10, sync=True)
+    def throttled(index: int):
+        return index
+
+    assert [throttled(index) for index in range(4)] == [0, 1, None, None]
+
+
+def test_throttle_sync_wait():
+    @throttle(2, 0.1, 'wait', sync=True)
+    def throttled():
+        return time.monotonic()
+
+    times = [throttled() for _ in range(4)]
+
+    assert times[3] - times[0] >= 0.09
+
+
+def test_throttle_sync_replace():
+    with pytest.raises(ValueError):
+        @throttle(2, 1, 'replace', sync=True)
+        def throttled():
+            pass
+
+
+class AsyncCallable:
+    """
+    Not a coroutine function, but returns an awaitable
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return asyncio.sleep(0, self.calls)
+
+
+@pytest.mark.parametrize('throttle_type', ['wait', 'queue', 'replace'])
+def test_throttle_awaitable_callable(throttle_type):
+    throttled = throttle(1, 1, throttle_type)(AsyncCallable())
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(asyncio.get_running_loop().time())
+            await asyncio.sleep(0.5)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        results = [await throttled() for _ in range(3)]
+        task.cancel()
+        return results
+
+    assert run(main()) == [1, 2, 3]
+
+    if throttle_type != 'replace':
+        # The event loop is not blocked while waiting
+        assert len(ticks) >= 4
+
+
+@pytest.mark.parametrize('algorithm', list(THREAD_SAFE_THROTTLERS))
+def test_thread_safe_throttler(algorithm):
+    throttler = create_throttler(algorithm, 1000, 1000, thread_safe=True)
+    assert type(throttler).__name__.startswith('ThreadSafe')
+
+    granted = []
+
+    def worker():
+        count = 0
+        for _ in range(1000):
+            if throttler.try_acquire(time.monotonic()):
+                count += 1
+        granted.append(count)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    # Exactly `limit` calls in the window without lost updates
+    assert sum(granted) == 1000
+
+
+def test_throttle_thread_safe_shared_budget():
+    budget = throttle(10, 100, thread_safe=True)
+    results = []
+
+    @budget
+    def sync_call():
+        return 'sync'
+
+    @budget
+    async def async_call():
+        return 'async'
+
+    async def main():
+        loop = asyncio.get_running_loop()
+
+        # Sync calls in threads, without a round trip through the loop
+        sync_results = await asyncio.gather(*[
+            loop.run_in_executor(None, sync_call) for _ in range(8)
+        ])
+        async_results = [await async_call() for _ in range(4)]
+        return sync_results + async_results
+
+    results = asyncio.run(main())
+
+    assert results.count('sync') + results.count('async') == 10
+    assert results.count(None) == 2
+
+
+def test_throttle_thread_safe_backend():
+    with pytest.raises(ValueError):
+        throttle(1, 1, backend=object(), thread_safe=True)
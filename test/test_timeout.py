@@ -1,7 +1,9 @@
 import pytest
 import asyncio
+from datetime import datetime
 
 from aiodecorator import timeout
+from aiodecorator.testing import run, VirtualClock
 
 
 @pytest.mark.asyncio
@@ -34,3 +36,96 @@ async def test_timeout_at():
 
     with pytest.raises(asyncio.TimeoutError):
         await my_function()
+
+
+def test_timeout_clock():
+    clock = VirtualClock(datetime(2025, 1, 1))
+
+    async def main():
+        @timeout(at=clock.time() + 3600, clock=clock)
+        async def my_function(seconds: float):
+            await clock.sleep(seconds)
+            return 'done'
+
+        assert await my_function(3599) == 'done'
+
+        with pytest.raises(asyncio.TimeoutError):
+            await my_function(2)
+
+    run(main())
+
+
+def test_timeout_adaptive():
+    durations = [0.1] * 40 + [0.5, 0.12]
+
+    async def main():
+        @timeout(percentile=0.9, multiplier=2, max_seconds=10)
+        async def my_function(seconds: float):
+            await asyncio.sleep(seconds)
+            return 'done'
+
+        for seconds in durations[:40]:
+            assert await my_function(seconds) == 'done'
+
+        # About 2 times of 0.1
+        with pytest.raises(asyncio.TimeoutError):
+            await my_function(0.5)
+
+        assert await my_function(0.12) == 'done'
+
+    run(main())
+
+
+def test_timeout_adaptive_warmup():
+    async def main():
+        @timeout(5, percentile=0.9, min_seconds=1, max_seconds=3)
+        async def my_function(seconds: float):
+            await asyncio.sleep(seconds)
+            return 'done'
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        # Capped by `max_seconds` before warmed up
+        with pytest.raises(asyncio.TimeoutError):
+            await my_function(4)
+
+        assert loop.time() - start == pytest.approx(3)
+
+        for _ in range(30):
+            await my_function(0.01)
+
+        # Not less than `min_seconds`
+        assert await my_function(0.9) == 'done'
+
+    run(main())
+
+
+def test_timeout_adaptive_grows():
+    async def main():
+        @timeout(percentile=0.5, multiplier=1.5, max_seconds=100)
+        async def my_function(seconds: float):
+            await asyncio.sleep(seconds)
+            return 'done'
+
+        for _ in range(30):
+            await my_function(1)
+
+        timeouts = 0
+
+        # The latency rises, and the timeout follows
+        for _ in range(60):
+            try:
+                await my_function(2)
+            except asyncio.TimeoutError:
+                timeouts += 1
+
+        assert 0 < timeouts < 60
+        assert await my_function(2) == 'done'
+
+    run(main())
+
+
+def test_timeout_adaptive_with_at():
+    with pytest.raises(ValueError):
+        timeout(at=1, percentile=0.9)
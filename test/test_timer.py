@@ -0,0 +1,158 @@
+import asyncio
+from datetime import datetime
+from typing import List
+
+from aiodecorator import (
+    repeat,
+    schedule_naturally
+)
+from aiodecorator.timer import SharedTimer
+from aiodecorator.testing import (
+    run,
+    VirtualClock
+)
+
+
+def spy_handles(loop: asyncio.AbstractEventLoop) -> List[asyncio.TimerHandle]:
+    """
+    Returns the list of the timer handles which `loop` creates from now on
+    """
+
+    handles = []
+    call_at = loop.call_at
+
+    def spy(*args, **kwargs):
+        handle = call_at(*args, **kwargs)
+        handles.append(handle)
+        return handle
+
+    setattr(loop, 'call_at', spy)
+    return handles
+
+
+def test_shared_timer_sleep():
+    timer = SharedTimer()
+
+    async def sleeper(seconds: float):
+        await timer.sleep(seconds)
+        return timer.time()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        handles = spy_handles(loop)
+
+        tasks = [
+            asyncio.create_task(sleeper(seconds))
+            for seconds in (3, 1, 2, 1)
+        ]
+
+        await asyncio.sleep(0)
+
+        # Only one loop timer for all sleepers, besides the current one
+        assert len(timer) == 4
+        assert len([h for h in handles if not h.cancelled()]) == 1
+
+        return await asyncio.gather(*tasks)
+
+    assert run(main()) == [3, 1, 2, 1]
+
+
+def test_shared_timer_cancel():
+    timer = SharedTimer()
+    called = []
+
+    async def main():
+        entries = [
+            timer.call_later(index, called.append, index)
+            for index in range(200)
+        ]
+
+        for entry in entries[::2]:
+            entry.cancel()
+
+        # Cancel twice
+        entries[0].cancel()
+
+        assert len(timer) == 100
+
+        task = asyncio.create_task(timer.sleep(10))
+        await asyncio.sleep(0)
+        task.cancel()
+
+        await asyncio.sleep(300)
+
+    run(main())
+
+    assert called == list(range(1, 200, 2))
+    assert len(timer) == 0
+
+
+def test_shared_timer_compact_while_firing():
+    timer = SharedTimer()
+    called = []
+    later = []
+
+    def cancel_later():
+        # Cancels most of the entries, which compacts the heap
+        # while the due entries are being fired
+        for entry in later:
+            entry.cancel()
+
+    async def main():
+        timer.call_later(1, cancel_later)
+
+        for index in range(5):
+            timer.call_later(1, called.append, index)
+
+        later.extend(
+            timer.call_later(2 + index, called.append, 'later')
+            for index in range(100)
+        )
+
+        await asyncio.sleep(300)
+
+    run(main())
+
+    assert called == list(range(5))
+    assert len(timer) == 0
+
+
+def test_shared_timer_callback_error():
+    timer = SharedTimer()
+    errors = []
+
+    def fail():
+        raise ValueError('boom')
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(
+            lambda loop, context: errors.append(context['exception'])
+        )
+
+        timer.call_later(1, fail)
+        await timer.sleep(2)
+
+    run(main())
+
+    assert isinstance(errors[0], ValueError)
+
+
+def test_shared_timer_schedule():
+    timer = SharedTimer(VirtualClock(datetime(2025, 1, 1)))
+    times = {}
+
+    @repeat(3, clock=timer)
+    @schedule_naturally('hourly', clock=timer)
+    async def job(customer: int):
+        times.setdefault(customer, []).append(timer.now().hour)
+
+    async def main():
+        await asyncio.gather(*[job(customer) for customer in range(100)])
+
+    run(main())
+
+    assert times == {
+        customer: [1, 2, 3]
+        for customer in range(100)
+    }